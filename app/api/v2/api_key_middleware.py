@@ -1,32 +1,42 @@
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import HTTPException
+from starlette.requests import Request
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 from services.v2 import auth_provider_v2
 from utils.globals import open_url_points
 
 
-class ApiKeyProviderMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class ApiKeyProviderMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request = Request(scope)
         if request.url.path in open_url_points:
-            return await call_next(request)
+            return await self.app(scope, receive, send)
 
         api_key = request.headers.get("Authorization")
 
         if not api_key:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=403, content={"detail": "No API Key provided"}
             )
+            return await response(scope, receive, send)
 
         try:
             auth_provider_v2.get_api_key(request, api_key)
         except HTTPException as http_exc:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=http_exc.status_code, content={"detail": http_exc.detail}
             )
+            return await response(scope, receive, send)
         except Exception as error:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=500, content={"detail": "Internal Server Error"}
             )
+            return await response(scope, receive, send)
 
-        response = await call_next(request)
-        return response
+        await self.app(scope, receive, send)
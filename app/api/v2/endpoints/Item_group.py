@@ -19,10 +19,7 @@ def read_item_group(item_group_id: int):
 
 @item_group_router_v2.get("")
 def read_item_groups(request: Request):
-    item_groups = data_provider_v2.fetch_item_group_pool().get_item_groups()
-    if item_groups is None:
-        raise HTTPException(status_code=404, detail="No item_groups found")
-    return request.state.pagination.apply(item_groups)
+    return data_provider_v2.fetch_item_group_pool().paginate(request.state.pagination)
 
 
 @item_group_router_v2.get("/{item_group_id}/items")
@@ -79,8 +76,7 @@ def partial_update_item_group(item_group_id: int, item_group: dict):
     valid_keys = ItemGroup.model_fields.keys()
     update_data = {key: value for key, value in item_group.items() if key in valid_keys}
 
-    for key, value in update_data.items():
-        setattr(existing_item_group, key, value)
+    existing_item_group = existing_item_group.model_copy(update=update_data)
 
     partial_updated_item_group = (
         data_provider_v2.fetch_item_group_pool().update_item_group(
@@ -17,10 +17,7 @@ def read_client(client_id: int):
 
 @client_router_v2.get("")
 def read_clients(request: Request):
-    clients = data_provider_v2.fetch_client_pool().get_clients()
-    if clients is None:
-        raise HTTPException(status_code=404, detail="No clients found")
-    return request.state.pagination.apply(clients)
+    return data_provider_v2.fetch_client_pool().paginate(request.state.pagination)
 
 
 @client_router_v2.get("/{client_id}/orders")
@@ -68,8 +65,7 @@ def partial_update_client(client_id: int, client: dict):
     valid_keys = Client.model_fields.keys()
     update_data = {key: value for key, value in client.items() if key in valid_keys}
 
-    for key, value in update_data.items():
-        setattr(existing_client, key, value)
+    existing_client = existing_client.model_copy(update=update_data)
 
     partial_updated_client = data_provider_v2.fetch_client_pool().update_client(
         client_id, existing_client
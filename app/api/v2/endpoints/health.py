@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from services.v2 import data_provider_v2
+
+health_router_v2 = APIRouter(tags=["v2.Health"], prefix="/health")
+
+
+@health_router_v2.get("")
+def read_health():
+    return {"status": "ok"}
+
+
+@health_router_v2.get("/ready")
+def read_readiness():
+    warm_up_status = data_provider_v2.fetch_warm_up_status()
+    if not data_provider_v2.is_ready():
+        return JSONResponse(status_code=503, content=warm_up_status)
+    return warm_up_status
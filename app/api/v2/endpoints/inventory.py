@@ -2,6 +2,9 @@ from fastapi import APIRouter, Request, HTTPException, status
 from fastapi.responses import JSONResponse
 from models.v2.inventory import Inventory
 from services.v2 import data_provider_v2
+from typing import List
+from services.v2.query_service import Query
+from services.v2.batch_service import create_batch, update_batch
 
 
 inventory_router_v2 = APIRouter(tags=["v2.Inventories"], prefix="/inventories")
@@ -20,10 +23,11 @@ def read_inventory(inventory_id: int):
 
 @inventory_router_v2.get("")
 def read_inventories(request: Request):
-    inventories = data_provider_v2.fetch_inventory_pool().get_inventories()
-    if not inventories:
+    inventory_pool = data_provider_v2.fetch_inventory_pool()
+    if not inventory_pool.data.count("is_archived", False):
         raise HTTPException(status_code=404, detail="No inventories found")
-    return request.state.pagination.apply(inventories)
+    query = Query.parse(Inventory, request.query_params)
+    return inventory_pool.paginate(request.state.pagination, query)
 
 
 @inventory_router_v2.post("")
@@ -36,6 +40,30 @@ def create_inventory(inventory: Inventory):
     )
 
 
+@inventory_router_v2.post("/batch")
+def create_inventories(inventories: List[dict]):
+    return create_batch(
+        Inventory,
+        inventories,
+        data_provider_v2.fetch_inventory_pool().add_inventories,
+        "Inventory has archived entries",
+    )
+
+
+@inventory_router_v2.patch("/batch")
+def partial_update_inventories(inventories: List[dict]):
+    inventory_pool = data_provider_v2.fetch_inventory_pool()
+    return update_batch(
+        Inventory,
+        inventories,
+        "id",
+        "Inventory",
+        inventory_pool.is_inventory_archived,
+        inventory_pool.get_inventory,
+        inventory_pool.update_inventories,
+    )
+
+
 @inventory_router_v2.put("/{inventory_id}")
 def update_inventory(inventory_id: int, inventory: Inventory):
     is_archived = data_provider_v2.fetch_inventory_pool().is_inventory_archived(
@@ -72,8 +100,7 @@ def partial_update_inventory(inventory_id: int, inventory: dict):
     valid_keys = Inventory.model_fields.keys()
     update_data = {key: value for key, value in inventory.items() if key in valid_keys}
 
-    for key, value in update_data.items():
-        setattr(existing_inventory, key, value)
+    existing_inventory = existing_inventory.model_copy(update=update_data)
 
     partial_updated_inventory = (
         data_provider_v2.fetch_inventory_pool().update_inventory(
@@ -2,6 +2,8 @@ from fastapi import APIRouter, Request, HTTPException, status
 from fastapi.responses import JSONResponse
 from services.v2 import data_provider_v2
 from models.v2.item import Item
+from typing import List
+from services.v2.batch_service import create_batch, update_batch
 
 item_router_v2 = APIRouter(tags=["v2.Items"], prefix="/items")
 
@@ -18,10 +20,7 @@ def read_item(item_id: str):
 
 @item_router_v2.get("")
 def read_items(request: Request):
-    items = data_provider_v2.fetch_item_pool().get_items()
-    if items is None:
-        raise HTTPException(status_code=404, detail="Items not found")
-    return request.state.pagination.apply(items)
+    return data_provider_v2.fetch_item_pool().paginate(request.state.pagination)
 
 
 @item_router_v2.get("/{item_id}/inventory")
@@ -59,6 +58,30 @@ def create_item(item: Item):
     )
 
 
+@item_router_v2.post("/batch")
+def create_items(items: List[dict]):
+    return create_batch(
+        Item,
+        items,
+        data_provider_v2.fetch_item_pool().add_items,
+        "Item cannot be created, maybe due to archived entities",
+    )
+
+
+@item_router_v2.patch("/batch")
+def partial_update_items(items: List[dict]):
+    item_pool = data_provider_v2.fetch_item_pool()
+    return update_batch(
+        Item,
+        items,
+        "uid",
+        "Item",
+        item_pool.is_item_archived,
+        item_pool.get_item,
+        item_pool.update_items,
+    )
+
+
 @item_router_v2.put("/{item_id}")
 def update_item(item_id: str, item: Item):
     existing_item = data_provider_v2.fetch_item_pool().is_item_archived(item_id)
@@ -82,8 +105,7 @@ def partial_update_item(item_id: str, item: dict):
     valid_keys = Item.model_fields.keys()
     update_data = {key: value for key, value in item.items() if key in valid_keys}
 
-    for key, value in update_data.items():
-        setattr(existing_item, key, value)
+    existing_item = existing_item.model_copy(update=update_data)
 
     partial_updated_item = data_provider_v2.fetch_item_pool().update_item(
         item_id, existing_item
@@ -18,10 +18,7 @@ def read_item_line(item_line_id: int):
 
 @item_line_router_v2.get("")
 def read_item_lines(request: Request):
-    item_lines = data_provider_v2.fetch_item_line_pool().get_item_lines()
-    if item_lines is None:
-        raise HTTPException(status_code=404, detail="Item lines not found")
-    return request.state.pagination.apply(item_lines)
+    return data_provider_v2.fetch_item_line_pool().paginate(request.state.pagination)
 
 
 @item_line_router_v2.get("/{item_line_id}/items")
@@ -83,8 +80,7 @@ def partial_update_item_line(item_line_id: int, item_line: dict):
     valid_keys = ItemLine.model_fields.keys()
     update_data = {key: value for key, value in item_line.items() if key in valid_keys}
 
-    for key, value in update_data.items():
-        setattr(existing_item_line, key, value)
+    existing_item_line = existing_item_line.model_copy(update=update_data)
 
     partial_updated_item_line = (
         data_provider_v2.fetch_item_line_pool().update_item_line(
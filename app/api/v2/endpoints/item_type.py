@@ -19,10 +19,7 @@ def read_item_type(item_type_id: int):
 
 @item_type_router_v2.get("")
 def read_item_types(request: Request):
-    item_types = data_provider_v2.fetch_item_type_pool().get_item_types()
-    if item_types is None:
-        raise HTTPException(status_code=404, detail="No item_types found")
-    return request.state.pagination.apply(item_types)
+    return data_provider_v2.fetch_item_type_pool().paginate(request.state.pagination)
 
 
 @item_type_router_v2.get("/{item_type_id}/items")
@@ -77,8 +74,7 @@ def partial_update_item_type(item_type_id: int, item_type: dict):
     valid_keys = ItemType.model_fields.keys()
     update_data = {key: value for key, value in item_type.items() if key in valid_keys}
 
-    for key, value in update_data.items():
-        setattr(existing_item_type, key, value)
+    existing_item_type = existing_item_type.model_copy(update=update_data)
 
     partial_updated_item_type = (
         data_provider_v2.fetch_item_type_pool().update_item_type(
@@ -18,10 +18,7 @@ def read_location(location_id: int):
 
 @location_router_v2.get("")
 def read_locations(request: Request):
-    locations = data_provider_v2.fetch_location_pool().get_locations()
-    if locations is None:
-        raise HTTPException(status_code=404, detail="No locations found")
-    return request.state.pagination.apply(locations)
+    return data_provider_v2.fetch_location_pool().paginate(request.state.pagination)
 
 
 @location_router_v2.post("")
@@ -54,8 +51,7 @@ def partial_update_location(location_id: int, location: dict):
     valid_keys = Location.model_fields.keys()
     update_data = {key: value for key, value in location.items() if key in valid_keys}
 
-    for key, value in update_data.items():
-        setattr(existing_location, key, value)
+    existing_location = existing_location.model_copy(update=update_data)
 
     partial_updated_location = data_provider_v2.fetch_location_pool().update_location(
         location_id, existing_location
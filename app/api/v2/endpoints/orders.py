@@ -3,6 +3,9 @@ from fastapi.responses import JSONResponse
 from services.v2 import data_provider_v2
 from models.v2.order import Order
 from models.v2.ItemInObject import ItemInObject
+from typing import List
+from services.v2.query_service import Query
+from services.v2.batch_service import create_batch, update_batch
 
 order_router_v2 = APIRouter(tags=["v2.Orders"], prefix="/orders")
 
@@ -19,10 +22,8 @@ def read_order(order_id: int):
 
 @order_router_v2.get("")
 def read_orders(request: Request):
-    orders = data_provider_v2.fetch_order_pool().get_orders()
-    if orders is None:
-        raise HTTPException(status_code=404, detail="Orders not found")
-    return request.state.pagination.apply(orders)
+    query = Query.parse(Order, request.query_params)
+    return data_provider_v2.fetch_order_pool().paginate(request.state.pagination, query)
 
 
 @order_router_v2.get("/{order_id}/items")
@@ -45,6 +46,30 @@ def create_order(order: Order):
     )
 
 
+@order_router_v2.post("/batch")
+def create_orders(orders: List[dict]):
+    return create_batch(
+        Order,
+        orders,
+        data_provider_v2.fetch_order_pool().add_orders,
+        "Order has archived entities",
+    )
+
+
+@order_router_v2.patch("/batch")
+def partial_update_orders(orders: List[dict]):
+    order_pool = data_provider_v2.fetch_order_pool()
+    return update_batch(
+        Order,
+        orders,
+        "id",
+        "Order",
+        order_pool.is_order_archived,
+        order_pool.get_order,
+        order_pool.update_orders,
+    )
+
+
 @order_router_v2.put("/{order_id}")
 def update_order(order_id: int, order: Order):
     existingOrder = data_provider_v2.fetch_order_pool().is_order_archived(order_id)
@@ -81,8 +106,7 @@ def partial_update_order(order_id: int, order: dict):
     valid_keys = Order.model_fields.keys()
     update_data = {key: value for key, value in order.items() if key in valid_keys}
 
-    for key, value in update_data.items():
-        setattr(existing_order, key, value)
+    existing_order = existing_order.model_copy(update=update_data)
 
     partial_updated_order = data_provider_v2.fetch_order_pool().update_order(
         order_id, existing_order
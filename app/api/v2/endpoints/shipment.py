@@ -5,6 +5,8 @@ from models.v2.ItemInObject import ItemInObject
 from services.v2 import data_provider_v2
 from models.v2.shipment import Shipment
 from typing import List
+from services.v2.query_service import Query
+from services.v2.batch_service import create_batch, update_batch
 
 shipment_router_v2 = APIRouter(tags=["v2.Shipments"], prefix="/shipments")
 
@@ -21,10 +23,10 @@ def read_shipment(shipment_id: int):
 
 @shipment_router_v2.get("")
 def read_shipments(request: Request):
-    shipments = data_provider_v2.fetch_shipment_pool().get_shipments()
-    if shipments is None:
-        raise HTTPException(status_code=404, detail="No shipments found")
-    return request.state.pagination.apply(shipments)
+    query = Query.parse(Shipment, request.query_params)
+    return data_provider_v2.fetch_shipment_pool().paginate(
+        request.state.pagination, query
+    )
 
 
 @shipment_router_v2.get("/{shipment_id}/orders")
@@ -57,6 +59,30 @@ def create_shipment(shipment: Shipment):
     )
 
 
+@shipment_router_v2.post("/batch")
+def create_shipments(shipments: List[dict]):
+    return create_batch(
+        Shipment,
+        shipments,
+        data_provider_v2.fetch_shipment_pool().add_shipments,
+        "Shipment has archived entities",
+    )
+
+
+@shipment_router_v2.patch("/batch")
+def partial_update_shipments(shipments: List[dict]):
+    shipment_pool = data_provider_v2.fetch_shipment_pool()
+    return update_batch(
+        Shipment,
+        shipments,
+        "id",
+        "Shipment",
+        shipment_pool.is_shipment_archived,
+        shipment_pool.get_shipment,
+        shipment_pool.update_shipments,
+    )
+
+
 @shipment_router_v2.put("/{shipment_id}")
 def update_shipment(shipment_id: int, shipment: Shipment):
     is_archived = data_provider_v2.fetch_shipment_pool().is_shipment_archived(
@@ -144,8 +170,7 @@ def partial_update_shipment(shipment_id: int, shipment: dict):
     valid_keys = Shipment.model_fields.keys()
     update_data = {key: value for key, value in shipment.items() if key in valid_keys}
 
-    for key, value in update_data.items():
-        setattr(existing_shipment, key, value)
+    existing_shipment = existing_shipment.model_copy(update=update_data)
 
     partial_updated_shipment = data_provider_v2.fetch_shipment_pool().update_shipment(
         shipment_id, existing_shipment
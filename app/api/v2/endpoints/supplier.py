@@ -18,10 +18,7 @@ def read_supplier(supplier_id: int):
 
 @supplier_router_v2.get("")
 def read_suppliers(request: Request):
-    suppliers = data_provider_v2.fetch_supplier_pool().get_suppliers()
-    if suppliers is None:
-        raise HTTPException(status_code=404, detail="Suppliers not found")
-    return request.state.pagination.apply(suppliers)
+    return data_provider_v2.fetch_supplier_pool().paginate(request.state.pagination)
 
 
 @supplier_router_v2.get("/{supplier_id}/items")
@@ -75,8 +72,7 @@ def partial_update_supplier(supplier_id: int, supplier: dict):
     valid_keys = Supplier.model_fields.keys()
     update_data = {key: value for key, value in supplier.items() if key in valid_keys}
 
-    for key, value in update_data.items():
-        setattr(existing_supplier, key, value)
+    existing_supplier = existing_supplier.model_copy(update=update_data)
 
     partial_updated_supplier = data_provider_v2.fetch_supplier_pool().update_supplier(
         supplier_id, existing_supplier
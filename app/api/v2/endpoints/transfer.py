@@ -15,10 +15,7 @@ def read_transfer(transfer_id: int):
 
 @transfer_router_v2.get("")
 def read_transfers(request: Request):
-    transfers = data_provider_v2.fetch_transfer_pool().get_transfers()
-    if transfers is None:
-        raise HTTPException(status_code=404, detail="No transfers found")
-    return request.state.pagination.apply(transfers)
+    return data_provider_v2.fetch_transfer_pool().paginate(request.state.pagination)
 
 
 @transfer_router_v2.get("/{transfer_id}/items")
@@ -67,8 +64,7 @@ def partial_update_transfer(transfer_id: int, transfer: dict):
     valid_keys = Transfer.model_fields.keys()
     update_data = {key: value for key, value in transfer.items() if key in valid_keys}
 
-    for key, value in update_data.items():
-        setattr(existing_transfer, key, value)
+    existing_transfer = existing_transfer.model_copy(update=update_data)
 
     partial_updated_transfer = data_provider_v2.fetch_transfer_pool().update_transfer(
         transfer_id, existing_transfer
@@ -88,10 +84,9 @@ def commit_transfer(transfer_id: int):
     committed_transfer = data_provider_v2.fetch_transfer_pool().commit_transfer(
         transfer
     )
-    updated_transfer = data_provider_v2.fetch_transfer_pool().update_transfer(
-        transfer_id, committed_transfer
-    )
-    return updated_transfer
+    if committed_transfer is None:
+        raise HTTPException(status_code=400, detail="Transfer has archived entities")
+    return committed_transfer
 
 
 @transfer_router_v2.delete("/{transfer_id}")
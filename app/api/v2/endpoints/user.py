@@ -16,10 +16,7 @@ def read_user(user_id: int):
 
 @user_router_v2.get("")
 def read_users(request: Request):
-    users = data_provider_v2.fetch_user_pool().get_users()
-    if users is None:
-        raise HTTPException(status_code=404, detail="No users found")
-    return request.state.pagination.apply(users)
+    return data_provider_v2.fetch_user_pool().paginate(request.state.pagination)
 
 
 @user_router_v2.post("")
@@ -56,8 +53,7 @@ def partial_update_user(user_id: int, user: dict):
     valid_keys = User.model_fields.keys()
     update_data = {key: value for key, value in user.items() if key in valid_keys}
 
-    for key, value in update_data.items():
-        setattr(existing_user, key, value)
+    existing_user = existing_user.model_copy(update=update_data)
     updated_user = data_provider_v2.fetch_user_pool().update_user(
         user_id, existing_user
     )
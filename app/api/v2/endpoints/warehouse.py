@@ -16,10 +16,7 @@ def read_warehouse(warehouse_id: int):
 
 @warehouse_router_v2.get("")
 def read_warehouses(request: Request):
-    warehouses = data_provider_v2.fetch_warehouse_pool().get_warehouses()
-    if warehouses is None:
-        raise HTTPException(status_code=404, detail="No warehouses found")
-    return request.state.pagination.apply(warehouses)
+    return data_provider_v2.fetch_warehouse_pool().paginate(request.state.pagination)
 
 
 @warehouse_router_v2.get("/{warehouse_id}/locations")
@@ -78,8 +75,7 @@ def partial_update_warehouse(warehouse_id: int, warehouse: dict):
     valid_keys = Warehouse.model_fields.keys()
     update_data = {key: value for key, value in warehouse.items() if key in valid_keys}
 
-    for key, value in update_data.items():
-        setattr(existing_warehouse, key, value)
+    existing_warehouse = existing_warehouse.model_copy(update=update_data)
 
     partial_updated_warehouse = (
         data_provider_v2.fetch_warehouse_pool().update_warehouse(
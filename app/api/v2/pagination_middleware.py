@@ -1,25 +1,45 @@
 from fastapi import Request
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from services.v2.pagination_service import Pagination
+from starlette.types import ASGIApp, Receive, Scope, Send
+from services.v2.pagination_service import Pagination, decode_cursor
 
 
-class PaginationProviderMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class PaginationProviderMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request = Request(scope)
         try:
             page = int(request.query_params.get("page", 1))
         except ValueError:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=422, content={"detail": "Invalid page number"}
             )
+            return await response(scope, receive, send)
 
         try:
             items_per_page = int(request.query_params.get("items_per_page", 50))
         except ValueError:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=422, content={"detail": "Invalid items_per_page number"}
             )
-        request.state.pagination = Pagination(page=page, items_per_page=items_per_page)
+            return await response(scope, receive, send)
+
+        cursor = request.query_params.get("cursor")
+        if cursor is not None:
+            try:
+                cursor = decode_cursor(cursor)
+            except ValueError:
+                response = JSONResponse(
+                    status_code=422, content={"detail": "Invalid cursor"}
+                )
+                return await response(scope, receive, send)
+        request.state.pagination = Pagination(
+            page=page, items_per_page=items_per_page, cursor=cursor
+        )
 
-        response = await call_next(request)
-        return response
+        await self.app(scope, receive, send)
@@ -0,0 +1,58 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from api.v2.conditional_request_middleware import pools_of
+from services.v2.response_cache_service import ResponseCache
+
+
+class ResponseCacheMiddleware:
+    """Serves repeated v2 GETs from a cache of their serialized responses.
+
+    The cache key is the path and query string and the entry is tied to the
+    version of the collections the route reads, so cached pages are sent
+    without running the endpoint or serializing any model.
+    """
+
+    def __init__(self, app: ASGIApp, cache: ResponseCache | None = None):
+        self.app = app
+        self.cache = cache if cache is not None else ResponseCache()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+
+        pools = pools_of(scope["path"])
+        if not pools or any(pool.version is None for pool in pools):
+            return await self.app(scope, receive, send)
+
+        key = (scope["path"], scope["query_string"])
+        version = max(pool.version for pool in pools)
+        cached = self.cache.get(key, version)
+        if cached is not None:
+            headers, body = cached
+            await send(
+                {"type": "http.response.start", "status": 200, "headers": headers}
+            )
+            return await send({"type": "http.response.body", "body": body})
+
+        start_message = None
+        body_parts = []
+
+        async def send_and_collect(message: Message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+            elif (
+                message["type"] == "http.response.body"
+                and start_message is not None
+                and start_message["status"] == 200
+            ):
+                body_parts.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    self.cache.put(
+                        key,
+                        version,
+                        list(start_message["headers"]),
+                        b"".join(body_parts),
+                    )
+            await send(message)
+
+        await self.app(scope, receive, send_and_collect)
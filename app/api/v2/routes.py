@@ -13,6 +13,7 @@ from api.v2.endpoints.client import client_router_v2
 from api.v2.endpoints.supplier import supplier_router_v2
 from api.v2.endpoints.orders import order_router_v2
 from api.v2.endpoints.user import user_router_v2
+from api.v2.endpoints.health import health_router_v2
 
 routers = APIRouter()
 
@@ -30,6 +31,7 @@ router_list = [
     supplier_router_v2,
     order_router_v2,
     user_router_v2,
+    health_router_v2,
 ]
 
 
@@ -0,0 +1,126 @@
+"""Measures how long loading the orders collection from SQLite takes.
+
+Run from the ``app`` directory::
+
+    python -m benchmarks.load_benchmark --orders 100000
+
+A temporary database is filled with the given number of orders, each with
+three order items. They are then loaded once by building every model with
+``model(**row)`` and once through ``get_all_orders``, which makes one
+``build_models`` call per table. Both run with the garbage collector running
+and with it paused, as the pools do while they hydrate. The last line reads
+the same orders from a snapshot file.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable, List
+from models.v2.ItemInObject import ItemInObject
+from models.v2.order import Order
+from services.v2 import snapshot_service
+from services.v2.database_service import DatabaseService
+from services.v2.model_services.order_service import OrderService
+from utils.globals import order_items_table
+
+ITEMS_PER_ORDER = 3
+
+
+def fill(db: DatabaseService, count: int):
+    db.insert_many(
+        [
+            Order(
+                source_id=number % 50,
+                order_date="2024-01-01T00:00:00Z",
+                request_date="2024-01-05T00:00:00Z",
+                reference=f"ORD{number:08d}",
+                reference_extra="",
+                order_status="Pending",
+                notes="",
+                shipping_notes="",
+                picking_notes="",
+                warehouse_id=number % 20 + 1,
+                ship_to=None,
+                bill_to=None,
+                shipment_id=number + 1,
+                total_amount=100.0,
+                total_discount=0.0,
+                total_tax=21.0,
+                total_surcharge=0.0,
+                created_at="2024-01-01T00:00:00Z",
+                updated_at="2024-01-01T00:00:00Z",
+                is_archived=number % 10 == 0,
+            )
+            for number in range(count)
+        ]
+    )
+    with db.get_connection() as conn:
+        conn.executemany(
+            f"INSERT INTO {order_items_table} (order_id, item_id, amount) "
+            "VALUES (?, ?, ?)",
+            [
+                (number // ITEMS_PER_ORDER + 1, f"P{number % 1000:06d}", 1)
+                for number in range(count * ITEMS_PER_ORDER)
+            ],
+        )
+
+
+def load_per_row(db: DatabaseService) -> List[Order]:
+    schema = db.get_schema(Order.table_name())
+    with db.get_connection() as conn:
+        rows = conn.execute(schema.select_all_sql).fetchall()
+        item_rows = conn.execute(
+            f"SELECT item_id, amount, order_id FROM {order_items_table}"
+        ).fetchall()
+    orders = [Order(**schema.to_dict(row)) for row in rows]
+    items_by_order = {}
+    for row in item_rows:
+        items_by_order.setdefault(row[2], []).append(
+            ItemInObject(item_id=row[0], amount=row[1])
+        )
+    for order in orders:
+        order.items = items_by_order.get(order.id, [])
+    return orders
+
+
+def measure(load: Callable[[], List[Order]], paused: bool) -> float:
+    start = time.perf_counter()
+    if paused:
+        with snapshot_service.paused_gc():
+            load()
+    else:
+        load()
+    return time.perf_counter() - start
+
+
+def run(count: int):
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseService(os.path.join(directory, "database.db"))
+        fill(db, count)
+        orders = OrderService(db, True)
+        snapshot_service.write_snapshot(db, [orders])
+        snapshot = snapshot_service.Snapshot(snapshot_service.snapshot_path(db))
+
+        loads = (
+            ("model(**row) per row", lambda: load_per_row(db)),
+            ("build_models per table", orders.get_all_orders),
+        )
+        for name, load in loads:
+            running = measure(load, False)
+            paused = measure(load, True)
+            print(
+                f"{name:24} gc running: {running:6.2f} s"
+                f" | gc paused: {paused:6.2f} s"
+                f" | {count / paused:9.0f} orders/s"
+            )
+        restored = measure(lambda: snapshot.read(Order), True)
+        print(f"{'snapshot read':24} gc paused: {restored:6.2f} s")
+        snapshot.close()
+        db.close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=100000)
+    run(parser.parse_args().orders)
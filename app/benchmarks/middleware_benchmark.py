@@ -0,0 +1,183 @@
+"""Measures the per-request overhead of the v2 middleware stack.
+
+Run from the ``app`` directory::
+
+    python -m benchmarks.middleware_benchmark --requests 20000
+
+The same requests are sent straight into the ASGI application three times:
+without any middleware, with the previous ``BaseHTTPMiddleware`` versions of
+the API-key, pagination and logging middlewares (kept below for the
+comparison) and with the current pure ASGI ones, registered the way
+``main.py`` does. The user pool is replaced by an in-memory stand-in so only
+the middleware cost is measured.
+"""
+
+import argparse
+import asyncio
+import time
+from fastapi import FastAPI, HTTPException, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+from api.v2.api_key_middleware import ApiKeyProviderMiddleware
+from api.v2.pagination_middleware import PaginationProviderMiddleware
+from api.v2.logging_middleware import LoggingProviderMiddleware
+from services.v2 import audit_service, auth_provider_v2, data_provider_v2
+from services.v2.audit_service import info_logger
+from services.v2.pagination_service import Pagination
+from utils.globals import audited_resources, open_url_points
+
+API_KEY = "benchmark"
+
+
+class BenchmarkUserPool:
+    def get_permissions(self, api_key):
+        return frozenset({("*", "*")}) if api_key == API_KEY else None
+
+    def is_allowed(self, permissions, path, method):
+        return ("*", "*") in permissions
+
+
+class PreviousApiKeyMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path in open_url_points:
+            return await call_next(request)
+        api_key = request.headers.get("Authorization")
+        if not api_key:
+            return JSONResponse(
+                status_code=403, content={"detail": "No API Key provided"}
+            )
+        try:
+            auth_provider_v2.get_api_key(request, api_key)
+        except HTTPException as http_exc:
+            return JSONResponse(
+                status_code=http_exc.status_code, content={"detail": http_exc.detail}
+            )
+        return await call_next(request)
+
+
+class PreviousPaginationMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        try:
+            page = int(request.query_params.get("page", 1))
+            items_per_page = int(request.query_params.get("items_per_page", 50))
+        except ValueError:
+            return JSONResponse(status_code=422, content={"detail": "Invalid page"})
+        request.state.pagination = Pagination(page=page, items_per_page=items_per_page)
+        return await call_next(request)
+
+
+class PreviousLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        if request.method in ["POST", "PUT", "PATCH", "DELETE"] and any(
+            resource in request.url.path for resource in audited_resources
+        ):
+            info_logger.info(f"Request: {request.method} {request.url.path}")
+            token = audit_service.current_request.set(
+                f"{request.method} {request.url.path}"
+            )
+            try:
+                response = await call_next(request)
+            finally:
+                audit_service.current_request.reset(token)
+            info_logger.info(f"Response: {response.status_code}")
+            return response
+        return await call_next(request)
+
+
+STACKS = {
+    "none": (),
+    "previous": (
+        PreviousApiKeyMiddleware,
+        PreviousPaginationMiddleware,
+        PreviousLoggingMiddleware,
+    ),
+    "current": (
+        ApiKeyProviderMiddleware,
+        PaginationProviderMiddleware,
+        LoggingProviderMiddleware,
+    ),
+}
+
+
+def create_app(middlewares) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v2/orders")
+    def get_orders(request: Request):
+        return {"page": getattr(request.state, "pagination", None) is not None}
+
+    @app.patch("/api/v2/orders/{id}")
+    def patch_order(id: int):
+        return {"id": id}
+
+    for middleware in middlewares:
+        app.add_middleware(middleware)
+    return app
+
+
+def create_scope(method: str, path: str, query_string: bytes) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query_string,
+        "headers": [
+            (b"host", b"localhost"),
+            (b"authorization", API_KEY.encode()),
+            (b"content-type", b"application/json"),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+        "state": {},
+    }
+
+
+async def send_requests(app: FastAPI, method: str, path: str, count: int) -> float:
+    body = b"{}" if method != "GET" else b""
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+
+    start = time.perf_counter()
+    for _ in range(count):
+        await app(
+            create_scope(method, path, b"page=2&items_per_page=10"), receive, send
+        )
+    return time.perf_counter() - start
+
+
+def run(count: int):
+    data_provider_v2._users = BenchmarkUserPool()
+    apps = {name: create_app(middlewares) for name, middlewares in STACKS.items()}
+
+    for method, path in (("GET", "/api/v2/orders"), ("PATCH", "/api/v2/orders/1")):
+        timings = {}
+        for name, app in apps.items():
+            # Warm up the routing and middleware stacks before timing them.
+            asyncio.run(send_requests(app, method, path, 100))
+            timings[name] = (
+                asyncio.run(send_requests(app, method, path, count)) / count * 1_000_000
+            )
+        previous = timings["previous"] - timings["none"]
+        current = timings["current"] - timings["none"]
+        print(
+            f"{method:5} {path:20} without middleware: {timings['none']:8.1f} us"
+            f" | overhead previous: {previous:8.1f} us"
+            f" | overhead current: {current:8.1f} us"
+            f" | {previous / current if current > 0 else float('inf'):5.1f}x less"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=10000)
+    run(parser.parse_args().requests)
@@ -1,9 +1,9 @@
-from typing import TypeVar
+from typing import Any, Callable, List, Tuple, TypeVar
 
 from pydantic import BaseModel
 from models.v2.user import User
 from services.v1 import data_provider
-from services.v2 import data_provider_v2
+from services.v2 import data_provider_v2, snapshot_service
 from services.v2.database_service import DatabaseService
 from models.v2.shipment import Shipment
 from models.v2.warehouse import Warehouse as Warehouse
@@ -18,6 +18,7 @@ from models.v2.location import Location
 from models.v2.supplier import Supplier
 from models.v2.transfer import Transfer
 from utils.globals import *
+import os
 import time
 
 T = TypeVar("T", bound=BaseModel)
@@ -118,41 +119,26 @@ USERS = [
 db_service = DatabaseService()
 
 
-def insert(model: T, closeConnection: bool = True) -> T:
-    table_name = model.table_name()
+def insert_many(models: List[T]) -> List[T]:
+    with db_service.get_connection():
+        return db_service.insert_many(models)
 
-    fields = model.__dict__
 
-    primary_key_field = db_service.get_primary_key_column(table_name)
-
-    if primary_key_field == "id":
-        fields.pop(primary_key_field, None)
-    else:
-        if (
-            db_service.execute_one(
-                f"SELECT * FROM {table_name} WHERE {primary_key_field} = ?",
-                (fields[primary_key_field],),
-            )
-            is not None
-        ):
-            return None
-
-    columns = ", ".join(fields.keys())
-    placeholders = ", ".join("?" for _ in fields)
-    values = tuple(fields.values())
-
-    insert_sql = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
-
-    with db_service.get_connection_without_close() as conn:
-        cursor = conn.execute(insert_sql, values)
-
-        if primary_key_field == "id":
-            inserted_id = cursor.lastrowid
-            model = model.model_copy(update={primary_key_field: inserted_id})
-
-    if closeConnection:
-        db_service.commit_and_close()
-    return model
+def insert_with_children(
+    models: List[T],
+    children_attribute: str,
+    children_table: str,
+    columns: Tuple[str, ...],
+    to_row: Callable[[int, Any], Tuple[Any, ...]],
+) -> List[T]:
+    with db_service.get_connection():
+        added = db_service.insert_many(models)
+        rows = []
+        for model in added:
+            for child in getattr(model, children_attribute) or []:
+                rows.append(to_row(model.id, child))
+        db_service.insert_rows(children_table, columns, rows)
+    return added
 
 
 if __name__ == "__main__":
@@ -161,8 +147,6 @@ if __name__ == "__main__":
     data_provider_v2.init()
     data_provider.init()
 
-    amount_before_closing = 500
-
     for user in USERS:
         endpoint_access = user["endpoint_access"].copy()
         del endpoint_access["full"]
@@ -173,257 +157,114 @@ if __name__ == "__main__":
             endpoint_access,
         )
 
-    count = 0
-    all_clients = data_provider.fetch_client_pool().get_clients()
-    for client in all_clients:
-        count += 1
-        x = Client(**client)
-        if count % amount_before_closing == 0 or count == len(all_clients):
-            insert(x)
-        else:
-            insert(x, False)
-
-    count = 0
-    all_inventories = data_provider.fetch_inventory_pool().get_inventories()
-    for inventory in all_inventories:
-        count += 1
-
-        inventory = Inventory(**inventory)
-
-        table_name = inventory.table_name()
-
-        fields = data_provider_v2.fetch_inventory_pool().get_key_values_of_inventory(
-            inventory
-        )
-
-        columns = ", ".join(fields.keys())
-        placeholders = ", ".join("?" for _ in fields)
-        values = tuple(fields.values())
-
-        insert_sql = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
-
-        with db_service.get_connection_without_close() as conn:
-            cursor_inventory = conn.execute(insert_sql, values)
-            inventory.id = cursor_inventory.lastrowid
-
-            if inventory.locations:
-                for location_id in inventory.locations:
-                    location_insert_sql = f"""
-                    INSERT INTO {inventory_locations_table} (inventory_id, location_id)
-                    VALUES (?, ?)
-                    """
-                    conn.execute(location_insert_sql, (inventory.id, location_id))
-
-        if count % amount_before_closing == 0 or count == len(all_inventories):
-            db_service.commit_and_close()
-
-    count = 0
-    all_items = data_provider.fetch_item_pool().get_items()
-    for item in all_items:
-        count += 1
-        if count % amount_before_closing == 0 or count == len(all_items):
-            insert(Item(**item))
-        else:
-            insert(Item(**item), False)
-
-    count = 0
-    all_item_groups = data_provider.fetch_item_group_pool().get_item_groups()
-    for item_group in all_item_groups:
-        count += 1
-        if count % amount_before_closing == 0 or count == len(all_item_groups):
-            insert(ItemGroup(**item_group))
-        else:
-            insert(ItemGroup(**item_group), False)
-
-    count = 0
-    all_item_lines = data_provider.fetch_item_line_pool().get_item_lines()
-    for item_line in all_item_lines:
-        count += 1
-        if count % amount_before_closing == 0 or count == len(all_item_lines):
-            insert(ItemLine(**item_line))
-        else:
-            insert(ItemLine(**item_line), False)
-
-    count = 0
-    all_item_types = data_provider.fetch_item_type_pool().get_item_types()
-    for item_type in all_item_types:
-        count += 1
-        if count % amount_before_closing == 0 or count == len(all_item_types):
-            insert(ItemType(**item_type))
-        else:
-            insert(ItemType(**item_type), False)
-
-    count = 0
-    all_shipments = data_provider.fetch_shipment_pool().get_shipments()
-    for shipment in all_shipments:
-        count += 1
-
-        shipment = Shipment(**shipment)
-
-        table_name = shipment.table_name()
-
-        fields = {}
-        for key, value in vars(shipment).items():
-            if key != "id" and key != "items":
-                fields[key] = value
-
-        columns = ", ".join(fields.keys())
-        placeholders = ", ".join("?" for _ in fields)
-        values = tuple(fields.values())
-
-        insert_sql = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
-
-        with db_service.get_connection_without_close() as conn:
-            cursor = conn.execute(insert_sql, values)
-            shipment_id = cursor.lastrowid
-            shipment.id = shipment_id
-
-            if shipment.items:
-                for shipment_items in shipment.items:
-                    items_insert_sql = f"""
-                    INSERT INTO {shipment_items_table} (shipment_id, item_uid, amount)
-                    VALUES (?, ?, ?)
-                    """
-                    conn.execute(
-                        items_insert_sql,
-                        (shipment_id, shipment_items.item_id, shipment_items.amount),
-                    )
-
-        if count % amount_before_closing == 0 or count == len(all_shipments):
-            db_service.commit_and_close()
-
-    count = 0
-    all_suppliers = data_provider.fetch_supplier_pool().get_suppliers()
-    for supplier in all_suppliers:
-        count += 1
-        if count % amount_before_closing == 0 or count == len(all_suppliers):
-            insert(Supplier(**supplier))
-        else:
-            insert(Supplier(**supplier), False)
-
-    count = 0
-    all_transfers = data_provider.fetch_transfer_pool().get_transfers()
-    for transfer in all_transfers:
-        count += 1
-
-        transfer = Transfer(**transfer)
-
-        table_name = transfer.table_name()
-
-        fields = {}
-        for key, value in vars(transfer).items():
-            if key != "id" and key != "items":
-                fields[key] = value
-
-        columns = ", ".join(fields.keys())
-        placeholders = ", ".join("?" for _ in fields)
-        values = tuple(fields.values())
-
-        insert_sql = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
-
-        with db_service.get_connection_without_close() as conn:
-            cursor = conn.execute(insert_sql, values)
-            transfer_id = cursor.lastrowid
-            transfer.id = transfer_id
-
-            if transfer.items:
-                for transfer_items in transfer.items:
-                    items_insert_sql = f"""
-                    INSERT INTO {transfer_items_table} (transfer_id, item_uid, amount)
-                    VALUES (?, ?, ?)
-                    """
-                    conn.execute(
-                        items_insert_sql,
-                        (transfer_id, transfer_items.item_id, transfer_items.amount),
-                    )
-
-        if count % amount_before_closing == 0 or count == len(all_transfers):
-            db_service.commit_and_close()
-
-    count = 0
-    all_warehouses = data_provider.fetch_warehouse_pool().get_warehouses()
-    for warehouse in all_warehouses:
-        count += 1
-        if count % amount_before_closing == 0 or count == len(all_warehouses):
-            insert(
-                Warehouse(
-                    code=warehouse["code"],
-                    name=warehouse["name"],
-                    address=warehouse["address"],
-                    zip=warehouse["zip"],
-                    city=warehouse["city"],
-                    province=warehouse["province"],
-                    country=warehouse["country"],
-                    contact_name=warehouse["contact"]["name"],
-                    contact_phone=warehouse["contact"]["phone"],
-                    contact_email=warehouse["contact"]["email"],
-                )
+    insert_many(
+        [Client(**client) for client in data_provider.fetch_client_pool().get_clients()]
+    )
+
+    insert_with_children(
+        [
+            Inventory(**inventory)
+            for inventory in data_provider.fetch_inventory_pool().get_inventories()
+        ],
+        "locations",
+        inventory_locations_table,
+        ("inventory_id", "location_id"),
+        lambda inventory_id, location_id: (inventory_id, location_id),
+    )
+
+    insert_many([Item(**item) for item in data_provider.fetch_item_pool().get_items()])
+
+    insert_many(
+        [
+            ItemGroup(**item_group)
+            for item_group in data_provider.fetch_item_group_pool().get_item_groups()
+        ]
+    )
+
+    insert_many(
+        [
+            ItemLine(**item_line)
+            for item_line in data_provider.fetch_item_line_pool().get_item_lines()
+        ]
+    )
+
+    insert_many(
+        [
+            ItemType(**item_type)
+            for item_type in data_provider.fetch_item_type_pool().get_item_types()
+        ]
+    )
+
+    insert_with_children(
+        [
+            Shipment(**shipment)
+            for shipment in data_provider.fetch_shipment_pool().get_shipments()
+        ],
+        "items",
+        shipment_items_table,
+        ("shipment_id", "item_uid", "amount"),
+        lambda shipment_id, item: (shipment_id, item.item_id, item.amount),
+    )
+
+    insert_many(
+        [
+            Supplier(**supplier)
+            for supplier in data_provider.fetch_supplier_pool().get_suppliers()
+        ]
+    )
+
+    insert_with_children(
+        [
+            Transfer(**transfer)
+            for transfer in data_provider.fetch_transfer_pool().get_transfers()
+        ],
+        "items",
+        transfer_items_table,
+        ("transfer_id", "item_uid", "amount"),
+        lambda transfer_id, item: (transfer_id, item.item_id, item.amount),
+    )
+
+    insert_many(
+        [
+            Warehouse(
+                code=warehouse["code"],
+                name=warehouse["name"],
+                address=warehouse["address"],
+                zip=warehouse["zip"],
+                city=warehouse["city"],
+                province=warehouse["province"],
+                country=warehouse["country"],
+                contact_name=warehouse["contact"]["name"],
+                contact_phone=warehouse["contact"]["phone"],
+                contact_email=warehouse["contact"]["email"],
             )
-        else:
-            insert(
-                Warehouse(
-                    code=warehouse["code"],
-                    name=warehouse["name"],
-                    address=warehouse["address"],
-                    zip=warehouse["zip"],
-                    city=warehouse["city"],
-                    province=warehouse["province"],
-                    country=warehouse["country"],
-                    contact_name=warehouse["contact"]["name"],
-                    contact_phone=warehouse["contact"]["phone"],
-                    contact_email=warehouse["contact"]["email"],
-                ),
-                False,
-            )
-
-    count = 0
-    all_locations = data_provider.fetch_location_pool().get_locations()
-    for location in all_locations:
-        count += 1
-        if count % amount_before_closing == 0 or count == len(all_locations):
-            insert(Location(**location))
-        else:
-            insert(Location(**location), False)
-
-    count = 0
-    all_orders = data_provider.fetch_order_pool().get_orders()
-    for order in all_orders:
-        count += 1
-
-        order = Order(**order)
-
-        table_name = order.table_name()
-
-        fields = {}
-        for key, value in vars(order).items():
-            if key != "id" and key != "items":
-                fields[key] = value
-
-        columns = ", ".join(fields.keys())
-        placeholders = ", ".join("?" for _ in fields)
-        values = tuple(fields.values())
-
-        insert_sql = f"""INSERT INTO {
-            table_name} ({columns}) VALUES ({placeholders})"""
-
-        with db_service.get_connection_without_close() as conn:
-            cursor = conn.execute(insert_sql, values)
-            order_id = cursor.lastrowid
-            order.id = order_id
-
-            if order.items:
-                for order_items in order.items:
-                    items_insert_sql = f"""
-                    INSERT INTO {order_items_table} (order_id, item_id, amount)
-                    VALUES (?, ?, ?)
-                    """
-                    conn.execute(
-                        items_insert_sql,
-                        (order_id, order_items.item_id, order_items.amount),
-                    )
-
-        if count % amount_before_closing == 0 or count == len(all_orders):
-            db_service.commit_and_close()
+            for warehouse in data_provider.fetch_warehouse_pool().get_warehouses()
+        ]
+    )
+
+    insert_many(
+        [
+            Location(**location)
+            for location in data_provider.fetch_location_pool().get_locations()
+        ]
+    )
+
+    insert_with_children(
+        [Order(**order) for order in data_provider.fetch_order_pool().get_orders()],
+        "items",
+        order_items_table,
+        ("order_id", "item_id", "amount"),
+        lambda order_id, item: (order_id, item.item_id, item.amount),
+    )
+
+    # Running workers reload everything anyway; drop the import from the log.
+    db_service.prune_change_log(0)
+    # A snapshot of the previous database must not be restored over this one.
+    if os.path.exists(snapshot_service.snapshot_path(db_service)):
+        os.remove(snapshot_service.snapshot_path(db_service))
+    # Refresh the planner statistics now that the tables are filled.
+    db_service.analyze()
+    db_service.close_pool()
 
     elapsed_time = time.time() - start_time
 
@@ -1,17 +1,98 @@
+import logging
 import os
+import threading
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from api.v2.api_key_middleware import ApiKeyProviderMiddleware
-from api.v2.data_middleware import DataProviderMiddleware
+from api.v2.conditional_request_middleware import ConditionalRequestMiddleware
+from api.v2.response_cache_middleware import ResponseCacheMiddleware
 from api.v2.pagination_middleware import PaginationProviderMiddleware
 from api.v2.logging_middleware import LoggingProviderMiddleware
 from api.v1.routes import routers as v1_routers
 from api.v2.routes import routers as v2_routers
+from services.v2 import audit_service, data_provider_v2
+from services.v2 import write_behind_service
+from services.v2 import snapshot_service
+from services.v2.change_feed_service import (
+    ChangeFeed,
+    ChangeLogPruner,
+    loaded_pools_by_table,
+)
 
-app = FastAPI()
+# Number of worker processes; with more than one every worker tails the
+# change log to pick up the writes of the others.
+workers = int(os.getenv("WORKERS", 1))
+# With LAZY_POOLS=1 a collection is only loaded when it is first used, in the
+# background, instead of all of them at startup.
+lazy_pools = os.getenv("LAZY_POOLS", "0") == "1"
+# With POOL_SNAPSHOT=1 (the default) the collections are written to a snapshot
+# file on shutdown and rebuilt from it on the next start if the database did
+# not change in between.
+pool_snapshot = os.getenv("POOL_SNAPSHOT", "1") == "1"
 
+
+def write_snapshot():
+    # Other workers may have written after this one stopped following them.
+    if not pool_snapshot or workers > 1:
+        return
+    try:
+        snapshot_service.write_snapshot(
+            data_provider_v2.fetch_database(),
+            snapshot_service.hydrated(loaded_pools_by_table().values()),
+        )
+    except Exception:
+        logging.getLogger(__name__).exception("Writing the snapshot failed")
+
+
+def warm_up(change_feed: ChangeFeed | None):
+    data_provider_v2.warm_up()
+    if change_feed is not None:
+        change_feed.start()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    audit_service.start()
+    if pool_snapshot:
+        snapshot_service.restore(data_provider_v2.fetch_database())
+    # Created before the pools load so no write made meanwhile is missed.
+    change_feed = None
+    change_log_pruner = None
+    if workers > 1:
+        change_feed = ChangeFeed(data_provider_v2.fetch_database())
+    else:
+        # Nothing reads the change log, but the triggers still fill it.
+        change_log_pruner = ChangeLogPruner(data_provider_v2.fetch_database())
+        change_log_pruner.prune()
+        change_log_pruner.start()
+    if lazy_pools:
+        data_provider_v2.enable_lazy_hydration()
+        if change_feed is not None:
+            change_feed.start()
+    else:
+        # Warm the pools once in the background so the server can answer the
+        # health check while the collections are loading.
+        threading.Thread(
+            target=warm_up, args=(change_feed,), name="pool-warm-up", daemon=True
+        ).start()
+    yield
+    if change_feed is not None:
+        change_feed.stop()
+    if change_log_pruner is not None:
+        change_log_pruner.stop()
+    write_behind_service.drain_all()
+    write_snapshot()
+    snapshot_service.discard()
+    audit_service.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Registered first so they run last, after the API key has been checked.
+app.add_middleware(ResponseCacheMiddleware)
+app.add_middleware(ConditionalRequestMiddleware)
 app.add_middleware(ApiKeyProviderMiddleware)
-app.add_middleware(DataProviderMiddleware)
 app.add_middleware(PaginationProviderMiddleware)
 app.add_middleware(LoggingProviderMiddleware)
 
@@ -24,7 +105,16 @@ app.include_router(v2_routers, prefix=v2_url)
 
 def main():
     app_port = int(os.getenv("TEST_PORT", 8000))
-    uvicorn.run(app, port=app_port)
+    if workers > 1:
+        # Workers are separate processes that import the app themselves.
+        uvicorn.run(
+            "main:app",
+            port=app_port,
+            workers=workers,
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
+        )
+    else:
+        uvicorn.run(app, port=app_port)
 
 
 if __name__ == "__main__":
@@ -1,3 +1,6 @@
+import json
+import os
+import tempfile
 from datetime import datetime
 
 
@@ -7,3 +10,14 @@ class Base:
 
     def get_timestamp(self):
         return datetime.utcnow().isoformat() + "Z"
+
+    def write_data(self):
+        directory = os.path.dirname(os.path.abspath(self.data_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.data, f)
+            os.replace(temp_path, self.data_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
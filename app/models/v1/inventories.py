@@ -95,6 +95,4 @@ class Inventories(Base):
     def save(self, data=None):
         if data:
             self.data = data
-        f = open(self.data_path, "w")
-        json.dump(self.data, f)
-        f.close()
+        self.write_data()
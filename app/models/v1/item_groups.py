@@ -72,6 +72,4 @@ class ItemGroups(Base):
     def save(self, data=None):
         if data:
             self.data = data
-        f = open(self.data_path, "w")
-        json.dump(self.data, f)
-        f.close()
+        self.write_data()
@@ -184,6 +184,4 @@ class Orders(Base):
     def save(self, data=None):
         if data is not None:
             self.data = data
-        f = open(self.data_path, "w")
-        json.dump(self.data, f)
-        f.close()
+        self.write_data()
@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+import queue
+import threading
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from pydantic import BaseModel
+from utils.globals import (
+    audit_max_payload_length,
+    audit_redacted_fields,
+    audited_resources,
+)
+
+PROJECT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+
+logs_path = os.path.join(PROJECT_PATH, "logs")
+
+info_logger = logging.getLogger("infoLogger")
+info_logger.setLevel(logging.INFO)
+info_logger.propagate = False
+
+error_logger = logging.getLogger("errorLogger")
+error_logger.setLevel(logging.ERROR)
+error_logger.propagate = False
+
+# "METHOD path" of the request being handled, set by the logging middleware.
+current_request: ContextVar[str | None] = ContextVar("current_request", default=None)
+
+_listeners = []
+_listeners_lock = threading.Lock()
+
+
+def _file_handler(file_name: str, level: int) -> logging.Handler:
+    handler = logging.FileHandler(os.path.join(logs_path, file_name))
+    handler.setLevel(level)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    return handler
+
+
+def start(
+    info_handler: logging.Handler | None = None,
+    error_handler: logging.Handler | None = None,
+):
+    """Routes the audit loggers through queues to background listeners.
+
+    Request threads only put records on a queue; the listener threads do
+    the file writes. Without arguments the records go to
+    ``logs/application.log`` and ``logs/error.log``.
+    """
+    with _listeners_lock:
+        if _listeners:
+            return
+        if info_handler is None or error_handler is None:
+            os.makedirs(logs_path, exist_ok=True)
+        if info_handler is None:
+            info_handler = _file_handler("application.log", logging.INFO)
+        if error_handler is None:
+            error_handler = _file_handler("error.log", logging.ERROR)
+
+        for logger, handler in (
+            (info_logger, info_handler),
+            (error_logger, error_handler),
+        ):
+            log_queue = queue.SimpleQueue()
+            logger.handlers = [QueueHandler(log_queue)]
+            listener = QueueListener(log_queue, handler, respect_handler_level=True)
+            listener.start()
+            _listeners.append(listener)
+
+
+def stop():
+    with _listeners_lock:
+        while _listeners:
+            _listeners.pop().stop()
+        info_logger.handlers = []
+        error_logger.handlers = []
+
+
+def is_enabled() -> bool:
+    return bool(_listeners)
+
+
+def record_change(action: str, before: BaseModel | None, after: BaseModel | None):
+    """Logs the fields ``action`` changed on an entity of an audited resource."""
+    if not _listeners:
+        return
+    entity = after if after is not None else before
+    if entity is None or entity.table_name() not in audited_resources:
+        return
+
+    previous_data = before.model_dump() if before is not None else {}
+    new_data = after.model_dump() if after is not None else {}
+    if before is not None and after is not None:
+        changed = [
+            key
+            for key in new_data.keys() | previous_data.keys()
+            if previous_data.get(key) != new_data.get(key)
+        ]
+        if not changed:
+            return
+        previous_data = {key: previous_data.get(key) for key in sorted(changed)}
+        new_data = {key: new_data.get(key) for key in sorted(changed)}
+
+    key = getattr(entity, "id", None)
+    if key is None:
+        key = getattr(entity, "uid", None)
+    source_id = getattr(entity, "source_id", None)
+
+    info_logger.info(
+        "%s %s %s%s%s - Previous Data: %s - New Data: %s",
+        action.upper(),
+        entity.table_name(),
+        key,
+        f" (source_id {source_id})" if source_id is not None else "",
+        f" by {current_request.get()}" if current_request.get() else "",
+        _dump(previous_data) if before is not None else None,
+        _dump(new_data),
+    )
+
+
+def _dump(data: dict) -> str:
+    data = {
+        key: "***" if key in audit_redacted_fields else value
+        for key, value in data.items()
+    }
+    text = json.dumps(data, default=str)
+    if len(text) > audit_max_payload_length:
+        return text[:audit_max_payload_length] + "...(truncated)"
+    return text
@@ -9,9 +9,10 @@ api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
 def get_api_key(
     request: Request, api_key_header: str = Security(api_key_header)
 ) -> str:
-    user = data_provider_v2.fetch_user_pool().get_user(api_key_header)
+    user_pool = data_provider_v2.fetch_user_pool()
+    permissions = user_pool.get_permissions(api_key_header)
 
-    if user is None:
+    if permissions is None:
         raise HTTPException(status_code=403, detail="Invalid API Key")
 
     segments = request.url.path.strip("/").split("/")
@@ -19,9 +20,7 @@ def get_api_key(
     if third_item == None:
         raise HTTPException(status_code=400)
 
-    if data_provider_v2.fetch_user_pool().has_access(
-        user.api_key, third_item, request.method.lower()
-    ):
+    if user_pool.is_allowed(permissions, third_item, request.method.lower()):
         return api_key_header
     else:
         raise HTTPException(
@@ -1,9 +1,227 @@
+import logging
+import threading
+import time
 from datetime import datetime
+from typing import Callable, Iterable, List, TypeVar
+from services.v2 import audit_service, data_provider_v2, snapshot_service
+from services.v2.model_services.entity_store import EntityStore, PendingStore
+from services.v2.pagination_service import Pagination
+from services.v2.query_service import Query
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
 
 
 class Base:
+    model = None
+    primary_key = "id"
+    indexes = ()
+    sums = None
+
     def __init__():
         pass
 
+    @property
+    def data(self) -> EntityStore:
+        return self._store
+
+    @data.setter
+    def data(self, entities):
+        if isinstance(entities, PendingStore):
+            self._store = entities
+            return
+        self._store = EntityStore(
+            self.primary_key, entities, self.indexes + ("is_archived",), self.sums
+        )
+
+    def hydrate(self):
+        """Loads the collection into memory.
+
+        The collection is rebuilt from the snapshot restored at startup if
+        there is one and the database did not change since, else read with
+        SQL.
+
+        With ``data_provider_v2.hydrate_in_background`` set the load runs in
+        a background thread and this returns right away; until it finishes
+        the store is a ``PendingStore``, so lookups by primary key are read
+        from the database and everything else waits for the load.
+        """
+        self.hydration = {
+            "status": "hydrating",
+            "source": None,
+            "rows": None,
+            "started_at": time.time(),
+            "finished_at": None,
+            "error": None,
+        }
+        if not data_provider_v2.hydrate_in_background:
+            self._hydrate()
+            return
+
+        loaded = threading.Event()
+        self.data = PendingStore(self.fetch_entity, loaded, lambda: self._store)
+        threading.Thread(
+            target=self._hydrate,
+            args=(loaded,),
+            name=f"hydrate-{self.model.table_name()}",
+            daemon=True,
+        ).start()
+
+    def _hydrate(self, loaded: threading.Event | None = None):
+        try:
+            with snapshot_service.paused_gc():
+                entities = snapshot_service.take(self)
+                if entities is not None:
+                    self.hydration["source"] = "snapshot"
+                    self.data = entities
+                else:
+                    self.hydration["source"] = "database"
+                    if loaded is not None:
+                        self.hydration["rows"] = self.db.count_rows(
+                            self.model.table_name()
+                        )
+                    self.load()
+            self.hydration["rows"] = len(self.data)
+        except Exception as error:
+            self.hydration.update(
+                status="failed", finished_at=time.time(), error=str(error)
+            )
+            if loaded is None:
+                raise
+            logger.exception("Loading %s failed", self.model.table_name())
+        else:
+            self.hydration.update(status="ready", finished_at=time.time())
+        finally:
+            if loaded is not None:
+                loaded.set()
+
+    def hydration_status(self) -> dict:
+        return dict(getattr(self, "hydration", {"status": "ready"}))
+
+    def fetch_entity(self, key):
+        entities = self.fetch_entities([key])
+        return entities[0] if entities else None
+
+    @property
+    def version(self) -> int:
+        return self.data.version
+
+    @property
+    def modified_at(self) -> float:
+        return self.data.modified_at
+
+    def paginate(self, pagination: Pagination, query: Query | None = None) -> dict:
+        """Pages the entities that are not archived and match ``query``.
+
+        Without a query the store is walked lazily and stops after the page.
+        With one, only the matching entities are collected and sorted; an
+        equality filter on an indexed attribute narrows the scan to that
+        index bucket.
+        """
+        if not query:
+            return pagination.apply_to_store(
+                self.data,
+                self.data.count("is_archived", False),
+                lambda entity: not entity.is_archived,
+            )
+        matches = [
+            entity
+            for entity in self.query_candidates(query)
+            if not entity.is_archived and query.matches(entity)
+        ]
+        return pagination.apply(query.sorted(matches))
+
+    def query_candidates(self, query: Query) -> Iterable:
+        indexed = [
+            (attribute, value)
+            for attribute, value in query.equality_filters()
+            if attribute in self.data.indexes
+        ]
+        if not indexed:
+            return self.data.iter_after()
+        attribute, value = min(indexed, key=lambda item: self.data.count(*item))
+        return self.data.find(attribute, value)
+
+    def fetch_entities(self, keys: List) -> List:
+        """Reads the entities with a primary key in ``keys`` from the database."""
+        entities = (self.db.get(self.model, key) for key in keys)
+        return [entity for entity in entities if entity is not None]
+
+    def apply_changes(self, keys: List | None = None):
+        """Brings the entities with ``keys`` in memory in line with the database.
+
+        Used by the change feed to pick up writes of other worker processes;
+        keys that are gone from the database are removed. Without keys the
+        whole collection is reloaded.
+        """
+        if keys is None:
+            self.load()
+            return
+        fetched = {
+            self.data.key_of(entity): entity for entity in self.fetch_entities(keys)
+        }
+        removed = []
+        for key in keys:
+            entity = fetched.get(key)
+            if entity is None:
+                removed.append(key)
+            elif self.data.has(key):
+                self.data.replace(key, entity)
+            else:
+                self.data.add(entity)
+        # One pass over the collection for all removals instead of one each.
+        self.data.remove_many(removed)
+
     def get_timestamp(self):
         return datetime.utcnow().isoformat() + "Z"
+
+    def add_batch(
+        self,
+        entities: List[T],
+        is_rejected: Callable[[T], bool],
+        insert: Callable[[List[T]], List[T | None]],
+        background_task=True,
+    ) -> List[T | None]:
+        """Adds the entities that pass ``is_rejected`` in one transaction.
+
+        ``insert`` writes the accepted entities (and their child rows) and
+        returns them with their keys set, in the same order, with ``None``
+        for an entity it did not write (its key already exists). The result
+        lines up with ``entities``; rejected entities are ``None``.
+        """
+        result = [None] * len(entities)
+        positions = []
+        for position, entity in enumerate(entities):
+            if not is_rejected(entity):
+                entity.created_at = self.get_timestamp()
+                entity.updated_at = self.get_timestamp()
+                positions.append(position)
+
+        with self.db.get_connection():
+            added = insert([entities[position] for position in positions])
+
+        for position, entity in zip(positions, added):
+            if entity is None:
+                continue
+            self.data.add(entity)
+            audit_service.record_change("create", None, entity)
+            result[position] = entity
+        if any(entity is not None for entity in added):
+            self.save(background_task)
+        return result
+
+    def apply_batch(
+        self, operation: Callable[[T], T | None], entities: List[T]
+    ) -> List[T | None]:
+        """Runs ``operation`` for every entity inside one database transaction.
+
+        If one of them raises, the transaction is rolled back and the
+        collection is reloaded so memory does not keep half of the batch.
+        """
+        try:
+            with self.db.get_connection():
+                return [operation(entity) for entity in entities]
+        except Exception:
+            self.load()
+            raise
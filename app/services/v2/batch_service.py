@@ -0,0 +1,118 @@
+from typing import Any, Callable, List, Type, TypeVar
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
+from utils.globals import batch_max_size
+
+T = TypeVar("T", bound=BaseModel)
+
+
+def create_batch(
+    model: Type[T],
+    payloads: List[dict],
+    add_many: Callable[[List[T]], List[T | None]],
+    rejected_detail: str,
+) -> JSONResponse:
+    check_batch_size(payloads)
+    results = [None] * len(payloads)
+
+    positions = []
+    entities = []
+    for position, payload in enumerate(payloads):
+        try:
+            entities.append(model.model_validate(payload))
+        except ValidationError as error:
+            results[position] = invalid_result(position, error)
+            continue
+        positions.append(position)
+
+    for position, added in zip(positions, add_many(entities)):
+        if added is None:
+            results[position] = error_result(position, 400, rejected_detail)
+        else:
+            results[position] = success_result(position, 201, added)
+    return batch_response(results, status.HTTP_201_CREATED)
+
+
+def update_batch(
+    model: Type[T],
+    payloads: List[dict],
+    key: str,
+    name: str,
+    is_archived: Callable[[Any], bool | None],
+    get: Callable[[Any], T | None],
+    update_many: Callable[[List[T]], List[T | None]],
+) -> JSONResponse:
+    check_batch_size(payloads)
+    results = [None] * len(payloads)
+    valid_keys = model.model_fields.keys()
+
+    positions = []
+    entities = []
+    for position, payload in enumerate(payloads):
+        entity_key = payload.get(key)
+        if entity_key is None:
+            results[position] = error_result(position, 400, f"{name} {key} is missing")
+            continue
+        archived = is_archived(entity_key)
+        if archived is None:
+            results[position] = error_result(position, 404, f"{name} not found")
+            continue
+        elif archived:
+            results[position] = error_result(position, 400, f"{name} is archived")
+            continue
+
+        update_data = {
+            field: value for field, value in payload.items() if field in valid_keys
+        }
+        try:
+            entity = model.model_validate(
+                {**get(entity_key).model_dump(), **update_data}
+            )
+        except ValidationError as error:
+            results[position] = invalid_result(position, error)
+            continue
+        positions.append(position)
+        entities.append(entity)
+
+    for position, updated in zip(positions, update_many(entities)):
+        if updated is None:
+            results[position] = error_result(
+                position, 400, f"{name} has archived entities"
+            )
+        else:
+            results[position] = success_result(position, 200, updated)
+    return batch_response(results, status.HTTP_200_OK)
+
+
+def check_batch_size(payloads: list):
+    if len(payloads) > batch_max_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch can contain at most {batch_max_size} entities",
+        )
+
+
+def success_result(position: int, status_code: int, entity: BaseModel) -> dict:
+    return {"index": position, "status": status_code, "data": entity.model_dump()}
+
+
+def error_result(position: int, status_code: int, detail: Any) -> dict:
+    return {"index": position, "status": status_code, "detail": detail}
+
+
+def invalid_result(position: int, error: ValidationError) -> dict:
+    return error_result(
+        position,
+        422,
+        jsonable_encoder(error.errors(include_url=False, include_context=False)),
+    )
+
+
+def batch_response(results: List[dict], success_status: int) -> JSONResponse:
+    all_succeeded = all(result["status"] == success_status for result in results)
+    return JSONResponse(
+        status_code=success_status if all_succeeded else status.HTTP_207_MULTI_STATUS,
+        content={"results": results},
+    )
@@ -0,0 +1,152 @@
+import logging
+import threading
+from typing import Dict
+from services.v2 import data_provider_v2
+from services.v2.database_service import DatabaseService
+from utils.globals import (
+    change_feed_interval_seconds,
+    change_log_prune_interval_seconds,
+    change_log_retention,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def loaded_pools_by_table() -> Dict[str, object]:
+    pools = {}
+    for name, _ in data_provider_v2.pool_loaders:
+        pool = data_provider_v2.fetch_loaded_pool(name)
+        if pool is not None and pool.model is not None:
+            pools[pool.model.table_name()] = pool
+    return pools
+
+
+class ChangeFeed:
+    """Tails the change log so this process sees the writes of other workers.
+
+    Triggers record the key of every written row in the change log (see
+    ``create_change_log``). Every ``interval`` seconds the new entries are
+    grouped per collection and only those entities are read back into the
+    in-memory stores. The position in the log is taken when the feed is
+    created, so create it before the pools are loaded and start it after.
+
+    If entries were pruned before this process read them (it fell more than
+    ``retention`` entries behind, the log was cleared by a re-import or the
+    database was recreated), every loaded collection is reloaded instead.
+    """
+
+    def __init__(
+        self,
+        db: DatabaseService,
+        interval: float = change_feed_interval_seconds,
+        retention: int = change_log_retention,
+    ):
+        self.db = db
+        self.interval = interval
+        self.retention = retention
+        self.last_change_id = db.last_change_id()
+        self._pruned_at = self.last_change_id
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def poll(self) -> int:
+        """Applies the changes logged since the last poll; returns how many."""
+        # Read before the log: every entry up to it is committed, so if one
+        # of them is missing it was pruned before this process saw it.
+        last_change_id = self.db.last_change_id()
+        changes = self.db.changes_after(self.last_change_id)
+        if not changes:
+            if last_change_id != self.last_change_id:
+                self.resync()
+            return 0
+        if changes[0][0] != self.last_change_id + 1:
+            self.resync()
+            return len(changes)
+
+        keys_by_table: Dict[str, Dict[object, None]] = {}
+        for _, table_name, key in changes:
+            keys_by_table.setdefault(table_name, {})[key] = None
+        pools = loaded_pools_by_table()
+        for table_name, keys in keys_by_table.items():
+            pool = pools.get(table_name)
+            if pool is not None:
+                pool.apply_changes(list(keys))
+        self.last_change_id = changes[-1][0]
+
+        if self.last_change_id - self._pruned_at >= self.retention // 10:
+            self.db.prune_change_log(self.retention)
+            self._pruned_at = self.last_change_id
+        return len(changes)
+
+    def resync(self):
+        logger.warning("Missed part of the change log, reloading all collections")
+        self.last_change_id = self._pruned_at = self.db.last_change_id()
+        for pool in loaded_pools_by_table().values():
+            pool.apply_changes()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="change-feed", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                while self.poll():
+                    pass
+            except Exception:
+                logger.exception("Applying the change log failed")
+
+
+class ChangeLogPruner:
+    """Keeps the change log bounded when no ``ChangeFeed`` runs.
+
+    The triggers log every write also with a single worker, where the log
+    only serves ``DatabaseService.data_version``. Feeds prune as they read;
+    without one this prunes every ``interval`` seconds instead.
+    """
+
+    def __init__(
+        self,
+        db: DatabaseService,
+        interval: float = change_log_prune_interval_seconds,
+        retention: int = change_log_retention,
+    ):
+        self.db = db
+        self.interval = interval
+        self.retention = retention
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def prune(self):
+        self.db.prune_change_log(self.retention)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="change-log-pruner", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                self.prune()
+            except Exception:
+                logger.exception("Pruning the change log failed")
@@ -1,5 +1,5 @@
-from fastapi import BackgroundTasks
-
+import threading
+import time
 
 _warehouses = None
 _locations = None
@@ -15,23 +15,25 @@ _shipments = None
 _clients = None
 _users = None
 _database = None
-_background_tasks = None
+
+# Pools are created lazily by the first caller; the lock keeps a request and
+# the startup warm-up from building the same pool twice.
+_init_lock = threading.RLock()
+_warm_up_status = {
+    "status": "pending",
+    "loaded": [],
+    "started_at": None,
+    "finished_at": None,
+    "error": None,
+}
+# Lazy mode: pools are only created on first use and load in the background
+# (see Base.hydrate), so startup does not scale with the database size.
+hydrate_in_background = False
 
 
 def init():
-    get_items()
-    get_item_lines()
-    get_item_groups()
-    get_item_types()
-    get_warehouses()
-    get_locations()
-    get_transfers()
-    get_inventories()
-    get_suppliers()
-    get_clients()
-    get_orders()
-    get_shipments()
-    get_users()
+    for _, load in pool_loaders:
+        load()
 
 
 def get_items():
@@ -39,7 +41,9 @@ def get_items():
 
     global _items
     if _items is None:
-        _items = ItemService()
+        with _init_lock:
+            if _items is None:
+                _items = ItemService()
 
 
 def get_item_lines():
@@ -47,7 +51,9 @@ def get_item_lines():
 
     global _item_lines
     if _item_lines is None:
-        _item_lines = ItemLineService()
+        with _init_lock:
+            if _item_lines is None:
+                _item_lines = ItemLineService()
 
 
 def get_item_groups():
@@ -55,7 +61,9 @@ def get_item_groups():
 
     global _item_groups
     if _item_groups is None:
-        _item_groups = ItemGroupService()
+        with _init_lock:
+            if _item_groups is None:
+                _item_groups = ItemGroupService()
 
 
 def get_item_types():
@@ -63,7 +71,9 @@ def get_item_types():
 
     global _item_types
     if _item_types is None:
-        _item_types = ItemTypeService()
+        with _init_lock:
+            if _item_types is None:
+                _item_types = ItemTypeService()
 
 
 def get_warehouses():
@@ -71,7 +81,9 @@ def get_warehouses():
 
     global _warehouses
     if _warehouses is None:
-        _warehouses = WarehouseService()
+        with _init_lock:
+            if _warehouses is None:
+                _warehouses = WarehouseService()
 
 
 def get_locations():
@@ -79,7 +91,9 @@ def get_locations():
 
     global _locations
     if _locations is None:
-        _locations = LocationService()
+        with _init_lock:
+            if _locations is None:
+                _locations = LocationService()
 
 
 def get_transfers():
@@ -87,7 +101,9 @@ def get_transfers():
 
     global _transfers
     if _transfers is None:
-        _transfers = TransferService()
+        with _init_lock:
+            if _transfers is None:
+                _transfers = TransferService()
 
 
 def get_clients():
@@ -95,7 +111,9 @@ def get_clients():
 
     global _clients
     if _clients is None:
-        _clients = ClientService()
+        with _init_lock:
+            if _clients is None:
+                _clients = ClientService()
 
 
 def get_shipments():
@@ -103,7 +121,9 @@ def get_shipments():
 
     global _shipments
     if _shipments is None:
-        _shipments = ShipmentService()
+        with _init_lock:
+            if _shipments is None:
+                _shipments = ShipmentService()
 
 
 def get_suppliers():
@@ -111,7 +131,9 @@ def get_suppliers():
 
     global _suppliers
     if _suppliers is None:
-        _suppliers = SupplierService()
+        with _init_lock:
+            if _suppliers is None:
+                _suppliers = SupplierService()
 
 
 def get_inventories():
@@ -119,7 +141,9 @@ def get_inventories():
 
     global _inventories
     if _inventories is None:
-        _inventories = InventoryService()
+        with _init_lock:
+            if _inventories is None:
+                _inventories = InventoryService()
 
 
 def get_orders():
@@ -127,7 +151,9 @@ def get_orders():
 
     global _orders
     if _orders is None:
-        _orders = OrderService()
+        with _init_lock:
+            if _orders is None:
+                _orders = OrderService()
 
 
 def get_users():
@@ -135,7 +161,9 @@ def get_users():
 
     global _users
     if _users is None:
-        _users = UserService()
+        with _init_lock:
+            if _users is None:
+                _users = UserService()
 
 
 def get_database():
@@ -143,13 +171,71 @@ def get_database():
 
     global _database
     if _database is None:
-        _database = DatabaseService()
-
-
-def get_background_tasks():
-    global _background_tasks
-    if _background_tasks is None:
-        _background_tasks = BackgroundTasks()
+        with _init_lock:
+            if _database is None:
+                _database = DatabaseService()
+
+
+pool_loaders = (
+    ("items", get_items),
+    ("item_lines", get_item_lines),
+    ("item_groups", get_item_groups),
+    ("item_types", get_item_types),
+    ("warehouses", get_warehouses),
+    ("locations", get_locations),
+    ("transfers", get_transfers),
+    ("inventories", get_inventories),
+    ("suppliers", get_suppliers),
+    ("clients", get_clients),
+    ("orders", get_orders),
+    ("shipments", get_shipments),
+    ("users", get_users),
+)
+
+
+def warm_up():
+    _warm_up_status.update(
+        status="warming_up",
+        loaded=[],
+        started_at=time.time(),
+        finished_at=None,
+        error=None,
+    )
+    try:
+        for name, load in pool_loaders:
+            load()
+            _warm_up_status["loaded"].append(name)
+    except Exception as error:
+        _warm_up_status.update(
+            status="failed", finished_at=time.time(), error=str(error)
+        )
+        raise
+    _warm_up_status.update(status="ready", finished_at=time.time())
+
+
+def enable_lazy_hydration():
+    """Switches to lazy mode instead of warming up every pool at startup."""
+    global hydrate_in_background
+    hydrate_in_background = True
+    now = time.time()
+    _warm_up_status.update(status="ready", started_at=now, finished_at=now)
+
+
+def is_ready() -> bool:
+    return _warm_up_status["status"] == "ready"
+
+
+def fetch_warm_up_status() -> dict:
+    status = dict(_warm_up_status)
+    status["loaded"] = list(status["loaded"])
+    status["total"] = len(pool_loaders)
+    status["lazy"] = hydrate_in_background
+    status["pools"] = {
+        name: pool.hydration_status()
+        for name, _ in pool_loaders
+        if (pool := fetch_loaded_pool(name)) is not None
+    }
+    return status
 
 
 # Fetching pools
@@ -223,6 +309,12 @@ def fetch_database():
     return _database
 
 
-def fetch_background_tasks():
-    get_background_tasks()
-    return _background_tasks
+def fetch_loaded_pool(name: str):
+    """Returns the pool called ``name`` if it has been created, else None.
+
+    Unlike the fetch functions this never loads a pool, so it is safe to call
+    from code running on the event loop.
+    """
+    if name not in dict(pool_loaders):
+        return None
+    return globals()[f"_{name}"]
@@ -1,7 +1,9 @@
+import queue
 import sqlite3
+import threading
 from contextlib import contextmanager
-from typing import Type, TypeVar, List, Generator, Any, Tuple
-from pydantic import BaseModel
+from typing import Type, TypeVar, List, Generator, Any, Tuple, Dict
+from pydantic import BaseModel, TypeAdapter
 from models.v2.endpoint_access import EndpointAccess
 from models.v2.user import User
 from models.v2.shipment import Shipment
@@ -23,13 +25,187 @@ APP_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../app
 
 T = TypeVar("T", bound=BaseModel)
 
+_list_adapters: Dict[Type[BaseModel], TypeAdapter] = {}
+
+
+def build_models(model: Type[T], rows: List[dict]) -> List[T]:
+    """Turns rows the service wrote itself into models in one call.
+
+    Gives the same models as ``[model(**row) for row in rows]``, but the
+    whole list goes through the pydantic core at once instead of paying a
+    Python call per row. ``model_construct`` is not used: in pydantic 2 it is
+    slower than this, and it would skip coercions the rows rely on, such as
+    SQLite's 0/1 into booleans.
+    """
+    adapter = _list_adapters.get(model)
+    if adapter is None:
+        adapter = _list_adapters[model] = TypeAdapter(List[model])
+    return adapter.validate_python(rows)
+
+
+def attach(entity: BaseModel, field: str, value: Any):
+    """Sets ``field`` of a loaded model without pydantic's assignment hook.
+
+    Only for values that already are of the field's type, e.g. child rows
+    made with ``build_models``. The hook costs more than the rest of
+    attaching the child rows when a whole table is loaded.
+    """
+    entity.__dict__[field] = value
+    entity.__pydantic_fields_set__.add(field)
+
+
+# (table, column) pairs that get a secondary index: the foreign keys the child
+# rows are loaded by and the columns the services look entities up on.
+SCHEMA_INDEXES: List[Tuple[str, str]] = [
+    (order_items_table, "order_id"),
+    (shipment_items_table, "shipment_id"),
+    (transfer_items_table, "transfer_id"),
+    (inventory_locations_table, "inventory_id"),
+    (inventory_locations_table, "location_id"),
+    (Inventory.table_name(), "item_id"),
+    (Location.table_name(), "warehouse_id"),
+    (Order.table_name(), "shipment_id"),
+    (Order.table_name(), "ship_to"),
+    (Order.table_name(), "bill_to"),
+    (Shipment.table_name(), "order_id"),
+    (Item.table_name(), "item_line"),
+    (Item.table_name(), "item_group"),
+    (Item.table_name(), "item_type"),
+    (Item.table_name(), "supplier_id"),
+    (EndpointAccess.table_name(), "user_id"),
+]
+
+
+def create_schema_indexes(conn: sqlite3.Connection):  # pragma: no cover
+    for table_name, column in SCHEMA_INDEXES:
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table_name}_{column} "
+            f"ON {table_name} ({column})"
+        )
+
+
+# Tables whose writes are recorded in the change log, as (table, key column,
+# collection the key belongs to). Child rows are logged under their parent.
+CHANGE_LOGGED_TABLES: List[Tuple[str, str, str]] = [
+    (Item.table_name(), "uid", Item.table_name()),
+    (ItemLine.table_name(), "id", ItemLine.table_name()),
+    (ItemGroup.table_name(), "id", ItemGroup.table_name()),
+    (ItemType.table_name(), "id", ItemType.table_name()),
+    (Warehouse.table_name(), "id", Warehouse.table_name()),
+    (Location.table_name(), "id", Location.table_name()),
+    (Transfer.table_name(), "id", Transfer.table_name()),
+    (transfer_items_table, "transfer_id", Transfer.table_name()),
+    (Inventory.table_name(), "id", Inventory.table_name()),
+    (inventory_locations_table, "inventory_id", Inventory.table_name()),
+    (Supplier.table_name(), "id", Supplier.table_name()),
+    (Client.table_name(), "id", Client.table_name()),
+    (Order.table_name(), "id", Order.table_name()),
+    (order_items_table, "order_id", Order.table_name()),
+    (Shipment.table_name(), "id", Shipment.table_name()),
+    (shipment_items_table, "shipment_id", Shipment.table_name()),
+    (User.table_name(), "id", User.table_name()),
+    (EndpointAccess.table_name(), "user_id", User.table_name()),
+]
+
+
+def create_change_log(conn: sqlite3.Connection):  # pragma: no cover
+    # entity_key has no type so integer ids and item uids keep their type.
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {change_log_table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            entity_key NOT NULL
+        )
+        """)
+    for table_name, column, collection in CHANGE_LOGGED_TABLES:
+        for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {change_log_table}_{table_name}_{event.lower()}
+                AFTER {event} ON {table_name}
+                BEGIN
+                    INSERT INTO {change_log_table} (table_name, entity_key)
+                    VALUES ('{collection}', {row}.{column});
+                END
+                """)
+
+
+# Schema migrations in order; after applying migration n the database is at
+# user_version n. Only ever append to this list.
+SCHEMA_MIGRATIONS = [create_schema_indexes, create_change_log]
+
+
+class TableSchema:
+    """Column layout and prepared statements of one table."""
+
+    def __init__(self, table_name: str, columns: List[str], primary_key: str):
+        self.table_name = table_name
+        self.columns = columns
+        self.primary_key = primary_key
+        self.column_order = {column: i for i, column in enumerate(columns)}
+        self.select_all_sql = f"SELECT {', '.join(columns)} FROM {table_name}"
+        self.select_sql = f"{self.select_all_sql} WHERE {primary_key} = ?"
+        self.exists_sql = f"SELECT 1 FROM {table_name} WHERE {primary_key} = ?"
+        self.delete_sql = f"DELETE FROM {table_name} WHERE {primary_key} = ?"
+        self._insert_sql: Dict[Tuple[str, ...], str] = {}
+        self._update_sql: Dict[Tuple[str, ...], str] = {}
+        self._upsert_sql: Dict[Tuple[str, ...], str] = {}
+
+    def insert_sql(self, fields: Tuple[str, ...]) -> str:
+        sql = self._insert_sql.get(fields)
+        if sql is None:
+            columns = ", ".join(fields)
+            placeholders = ", ".join("?" for _ in fields)
+            sql = f"INSERT INTO {self.table_name} ({columns}) VALUES ({placeholders})"
+            self._insert_sql[fields] = sql
+        return sql
+
+    def update_sql(self, fields: Tuple[str, ...]) -> str:
+        sql = self._update_sql.get(fields)
+        if sql is None:
+            columns = ", ".join(f"{key} = ?" for key in fields)
+            sql = f"UPDATE {self.table_name} SET {columns} WHERE {self.primary_key} = ?"
+            self._update_sql[fields] = sql
+        return sql
+
+    def upsert_sql(self, fields: Tuple[str, ...]) -> str:
+        sql = self._upsert_sql.get(fields)
+        if sql is None:
+            updates = ", ".join(
+                f"{key} = excluded.{key}" for key in fields if key != self.primary_key
+            )
+            sql = (
+                f"{self.insert_sql(fields)} "
+                f"ON CONFLICT({self.primary_key}) DO UPDATE SET {updates}"
+            )
+            self._upsert_sql[fields] = sql
+        return sql
+
+    def fields_of(self, model: BaseModel) -> Tuple[str, ...]:
+        return tuple(key for key in model.__dict__ if key in self.column_order)
+
+    def values_of(self, model: BaseModel, fields: Tuple[str, ...]) -> Tuple[Any, ...]:
+        return tuple(getattr(model, key) for key in fields)
+
+    def to_dict(self, row: Tuple[Any, ...]) -> dict:
+        return dict(zip(self.columns, row))
+
 
 class DatabaseService:
     def __init__(
-        self, db_path: str = APP_PATH + "/database/database.db"
+        self,
+        db_path: str = APP_PATH + "/database/database.db",
+        pool_size: int = database_pool_size,
+        pragmas: dict | None = None,
     ):  # pragma: no cover
         self.db_path = db_path
         self.conn = None
+        self.pool_size = pool_size
+        self.pragmas = dict(database_pragmas if pragmas is None else pragmas)
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._pool_lock = threading.Lock()
+        self._opened_connections = 0
+        self._local = threading.local()
+        self.schemas: Dict[str, TableSchema] = {}
         self._initialize_database()
 
     def _initialize_database(self):  # pragma: no cover
@@ -50,24 +226,169 @@ class DatabaseService:
         self.create_shipment_items_table(table_name=shipment_items_table)
         self.create_users_table(User)
         self.create_endpoint_access_table(EndpointAccess)
+        self.migrate()
+        self.load_schemas()
+
+    def migrate(self) -> int:  # pragma: no cover
+        """Applies the migrations newer than the ``user_version`` of the database.
+
+        Every migration runs in one transaction with its version bump, so an
+        interrupted migration is rolled back and retried on the next start.
+        sqlite3 only opens a transaction before DML, so it is begun
+        explicitly; otherwise each DDL statement would commit on its own.
+        ANALYZE runs afterwards so the query planner has statistics for the
+        new indexes.
+        """
+        with self.get_connection() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            pending = SCHEMA_MIGRATIONS[version:]
+        for migration in pending:
+            with self.get_connection() as conn:
+                if not conn.in_transaction:
+                    conn.execute("BEGIN")
+                migration(conn)
+                version += 1
+                conn.execute(f"PRAGMA user_version = {version}")
+        if pending:
+            self.analyze()
+        return version
+
+    def analyze(self):  # pragma: no cover
+        with self.get_connection() as conn:
+            conn.execute("ANALYZE")
+
+    def last_change_id(self) -> int:  # pragma: no cover
+        # Read from the sequence, which survives pruning the log itself.
+        with self.get_connection() as conn:
+            row = conn.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = ?", (change_log_table,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def data_version(self) -> Tuple[int, int]:  # pragma: no cover
+        """Changes whenever a logged table is written or the schema migrates."""
+        with self.get_connection() as conn:
+            user_version = conn.execute("PRAGMA user_version").fetchone()[0]
+        return user_version, self.last_change_id()
+
+    def count_rows(self, table_name: str) -> int:  # pragma: no cover
+        with self.get_connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+
+    def changes_after(
+        self, change_id: int, limit: int = 10000
+    ) -> List[Tuple[int, str, Any]]:  # pragma: no cover
+        """Returns the (id, table, key) log entries after ``change_id``."""
+        with self.get_connection() as conn:
+            return conn.execute(
+                f"SELECT id, table_name, entity_key FROM {change_log_table} "
+                "WHERE id > ? ORDER BY id LIMIT ?",
+                (change_id, limit),
+            ).fetchall()
+
+    def prune_change_log(self, keep: int = change_log_retention):  # pragma: no cover
+        with self.get_connection() as conn:
+            conn.execute(
+                f"DELETE FROM {change_log_table} WHERE id <= "
+                f"(SELECT MAX(id) FROM {change_log_table}) - ?",
+                (keep,),
+            )
+
+    def load_schemas(self):  # pragma: no cover
+        with self.get_connection() as conn:
+            table_names = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' "
+                    "AND name NOT LIKE 'sqlite_%'"
+                )
+            ]
+            for table_name in table_names:
+                self.schemas[table_name] = self._read_schema(conn, table_name)
+
+    def _read_schema(
+        self, conn: sqlite3.Connection, table_name: str
+    ) -> TableSchema:  # pragma: no cover
+        columns = []
+        primary_key = "id"
+        for column in conn.execute(f"PRAGMA table_info({table_name})"):
+            columns.append(column[1])
+            if column[5] == 1:
+                primary_key = column[1]
+        return TableSchema(table_name, columns, primary_key)
+
+    def get_schema(self, table_name: str) -> TableSchema:  # pragma: no cover
+        schema = self.schemas.get(table_name)
+        if schema is None:
+            with self.get_connection() as conn:
+                schema = self._read_schema(conn, table_name)
+            self.schemas[table_name] = schema
+        return schema
+
+    def connect(self) -> sqlite3.Connection:  # pragma: no cover
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _acquire_connection(self) -> sqlite3.Connection:  # pragma: no cover
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._pool_lock:
+            can_open = self._opened_connections < self.pool_size
+            if can_open:
+                self._opened_connections += 1
+        if not can_open:
+            return self._pool.get()
+
+        try:
+            return self.connect()
+        except Exception:
+            with self._pool_lock:
+                self._opened_connections -= 1
+            raise
 
     @contextmanager
     def get_connection(
         self,
     ) -> Generator[sqlite3.Connection, None, None]:  # pragma: no cover
-        conn = sqlite3.connect(self.db_path)
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            # Nested use on the same thread joins the outer transaction.
+            yield conn
+            return
+
+        conn = self._acquire_connection()
+        self._local.conn = conn
         try:
             yield conn
-        finally:
             conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._local.conn = None
+            self._pool.put(conn)
+
+    def close_pool(self):  # pragma: no cover
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
             conn.close()
+            with self._pool_lock:
+                self._opened_connections -= 1
 
     @contextmanager
     def get_connection_without_close(
         self,
     ) -> Generator[sqlite3.Connection, None, None]:  # pragma: no cover
         if self.conn is None:
-            self.conn = sqlite3.connect(self.db_path)
+            self.conn = self.connect()
         yield self.conn
 
     def stop_connection(self):  # pragma: no cover
@@ -86,30 +407,22 @@ class DatabaseService:
             self.conn = None
 
     def insert(self, model: T) -> T:  # pragma: no cover
-        table_name = model.table_name()
+        schema = self.get_schema(model.table_name())
+        primary_key_field = schema.primary_key
 
-        fields = model.__dict__
-
-        primary_key_field = self.get_primary_key_column(table_name)
+        fields = dict(model.__dict__)
 
         if primary_key_field == "id":
             fields.pop(primary_key_field, None)
-        else:
-            if (
-                self.execute_one(
-                    f"SELECT * FROM {table_name} WHERE {primary_key_field} = ?",
-                    (fields[primary_key_field],),
-                )
-                is not None
-            ):
-                return None
+        elif (
+            self.execute_one(schema.exists_sql, (fields[primary_key_field],))
+            is not None
+        ):
+            return None
 
-        columns = ", ".join(fields.keys())
-        placeholders = ", ".join("?" for _ in fields)
+        insert_sql = schema.insert_sql(tuple(fields.keys()))
         values = tuple(fields.values())
 
-        insert_sql = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
-
         with self.get_connection() as conn:
             cursor = conn.execute(insert_sql, values)
 
@@ -119,15 +432,13 @@ class DatabaseService:
         return model
 
     def update(self, model: T, id: int) -> T:  # pragma: no cover
-        table_name = model.table_name()
-        primary_key_value = model.__dict__[self.get_primary_key_column(table_name)]
-        fields = model.__dict__
-        primary_key_field = self.get_primary_key_column(table_name)
+        schema = self.get_schema(model.table_name())
+        primary_key_field = schema.primary_key
 
-        fields.pop(primary_key_field, None)
-        columns = ", ".join(f"{key} = ?" for key in fields.keys())
+        fields = dict(model.__dict__)
+        primary_key_value = fields.pop(primary_key_field, None)
+        update_sql = schema.update_sql(tuple(fields.keys()))
         values = tuple(fields.values())
-        update_sql = f"UPDATE {table_name} SET {columns} WHERE {primary_key_field} = ?"
 
         with self.get_connection() as conn:
             conn.execute(update_sql, values + (id,))
@@ -135,56 +446,154 @@ class DatabaseService:
         model = model.model_copy(update={primary_key_field: primary_key_value})
         return model
 
-    def delete(self, model: T, id: int) -> bool:  # pragma: no cover
-        table_name = model.table_name()
-        primary_key_field = self.get_primary_key_column(table_name)
-        delete_sql = f"DELETE FROM {table_name} WHERE {primary_key_field} = ?"
+    def insert_many(self, models: List[T]) -> List[T | None]:  # pragma: no cover
+        if not models:
+            return []
+        schema = self.get_schema(models[0].table_name())
+        primary_key_field = schema.primary_key
+        fields = schema.fields_of(models[0])
 
         with self.get_connection() as conn:
-            conn.execute(delete_sql, (id,))
-        return True
+            if primary_key_field != "id":
+                # Like insert, a model whose key already exists is skipped; the
+                # result keeps its position with None so it lines up with models.
+                existing = self._existing_keys(
+                    conn,
+                    schema,
+                    [getattr(model, primary_key_field) for model in models],
+                )
+                result = [
+                    (None if getattr(model, primary_key_field) in existing else model)
+                    for model in models
+                ]
+                new_models = [model for model in result if model is not None]
+                if new_models:
+                    conn.executemany(
+                        schema.insert_sql(fields),
+                        [schema.values_of(model, fields) for model in new_models],
+                    )
+                return result
+
+            fields = tuple(key for key in fields if key != primary_key_field)
+            conn.executemany(
+                schema.insert_sql(fields),
+                [schema.values_of(model, fields) for model in models],
+            )
+            # The rows were written by one statement inside one write
+            # transaction, so AUTOINCREMENT handed out consecutive ids.
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+
+        first_id = last_id - len(models) + 1
+        return [
+            model.model_copy(update={primary_key_field: first_id + i})
+            for i, model in enumerate(models)
+        ]
+
+    def update_many(self, models: List[T]) -> List[T]:  # pragma: no cover
+        if not models:
+            return []
+        schema = self.get_schema(models[0].table_name())
+        primary_key_field = schema.primary_key
+        fields = tuple(
+            key for key in schema.fields_of(models[0]) if key != primary_key_field
+        )
 
-    def get_primary_key_column(self, table_name: str) -> str:  # pragma: no cover
-        query = f"PRAGMA table_info({table_name})"
         with self.get_connection() as conn:
-            cursor = conn.execute(query)
-            columns = cursor.fetchall()
+            conn.executemany(
+                schema.update_sql(fields),
+                [
+                    schema.values_of(model, fields)
+                    + (getattr(model, primary_key_field),)
+                    for model in models
+                ],
+            )
+        return models
+
+    def upsert_many(self, models: List[T]) -> List[T]:  # pragma: no cover
+        if not models:
+            return []
+        schema = self.get_schema(models[0].table_name())
+        primary_key_field = schema.primary_key
+
+        new_positions = [
+            i
+            for i, model in enumerate(models)
+            if getattr(model, primary_key_field, None) is None
+        ]
+        existing_models = [
+            model
+            for model in models
+            if getattr(model, primary_key_field, None) is not None
+        ]
+        result = list(models)
 
-            for column in columns:
-                if column[5] == 1:
-                    return column[1]
+        with self.get_connection() as conn:
+            inserted = self.insert_many([models[i] for i in new_positions])
+            for i, model in zip(new_positions, inserted):
+                result[i] = model
+
+            if existing_models:
+                fields = schema.fields_of(existing_models[0])
+                conn.executemany(
+                    schema.upsert_sql(fields),
+                    [schema.values_of(model, fields) for model in existing_models],
+                )
+        return result
 
-        return "id"
+    def insert_rows(
+        self, table_name: str, columns: Tuple[str, ...], rows: List[Tuple[Any, ...]]
+    ) -> int:  # pragma: no cover
+        if not rows:
+            return 0
+        schema = self.get_schema(table_name)
 
-    def get_all(self, model: Type[T]) -> List[T]:  # pragma: no cover
-        table_name = model.table_name()
-        select_sql = f"SELECT * FROM {table_name}"
+        with self.get_connection() as conn:
+            conn.executemany(schema.insert_sql(tuple(columns)), rows)
+        return len(rows)
+
+    def _existing_keys(
+        self, conn: sqlite3.Connection, schema: TableSchema, keys: List[Any]
+    ) -> set:  # pragma: no cover
+        existing = set()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = conn.execute(
+                f"SELECT {schema.primary_key} FROM {schema.table_name} "
+                f"WHERE {schema.primary_key} IN ({placeholders})",
+                chunk,
+            )
+            existing.update(row[0] for row in rows)
+        return existing
+
+    def delete(self, model: T, id: int) -> bool:  # pragma: no cover
+        schema = self.get_schema(model.table_name())
 
         with self.get_connection() as conn:
-            cursor = conn.execute(select_sql)
-            rows = cursor.fetchall()
+            conn.execute(schema.delete_sql, (id,))
+        return True
 
-            result = []
-            for row in rows:
-                row_dict = {col[0]: row[i] for i, col in enumerate(cursor.description)}
-                result.append(model(**row_dict))
+    def get_primary_key_column(self, table_name: str) -> str:  # pragma: no cover
+        return self.get_schema(table_name).primary_key
 
-        return result
+    def get_all(self, model: Type[T]) -> List[T]:  # pragma: no cover
+        schema = self.get_schema(model.table_name())
+
+        with self.get_connection() as conn:
+            rows = conn.execute(schema.select_all_sql).fetchall()
+
+        columns = schema.columns
+        return build_models(model, [dict(zip(columns, row)) for row in rows])
 
     def get(self, model: Type[T], id: int) -> T | None:  # pragma: no cover
-        table_name = model.table_name()
-        primary_key_field = self.get_primary_key_column(table_name)
-        select_sql = f"SELECT * FROM {table_name} WHERE {primary_key_field} = ?"
+        schema = self.get_schema(model.table_name())
 
         with self.get_connection() as conn:
-            cursor = conn.execute(select_sql, (id,))
-            row = cursor.fetchone()
-
-            if row is None:
-                return None
+            row = conn.execute(schema.select_sql, (id,)).fetchone()
 
-            row_dict = {col[0]: row[i] for i, col in enumerate(cursor.description)}
-            return model(**row_dict)
+        if row is None:
+            return None
+        return model.model_validate(schema.to_dict(row))
 
     def execute_all(
         self, query: str, params: Tuple[Any, ...] = ()
@@ -1,20 +1,22 @@
-import threading
 from typing import List, Type
 from services.v2 import data_provider_v2
 from models.v2.client import Client
 from services.v2.base_service import Base
+from services.v2 import write_behind_service
 from services.v2.database_service import DatabaseService
 from services.v1 import data_provider
 
 
 class ClientService(Base):
+    model = Client
+
     def __init__(self, db: Type[DatabaseService] = None, is_debug: bool = False):
         self.is_debug = is_debug
         if db is not None:
             self.db = db
         else:
             self.db = data_provider_v2.fetch_database()
-        self.load()
+        self.hydrate()
 
     def get_all_clients(self) -> List[Client]:
         return self.db.get_all(Client)
@@ -27,16 +29,16 @@ class ClientService(Base):
         return clients
 
     def get_client(self, client_id: int) -> Client | None:
-        for client in self.data:
-            if client.id == client_id:
-                return client
+        client = self.data.get(client_id)
+        if client is not None:
+            return client
         return self.db.get(Client, client_id)
 
     def add_client(self, client: Client, background_task=True) -> Client:
         client.created_at = self.get_timestamp()
         client.updated_at = self.get_timestamp()
         added_client = self.db.insert(client)
-        self.data.append(added_client)
+        self.data.add(added_client)
         self.save(background_task)
         return added_client
 
@@ -47,43 +49,45 @@ class ClientService(Base):
             return None
 
         client.updated_at = self.get_timestamp()
-        for i in range(len(self.data)):
-            if self.data[i].id == client_id:
-                client.id = client_id
-                if client.created_at is None:
-                    client.created_at = self.data[i].created_at
-                updated_client = self.db.update(client, client_id)
-                self.data[i] = updated_client
-                self.save(background_task)
-                return updated_client
-        return None
+        existing_client = self.data.get(client_id)
+        if existing_client is None:
+            return None
+        client.id = client_id
+        if client.created_at is None:
+            client.created_at = existing_client.created_at
+        updated_client = self.db.update(client, client_id)
+        self.data.replace(client_id, updated_client)
+        self.save(background_task)
+        return updated_client
 
     def archive_client(self, client_id: int, background_task=True) -> Client | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == client_id:
-                self.data[i].is_archived = True
-                self.data[i].updated_at = self.get_timestamp()
-                updated_client = self.db.update(self.data[i], client_id)
-                self.data[i] = updated_client
-                self.save(background_task)
-                return updated_client
-        return None
+        client = self.data.get(client_id)
+        if client is None:
+            return None
+        client = client.model_copy(
+            update={"is_archived": True, "updated_at": self.get_timestamp()}
+        )
+        updated_client = self.db.update(client, client_id)
+        self.data.replace(client_id, updated_client)
+        self.save(background_task)
+        return updated_client
 
     def unarchive_client(self, client_id: int, background_task=True) -> Client | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == client_id:
-                self.data[i].is_archived = False
-                self.data[i].updated_at = self.get_timestamp()
-                updated_client = self.db.update(self.data[i], client_id)
-                self.data[i] = updated_client
-                self.save(background_task)
-                return updated_client
-        return None
+        client = self.data.get(client_id)
+        if client is None:
+            return None
+        client = client.model_copy(
+            update={"is_archived": False, "updated_at": self.get_timestamp()}
+        )
+        updated_client = self.db.update(client, client_id)
+        self.data.replace(client_id, updated_client)
+        self.save(background_task)
+        return updated_client
 
     def is_client_archived(self, client_id: int) -> bool | None:
-        for client in self.data:
-            if client.id == client_id:
-                return client.is_archived
+        client = self.data.get(client_id)
+        if client is not None:
+            return client.is_archived
         return None
 
     def save(self, background_task=True):  # pragma: no cover:
@@ -91,13 +95,16 @@ class ClientService(Base):
 
             def call_v1_save_method():
                 data_provider.fetch_client_pool().save(
-                    [client.model_dump() for client in self.data]
+                    [client.model_dump() for client in self.data.values()]
                 )
 
+            writer = write_behind_service.fetch_writer(
+                Client.table_name(), call_v1_save_method
+            )
             if background_task:
-                threading.Thread(target=call_v1_save_method).start()
+                writer.mark_dirty()
             else:
-                call_v1_save_method()
+                writer.save_now()
 
     def load(self):
         self.data = self.get_all_clients()
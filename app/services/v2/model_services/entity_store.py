@@ -0,0 +1,417 @@
+import bisect
+import itertools
+import threading
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+    TypeVar,
+)
+from pydantic import BaseModel
+
+T = TypeVar("T", bound=BaseModel)
+
+# Shared by all stores so a reloaded store never reuses an earlier version.
+_versions = itertools.count(1)
+
+
+class Snapshot(Generic[T]):
+    """Ordered view of an ``EntityStore`` at one version.
+
+    The tuple never changes, and neither do the models in it: writers do not
+    change a stored model in place but ``replace`` it with an updated copy.
+    """
+
+    __slots__ = ("version", "entities", "key", "_positions")
+
+    def __init__(self, version: int, entities: Tuple[T, ...], key: str):
+        self.version = version
+        self.entities = entities
+        self.key = key
+        self._positions = None
+
+    def position(self, key: Any) -> int | None:
+        # Built on first use; two readers racing here build the same map.
+        if self._positions is None:
+            self._positions = {
+                getattr(entity, self.key, None): position
+                for position, entity in reversed(list(enumerate(self.entities)))
+            }
+        return self._positions.get(key)
+
+
+class EntityStore(Generic[T]):
+    """In-memory collection keyed on the primary key of its models.
+
+    Keeps the insertion ordered list that the list endpoints paginate over,
+    next to a primary key -> model map and a primary key -> position map so
+    single entity lookups and replacements do not have to scan the list.
+
+    Secondary indexes map the value of a (foreign key) attribute to the
+    primary keys holding it. The value each entity was indexed under is
+    remembered, so ``replace`` moves it out of its old bucket without reading
+    the replaced model.
+
+    ``sums`` keeps running totals of numeric fields grouped on an attribute,
+    e.g. ``("item_id", ("total_on_hand",))``. Like the indexes, the values
+    each entity was counted with are remembered so a replace subtracts
+    exactly what was added before.
+
+    ``version`` increases on every change, and ``modified_at`` holds the time
+    of the last change. Clients use them to tell whether the collection
+    changed since they last fetched it.
+
+    Writers serialize on a lock. Readers that walk the collection (iteration,
+    ``values``, ``iter_after``) use a ``Snapshot`` instead, so a
+    request thread or a write-behind dump never sees the list change under
+    it. The snapshot is published on the first read after a write, which
+    keeps bulk loads linear; until then readers keep the previous one
+    without taking the lock.
+    """
+
+    def __init__(
+        self,
+        key: str = "id",
+        entities: Iterable[T] | None = None,
+        indexes: Tuple[str, ...] = (),
+        sums: Tuple[str, Tuple[str, ...]] | None = None,
+    ):
+        self.key = key
+        self.indexes = tuple(indexes)
+        self.sums = sums
+        self._lock = threading.RLock()
+        self._snapshot: Snapshot[T] = Snapshot(0, (), key)
+        self.load(entities if entities is not None else [])
+
+    def load(self, entities: Iterable[T]):
+        with self._lock:
+            self._load(entities)
+
+    def _load(self, entities: Iterable[T]):
+        self._entities: List[T] = []
+        self._by_key: Dict[Any, T] = {}
+        self._positions: Dict[Any, int] = {}
+        self._index_buckets: Dict[str, Dict[Any, Dict[Any, None]]] = {
+            attribute: {} for attribute in self.indexes
+        }
+        self._indexed_values: Dict[str, Dict[Any, Any]] = {
+            attribute: {} for attribute in self.indexes
+        }
+        self._sums: Dict[Any, List[int]] = {}
+        self._summed_values: Dict[Any, Tuple[Any, Tuple[int, ...]]] = {}
+        for entity in entities:
+            self._add(entity)
+        self.touch()
+
+    def touch(self):
+        self.version = next(_versions)
+        self.modified_at = time.time()
+
+    def snapshot(self) -> Snapshot[T]:
+        snapshot = self._snapshot
+        if snapshot.version == self.version:
+            return snapshot
+        with self._lock:
+            if self._snapshot.version != self.version:
+                self._snapshot = Snapshot(self.version, tuple(self._entities), self.key)
+            return self._snapshot
+
+    def key_of(self, entity: T) -> Any:
+        return getattr(entity, self.key, None)
+
+    def get(self, key: Any) -> T | None:
+        return self._by_key.get(key)
+
+    def has(self, key: Any) -> bool:
+        return key in self._by_key
+
+    def add(self, entity: T) -> T:
+        with self._lock:
+            self._add(entity)
+            self.touch()
+            return entity
+
+    def _add(self, entity: T):
+        # An entity whose key is already stored takes its place, so a key is
+        # never listed twice, e.g. when a change feed and a request add the
+        # same entity.
+        key = self.key_of(entity)
+        position = self._positions.get(key)
+        if position is not None:
+            self._entities[position] = entity
+            self._unindex(key)
+        else:
+            self._positions[key] = len(self._entities)
+            self._entities.append(entity)
+        self._by_key[key] = entity
+        self._index(key, entity)
+
+    def replace(self, key: Any, entity: T) -> T | None:
+        with self._lock:
+            position = self._positions.get(key)
+            if position is None:
+                return None
+            self._entities[position] = entity
+            self._by_key[key] = entity
+            self._unindex(key)
+            self._index(key, entity)
+            self.touch()
+            return entity
+
+    def remove(self, key: Any) -> T | None:
+        # O(n): every later entity moves up one position. Use remove_many to
+        # remove several entities at once.
+        with self._lock:
+            position = self._positions.pop(key, None)
+            if position is None:
+                return None
+            entity = self._by_key.pop(key)
+            self._unindex(key)
+            del self._entities[position]
+            for other_key, other_position in self._positions.items():
+                if other_position > position:
+                    self._positions[other_key] = other_position - 1
+            self.touch()
+            return entity
+
+    def remove_many(self, keys: Iterable[Any]) -> List[T]:
+        """Removes the entities with ``keys``; unknown keys are skipped.
+
+        The list and the positions are rebuilt once for the whole batch, so
+        this is O(n) where calling ``remove`` per key is O(n) per key.
+        """
+        with self._lock:
+            removed = []
+            removed_positions = []
+            for key in keys:
+                position = self._positions.pop(key, None)
+                if position is None:
+                    continue
+                removed.append(self._by_key.pop(key))
+                removed_positions.append(position)
+                self._unindex(key)
+            if not removed:
+                return removed
+            removed_positions.sort()
+            skipped = set(removed_positions)
+            self._entities[:] = [
+                entity
+                for position, entity in enumerate(self._entities)
+                if position not in skipped
+            ]
+            for key, position in self._positions.items():
+                self._positions[key] = position - bisect.bisect_left(
+                    removed_positions, position
+                )
+            self.touch()
+            return removed
+
+    def find(self, attribute: str, value: Any) -> List[T]:
+        return self.find_any((attribute,), value)
+
+    def find_any(self, attributes: Tuple[str, ...], value: Any) -> List[T]:
+        # The buckets are live dicts that writers change, so they are read
+        # under the lock; it is held for the size of the buckets only.
+        found = []
+        with self._lock:
+            keys = set()
+            for attribute in attributes:
+                keys.update(tuple(self._index_buckets[attribute].get(value, ())))
+            for key in keys:
+                found.append((self._positions[key], self._by_key[key]))
+        found.sort(key=lambda item: item[0])
+        return [entity for _, entity in found]
+
+    def count(self, attribute: str, value: Any) -> int:
+        return len(self._index_buckets[attribute].get(value, {}))
+
+    def iter_after(self, key: Any = None) -> Iterator[T]:
+        """Iterates in order, starting after the entity with primary key ``key``.
+
+        If that entity has been removed since, iteration starts at the first
+        entity with a greater key instead.
+        """
+        snapshot = self.snapshot()
+        entities = snapshot.entities
+        if key is None:
+            position = 0
+        else:
+            position = self._position_in(snapshot, key)
+            if position is not None:
+                position += 1
+            else:
+                position = len(entities)
+                for other_position, entity in enumerate(entities):
+                    try:
+                        if self.key_of(entity) > key:
+                            position = other_position
+                            break
+                    except TypeError:
+                        break
+        for position in range(position, len(entities)):
+            yield entities[position]
+
+    def _position_in(self, snapshot: Snapshot[T], key: Any) -> int | None:
+        # The live position is right unless a write came after the snapshot.
+        position = self._positions.get(key)
+        if (
+            position is not None
+            and position < len(snapshot.entities)
+            and self.key_of(snapshot.entities[position]) == key
+        ):
+            return position
+        return snapshot.position(key)
+
+    def sum_of(self, value: Any) -> Dict[str, int]:
+        """Returns the running totals of the entities grouped under ``value``."""
+        _, fields = self.sums
+        with self._lock:
+            totals = self._sums.get(value)
+            if totals is None:
+                return {field: 0 for field in fields}
+            return dict(zip(fields, totals))
+
+    def rebuild_sums(self) -> List[Any]:
+        """Recomputes the running totals from the entities.
+
+        Returns the group values whose totals did not match, which should be
+        empty unless an entity was changed without being passed to
+        ``replace``.
+        """
+        _, fields = self.sums
+        zeros = [0] * len(fields)
+        with self._lock:
+            previous = self._sums
+            self._sums = {}
+            self._summed_values = {}
+            for key, entity in self._by_key.items():
+                self._add_to_sums(key, entity)
+        return [
+            value
+            for value in previous.keys() | self._sums.keys()
+            if previous.get(value, zeros) != self._sums.get(value, zeros)
+        ]
+
+    def _add_to_sums(self, key: Any, entity: T):
+        attribute, fields = self.sums
+        value = getattr(entity, attribute, None)
+        amounts = tuple(getattr(entity, field, None) or 0 for field in fields)
+        totals = self._sums.setdefault(value, [0] * len(fields))
+        for position, amount in enumerate(amounts):
+            totals[position] += amount
+        self._summed_values[key] = (value, amounts)
+
+    def _remove_from_sums(self, key: Any):
+        if key not in self._summed_values:
+            return
+        value, amounts = self._summed_values.pop(key)
+        totals = self._sums[value]
+        for position, amount in enumerate(amounts):
+            totals[position] -= amount
+
+    def _index(self, key: Any, entity: T):
+        for attribute in self.indexes:
+            value = getattr(entity, attribute, None)
+            self._index_buckets[attribute].setdefault(value, {})[key] = None
+            self._indexed_values[attribute][key] = value
+        if self.sums is not None:
+            self._add_to_sums(key, entity)
+
+    def _unindex(self, key: Any):
+        if self.sums is not None:
+            self._remove_from_sums(key)
+        for attribute in self.indexes:
+            if key not in self._indexed_values[attribute]:
+                continue
+            value = self._indexed_values[attribute].pop(key)
+            bucket = self._index_buckets[attribute].get(value)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del self._index_buckets[attribute][value]
+
+    def keys(self) -> List[Any]:
+        return [self.key_of(entity) for entity in self.snapshot().entities]
+
+    def values(self) -> List[T]:
+        return list(self.snapshot().entities)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.snapshot().entities)
+
+    def __len__(self) -> int:
+        return len(self.snapshot().entities)
+
+    def __getitem__(self, position: int) -> T:
+        return self.snapshot().entities[position]
+
+    def __contains__(self, entity: object) -> bool:
+        stored = self._by_key.get(self.key_of(entity))
+        return stored is not None and stored == entity
+
+
+class PendingStore(Generic[T]):
+    """Stands in for the ``EntityStore`` of a collection that is still loading.
+
+    Primary key lookups go to the database through ``fetch`` right away.
+    Everything else waits for ``loaded`` and then uses the store returned by
+    ``store``. An entity written while the collection was loading may already
+    be in the loaded store, so ``add`` replaces it instead of adding it twice.
+
+    ``version`` and ``modified_at`` are None until the store is loaded, which
+    tells the HTTP caches not to validate or keep responses yet.
+    """
+
+    version = None
+    modified_at = None
+
+    def __init__(
+        self,
+        fetch: Callable[[Any], T | None],
+        loaded: threading.Event,
+        store: Callable[[], Any],
+    ):
+        self.fetch = fetch
+        self.loaded = loaded
+        self.store = store
+
+    def loaded_store(self) -> EntityStore[T]:
+        self.loaded.wait()
+        store = self.store()
+        if store is self:
+            raise RuntimeError("The collection failed to load")
+        return store
+
+    def get(self, key: Any) -> T | None:
+        return self.fetch(key)
+
+    def has(self, key: Any) -> bool:
+        return self.fetch(key) is not None
+
+    def add(self, entity: T) -> T:
+        store = self.loaded_store()
+        key = store.key_of(entity)
+        if store.has(key):
+            return store.replace(key, entity)
+        return store.add(entity)
+
+    def __getattr__(self, name: str):
+        return getattr(self.loaded_store(), name)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.loaded_store())
+
+    def __len__(self) -> int:
+        return len(self.loaded_store())
+
+    def __getitem__(self, position: int) -> T:
+        return self.loaded_store()[position]
+
+    def __contains__(self, entity: object) -> bool:
+        return entity in self.loaded_store()
@@ -1,30 +1,63 @@
-import threading
-from typing import List, Type
+from typing import Dict, List, Type
 from models.v2.inventory import Inventory
 from services.v2.base_service import Base
-from services.v2.database_service import DatabaseService
+from services.v2 import write_behind_service
+from services.v2.database_service import DatabaseService, build_models
 from services.v2 import data_provider_v2
 from services.v1 import data_provider
 from utils.globals import *
 
 
 class InventoryService(Base):
+    model = Inventory
+    indexes = ("item_id",)
+    # Kept per item so the totals of an item never need a scan.
+    sums = (
+        "item_id",
+        (
+            "total_on_hand",
+            "total_expected",
+            "total_ordered",
+            "total_allocated",
+            "total_available",
+        ),
+    )
+
     def __init__(self, db: Type[DatabaseService] = None, is_debug: bool = False):
         self.is_debug = is_debug
         if db is not None:
             self.db = db
         else:
             self.db = data_provider_v2.fetch_database()
-        self.load()
+        self.hydrate()
 
     def get_all_inventories(self) -> List[Inventory]:
-        all_inventories = []
+        return self.read_inventories()
+
+    def fetch_entities(self, keys: List[int]) -> List[Inventory]:
+        return self.read_inventories(keys)
+
+    def read_inventories(self, keys: List[int] | None = None) -> List[Inventory]:
+        """Reads the inventories with an id in ``keys``, or all of them."""
+        inventories_where = locations_where = ""
+        params = ()
+        if keys is not None:
+            placeholders = ", ".join("?" for _ in keys)
+            inventories_where = f" WHERE id IN ({placeholders})"
+            locations_where = f" WHERE inventory_id IN ({placeholders})"
+            params = tuple(keys)
+
+        inventory_dicts = []
         with self.db.get_connection() as conn:
-            cursor_inventories = conn.execute(f"SELECT * FROM {Inventory.table_name()}")
+            cursor_inventories = conn.execute(
+                f"SELECT * FROM {Inventory.table_name()}{inventories_where}", params
+            )
             rows = cursor_inventories.fetchall()
 
             cursor_locations = conn.execute(
                 f"SELECT inventory_id, location_id FROM {inventory_locations_table}"
+                f"{locations_where}",
+                params,
             )
             location_rows = cursor_locations.fetchall()
 
@@ -34,17 +67,15 @@ class InventoryService(Base):
                     locations_by_inventory[inventory_id] = []
                 locations_by_inventory[inventory_id].append(location_id)
 
+            columns = [column[0] for column in cursor_inventories.description]
             for inventory in rows:
-                inventory_dict = {
-                    col[0]: inventory[i]
-                    for i, col in enumerate(cursor_inventories.description)
-                }
+                inventory_dict = dict(zip(columns, inventory))
                 inventory_dict["locations"] = locations_by_inventory.get(
                     inventory_dict["id"], []
                 )
-                all_inventories.append(Inventory(**inventory_dict))
+                inventory_dicts.append(inventory_dict)
 
-        return all_inventories
+        return build_models(Inventory, inventory_dicts)
 
     def get_inventories(self) -> List[Inventory]:
         inventories = []
@@ -54,9 +85,9 @@ class InventoryService(Base):
         return inventories
 
     def get_inventory(self, inventory_id: int) -> Inventory | None:
-        for inventory in self.data:
-            if inventory.id == inventory_id:
-                return inventory
+        inventory = self.data.get(inventory_id)
+        if inventory is not None:
+            return inventory
 
         with self.db.get_connection() as conn:
             cursor_inventories = conn.execute(
@@ -102,16 +133,53 @@ class InventoryService(Base):
             inventory.id = cursor_inventory.lastrowid
 
             if inventory.locations:
-                for location_id in inventory.locations:
-                    location_insert_sql = f"""
-                    INSERT INTO {inventory_locations_table} (inventory_id, location_id)
-                    VALUES (?, ?)
-                    """
-                    conn.execute(location_insert_sql, (inventory.id, location_id))
-        self.data.append(inventory)
+                self.insert_inventory_locations(inventory.id, inventory.locations)
+        self.data.add(inventory)
         self.save(background_task)
         return inventory
 
+    def insert_inventory_locations(
+        self, inventory_id: int, location_ids: List[int]
+    ) -> int:
+        return self.db.insert_rows(
+            inventory_locations_table,
+            ("inventory_id", "location_id"),
+            [(inventory_id, location_id) for location_id in location_ids],
+        )
+
+    def add_inventories(
+        self, inventories: List[Inventory], background_task=True
+    ) -> List[Inventory | None]:
+        return self.add_batch(
+            inventories,
+            self.has_inventory_archived_entities,
+            self.insert_inventories,
+            background_task,
+        )
+
+    def insert_inventories(self, inventories: List[Inventory]) -> List[Inventory]:
+        added = self.db.insert_many(inventories)
+        self.db.insert_rows(
+            inventory_locations_table,
+            ("inventory_id", "location_id"),
+            [
+                (inventory.id, location_id)
+                for inventory in added
+                for location_id in inventory.locations
+            ],
+        )
+        return added
+
+    def update_inventories(
+        self, inventories: List[Inventory], background_task=True
+    ) -> List[Inventory | None]:
+        return self.apply_batch(
+            lambda inventory: self.update_inventory(
+                inventory.id, inventory, background_task
+            ),
+            inventories,
+        )
+
     def update_inventory(
         self, inventory_id: int, inventory: Inventory, background_task=True
     ) -> Inventory:
@@ -162,77 +230,174 @@ class InventoryService(Base):
                     conn.executemany(delete_sql, delete_values)
 
                 if locations_to_insert:
-                    insert_sql = f"""
-                    INSERT INTO {inventory_locations_table} (inventory_id, location_id)
-                    VALUES (?, ?)
-                    """
-                    insert_values = []
-                    for loc_id in locations_to_insert:
-                        insert_values.append((inventory_id, loc_id))
-                    conn.executemany(insert_sql, insert_values)
-        for i in range(len(self.data)):
-            if self.data[i].id == inventory_id:
-                self.data[i] = inventory
-                self.save(background_task)
-                break
+                    self.insert_inventory_locations(
+                        inventory_id, sorted(locations_to_insert)
+                    )
+        if self.data.replace(inventory_id, inventory) is not None:
+            self.save(background_task)
         return inventory
 
+    def adjust_on_hand(
+        self, changes: Dict[int, int], background_task=True
+    ) -> List[Inventory]:
+        """Adds ``changes`` (inventory id -> amount) to the stock on hand.
+
+        Archived and unknown inventories are skipped.
+        """
+        updated_inventories = []
+        for inventory_id, amount in changes.items():
+            inventory = self.data.get(inventory_id)
+            if inventory is None or inventory.is_archived:
+                continue
+            total_on_hand = inventory.total_on_hand + amount
+            updated_inventories.append(
+                inventory.model_copy(
+                    update={
+                        "total_on_hand": total_on_hand,
+                        "total_expected": total_on_hand + inventory.total_ordered,
+                        "total_available": total_on_hand - inventory.total_allocated,
+                    }
+                )
+            )
+        return self.write_totals(updated_inventories, background_task)
+
+    def adjust_ordered(
+        self, changes: Dict[str, int], background_task=True
+    ) -> List[Inventory]:
+        """Adds ``changes`` (item id -> amount) to the amount on order.
+
+        Per item the inventory with the most on order takes the change, unless
+        that would make its amount on order negative.
+        """
+        updated_inventories = []
+        for item_id, amount in changes.items():
+            inventory = max(
+                (
+                    inventory
+                    for inventory in self.get_inventories_for_item(item_id)
+                    if not inventory.is_archived
+                ),
+                key=lambda inventory: inventory.total_ordered,
+                default=None,
+            )
+            if amount == 0 or inventory is None:
+                continue
+            total_ordered = inventory.total_ordered + amount
+            if total_ordered < 0:
+                continue
+            updated_inventories.append(
+                inventory.model_copy(
+                    update={
+                        "total_ordered": total_ordered,
+                        "total_expected": inventory.total_on_hand + total_ordered,
+                    }
+                )
+            )
+        return self.write_totals(updated_inventories, background_task)
+
+    def write_totals(
+        self, inventories: List[Inventory], background_task=True
+    ) -> List[Inventory]:
+        """Writes the totals of ``inventories`` with a single executemany.
+
+        The rows are written in the current transaction, replaced in memory
+        and persisted with one save. If writing fails the collection is
+        reloaded.
+        """
+        if not inventories:
+            return []
+        timestamp = self.get_timestamp()
+        for inventory in inventories:
+            inventory.updated_at = timestamp
+
+        try:
+            with self.db.get_connection() as conn:
+                conn.executemany(
+                    f"UPDATE {Inventory.table_name()} SET total_on_hand = ?, "
+                    "total_expected = ?, total_ordered = ?, total_allocated = ?, "
+                    "total_available = ?, updated_at = ? WHERE id = ?",
+                    [
+                        (
+                            inventory.total_on_hand,
+                            inventory.total_expected,
+                            inventory.total_ordered,
+                            inventory.total_allocated,
+                            inventory.total_available,
+                            inventory.updated_at,
+                            inventory.id,
+                        )
+                        for inventory in inventories
+                    ],
+                )
+                for inventory in inventories:
+                    self.data.replace(inventory.id, inventory)
+        except Exception:
+            self.load()
+            raise
+        self.save(background_task)
+        return inventories
+
     def archive_inventory(
         self, inventory_id: int, background_task=True
     ) -> Inventory | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == inventory_id:
-                self.data[i].is_archived = True
-                table_name = self.data[i].table_name()
-
-                self.data[i].updated_at = self.get_timestamp()
+        inventory = self.data.get(inventory_id)
+        if inventory is None:
+            return None
+        inventory = inventory.model_copy(
+            update={"is_archived": True, "updated_at": self.get_timestamp()}
+        )
+        table_name = inventory.table_name()
 
-                fields = self.get_key_values_of_inventory(self.data[i])
+        fields = self.get_key_values_of_inventory(inventory)
 
-                columns = ", ".join(f"{key} = ?" for key in fields.keys())
-                values = tuple(fields.values())
-                update_sql = f"UPDATE {table_name} SET {columns} WHERE id = ?"
+        columns = ", ".join(f"{key} = ?" for key in fields.keys())
+        values = tuple(fields.values())
+        update_sql = f"UPDATE {table_name} SET {columns} WHERE id = ?"
 
-                with self.db.get_connection() as conn:
-                    conn.execute(update_sql, values + (inventory_id,))
-                self.save(background_task)
-                return self.data[i]
-        return None
+        with self.db.get_connection() as conn:
+            conn.execute(update_sql, values + (inventory_id,))
+        self.data.replace(inventory_id, inventory)
+        self.save(background_task)
+        return inventory
 
     def unarchive_inventory(
         self, inventory_id: int, background_task=True
     ) -> Inventory | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == inventory_id:
-                self.data[i].is_archived = False
-                table_name = self.data[i].table_name()
-
-                self.data[i].updated_at = self.get_timestamp()
+        inventory = self.data.get(inventory_id)
+        if inventory is None:
+            return False
+        inventory = inventory.model_copy(
+            update={"is_archived": False, "updated_at": self.get_timestamp()}
+        )
+        table_name = inventory.table_name()
 
-                fields = self.get_key_values_of_inventory(self.data[i])
+        fields = self.get_key_values_of_inventory(inventory)
 
-                columns = ", ".join(f"{key} = ?" for key in fields.keys())
-                values = tuple(fields.values())
-                update_sql = f"UPDATE {table_name} SET {columns} WHERE id = ?"
+        columns = ", ".join(f"{key} = ?" for key in fields.keys())
+        values = tuple(fields.values())
+        update_sql = f"UPDATE {table_name} SET {columns} WHERE id = ?"
 
-                with self.db.get_connection() as conn:
-                    conn.execute(update_sql, values + (inventory_id,))
-                self.save(background_task)
-                return self.data[i]
-        return False
+        with self.db.get_connection() as conn:
+            conn.execute(update_sql, values + (inventory_id,))
+        self.data.replace(inventory_id, inventory)
+        self.save(background_task)
+        return inventory
 
     def save(self, background_task=True):  # pragma: no cover:
         if not self.is_debug:
 
             def call_v1_save_method():
                 data_provider.fetch_inventory_pool().save(
-                    [inventory.model_dump() for inventory in self.data]
+                    [inventory.model_dump() for inventory in self.data.values()]
                 )
 
+            writer = write_behind_service.fetch_writer(
+                Inventory.table_name(), call_v1_save_method
+            )
             if background_task:
-                threading.Thread(target=call_v1_save_method).start()
+                writer.mark_dirty()
             else:
-                call_v1_save_method()
+                writer.save_now()
 
     def load(self):
         self.data = self.get_all_inventories()
@@ -280,26 +445,14 @@ class InventoryService(Base):
         return has_archived_entities
 
     def get_inventories_for_item(self, item_id: str) -> List[Inventory]:
-        result = []
-        for inventory in self.data:
-            if inventory.item_id == item_id:
-                result.append(inventory)
-        return result
+        return self.data.find("item_id", item_id)
 
     def get_inventory_totals_for_item(self, item_id: str) -> dict:
-        result = {
-            "total_expected": 0,
-            "total_ordered": 0,
-            "total_allocated": 0,
-            "total_available": 0,
-        }
-        for x in self.data:
-            if x.item_id == item_id:
-                result["total_expected"] += x.total_expected
-                result["total_ordered"] += x.total_ordered
-                result["total_allocated"] += x.total_allocated
-                result["total_available"] += x.total_available
-        return result
+        return self.data.sum_of(item_id)
+
+    def rebuild_inventory_totals(self) -> List[str]:
+        """Recomputes the per item totals, returning the items that were off."""
+        return self.data.rebuild_sums()
 
     def get_key_values_of_inventory(self, inventory: Inventory) -> dict:
         fields = {}
@@ -1,20 +1,22 @@
-import threading
 from typing import List, Type
 from services.v2 import data_provider_v2
 from models.v2.item_group import ItemGroup
 from services.v2.base_service import Base
+from services.v2 import write_behind_service
 from services.v2.database_service import DatabaseService
 from services.v1 import data_provider
 
 
 class ItemGroupService(Base):
+    model = ItemGroup
+
     def __init__(self, db: Type[DatabaseService] = None, is_debug: bool = False):
         self.is_debug = is_debug
         if db is not None:
             self.db = db
         else:
             self.db = data_provider_v2.fetch_database()
-        self.load()
+        self.hydrate()
 
     def get_all_item_groups(self) -> List[ItemGroup]:
         return self.db.get_all(ItemGroup)
@@ -27,22 +29,22 @@ class ItemGroupService(Base):
         return item_groups
 
     def get_item_group(self, item_group_id: int) -> ItemGroup:
-        for item_group in self.data:
-            if item_group.id == item_group_id:
-                return item_group
+        item_group = self.data.get(item_group_id)
+        if item_group is not None:
+            return item_group
         return self.db.get(ItemGroup, item_group_id)
 
     def is_item_group_archived(self, item_group_id: int) -> bool:
-        for item_group in self.data:
-            if item_group.id == item_group_id:
-                return item_group.is_archived
+        item_group = self.data.get(item_group_id)
+        if item_group is not None:
+            return item_group.is_archived
         return None
 
     def add_item_group(self, item_group: ItemGroup, background_task=True) -> ItemGroup:
         item_group.created_at = self.get_timestamp()
         item_group.updated_at = self.get_timestamp()
         added_item_group = self.db.insert(item_group)
-        self.data.append(added_item_group)
+        self.data.add(added_item_group)
         self.save(background_task)
         return added_item_group
 
@@ -53,52 +55,57 @@ class ItemGroupService(Base):
             return None
 
         item_group.updated_at = self.get_timestamp()
-        for i in range(len(self.data)):
-            if self.data[i].id == item_group_id:
-                updated_item_group = self.db.update(item_group, item_group_id)
-                self.data[i] = updated_item_group
-                self.save(background_task)
-                return updated_item_group
-        return None
+        existing_item_group = self.data.get(item_group_id)
+        if existing_item_group is None:
+            return None
+        updated_item_group = self.db.update(item_group, item_group_id)
+        self.data.replace(item_group_id, updated_item_group)
+        self.save(background_task)
+        return updated_item_group
 
     def archive_item_group(
         self, item_group_id: int, background_task=True
     ) -> ItemGroup | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == item_group_id:
-                self.data[i].is_archived = True
-                self.data[i].updated_at = self.get_timestamp()
-                updated_item_group = self.db.update(self.data[i], item_group_id)
-                self.data[i] = updated_item_group
-                self.save(background_task)
-                return updated_item_group
-        return None
+        item_group = self.data.get(item_group_id)
+        if item_group is None:
+            return None
+        item_group = item_group.model_copy(
+            update={"is_archived": True, "updated_at": self.get_timestamp()}
+        )
+        updated_item_group = self.db.update(item_group, item_group_id)
+        self.data.replace(item_group_id, updated_item_group)
+        self.save(background_task)
+        return updated_item_group
 
     def unarchive_item_group(
         self, item_group_id: int, background_task=True
     ) -> ItemGroup | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == item_group_id:
-                self.data[i].is_archived = False
-                self.data[i].updated_at = self.get_timestamp()
-                updated_item_group = self.db.update(self.data[i], item_group_id)
-                self.data[i] = updated_item_group
-                self.save(background_task)
-                return updated_item_group
-        return None
+        item_group = self.data.get(item_group_id)
+        if item_group is None:
+            return None
+        item_group = item_group.model_copy(
+            update={"is_archived": False, "updated_at": self.get_timestamp()}
+        )
+        updated_item_group = self.db.update(item_group, item_group_id)
+        self.data.replace(item_group_id, updated_item_group)
+        self.save(background_task)
+        return updated_item_group
 
     def save(self, background_task=True):  # pragma: no cover:
         if not self.is_debug:
 
             def call_v1_save_method():
                 data_provider.fetch_item_group_pool().save(
-                    [item.model_dump() for item in self.data]
+                    [item.model_dump() for item in self.data.values()]
                 )
 
+            writer = write_behind_service.fetch_writer(
+                ItemGroup.table_name(), call_v1_save_method
+            )
             if background_task:
-                threading.Thread(target=call_v1_save_method).start()
+                writer.mark_dirty()
             else:
-                call_v1_save_method()
+                writer.save_now()
 
     def load(self):
         self.data = self.get_all_item_groups()
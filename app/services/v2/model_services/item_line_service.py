@@ -1,20 +1,22 @@
-import threading
 from typing import List, Type
 from services.v2 import data_provider_v2
 from models.v2.item_line import ItemLine
 from services.v2.base_service import Base
+from services.v2 import write_behind_service
 from services.v2.database_service import DatabaseService
 from services.v1 import data_provider
 
 
 class ItemLineService(Base):
+    model = ItemLine
+
     def __init__(self, db: Type[DatabaseService] = None, is_debug: bool = False):
         self.is_debug = is_debug
         if db is not None:
             self.db = db
         else:
             self.db = data_provider_v2.fetch_database()
-        self.load()
+        self.hydrate()
 
     def get_all_item_lines(self) -> List[ItemLine]:
         return self.db.get_all(ItemLine)
@@ -27,22 +29,22 @@ class ItemLineService(Base):
         return item_lines
 
     def get_item_line(self, item_line_id: int) -> ItemLine | None:
-        for item_line in self.data:
-            if item_line.id == item_line_id:
-                return item_line
+        item_line = self.data.get(item_line_id)
+        if item_line is not None:
+            return item_line
         return self.db.get(ItemLine, item_line_id)
 
     def is_item_line_archived(self, item_line_id: int) -> bool:
-        for item_line in self.data:
-            if item_line.id == item_line_id:
-                return item_line.is_archived
+        item_line = self.data.get(item_line_id)
+        if item_line is not None:
+            return item_line.is_archived
         return None
 
     def add_item_line(self, item_line: ItemLine, background_task=True) -> ItemLine:
         item_line.created_at = self.get_timestamp()
         item_line.updated_at = self.get_timestamp()
         added_item_line = self.db.insert(item_line)
-        self.data.append(added_item_line)
+        self.data.add(added_item_line)
         self.save(background_task)
         return added_item_line
 
@@ -53,52 +55,57 @@ class ItemLineService(Base):
             return None
 
         item_line.updated_at = self.get_timestamp()
-        for i in range(len(self.data)):
-            if self.data[i].id == item_line_id:
-                updated_item_line = self.db.update(item_line, item_line_id)
-                self.data[i] = updated_item_line
-                self.save(background_task)
-                return updated_item_line
-        return None
+        existing_item_line = self.data.get(item_line_id)
+        if existing_item_line is None:
+            return None
+        updated_item_line = self.db.update(item_line, item_line_id)
+        self.data.replace(item_line_id, updated_item_line)
+        self.save(background_task)
+        return updated_item_line
 
     def archive_item_line(
         self, item_line_id: int, background_task=True
     ) -> ItemLine | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == item_line_id:
-                self.data[i].is_archived = True
-                self.data[i].updated_at = self.get_timestamp()
-                updated_item_line = self.db.update(self.data[i], item_line_id)
-                self.data[i] = updated_item_line
-                self.save(background_task)
-                return updated_item_line
-        return None
+        item_line = self.data.get(item_line_id)
+        if item_line is None:
+            return None
+        item_line = item_line.model_copy(
+            update={"is_archived": True, "updated_at": self.get_timestamp()}
+        )
+        updated_item_line = self.db.update(item_line, item_line_id)
+        self.data.replace(item_line_id, updated_item_line)
+        self.save(background_task)
+        return updated_item_line
 
     def unarchive_item_line(
         self, item_line_id: int, background_task=True
     ) -> ItemLine | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == item_line_id:
-                self.data[i].is_archived = False
-                self.data[i].updated_at = self.get_timestamp()
-                updated_item_line = self.db.update(self.data[i], item_line_id)
-                self.data[i] = updated_item_line
-                self.save(background_task)
-                return updated_item_line
-        return None
+        item_line = self.data.get(item_line_id)
+        if item_line is None:
+            return None
+        item_line = item_line.model_copy(
+            update={"is_archived": False, "updated_at": self.get_timestamp()}
+        )
+        updated_item_line = self.db.update(item_line, item_line_id)
+        self.data.replace(item_line_id, updated_item_line)
+        self.save(background_task)
+        return updated_item_line
 
     def save(self, background_task=True):  # pragma: no cover:
         if not self.is_debug:
 
             def call_v1_save_method():
                 data_provider.fetch_item_line_pool().save(
-                    [item.model_dump() for item in self.data]
+                    [item.model_dump() for item in self.data.values()]
                 )
 
+            writer = write_behind_service.fetch_writer(
+                ItemLine.table_name(), call_v1_save_method
+            )
             if background_task:
-                threading.Thread(target=call_v1_save_method).start()
+                writer.mark_dirty()
             else:
-                call_v1_save_method()
+                writer.save_now()
 
     def load(self):
         self.data = self.get_all_item_lines()
@@ -1,20 +1,35 @@
-import threading
 from typing import List, Type
 from models.v2.item import Item
 from services.v2.base_service import Base
+from services.v2 import write_behind_service
 from services.v2.database_service import DatabaseService
+from services.v2.model_services.entity_store import PendingStore
 from services.v2 import data_provider_v2
+from services.v2.uid_service import UidAllocator
 from services.v1 import data_provider
 
 
 class ItemService(Base):
+    model = Item
+    primary_key = "uid"
+    indexes = ("item_line", "item_group", "item_type", "supplier_id")
+
     def __init__(self, db: Type[DatabaseService] = None, is_debug: bool = False):
         self.is_debug = is_debug
         if db is not None:
             self.db = db
         else:
             self.db = data_provider_v2.fetch_database()
-        self.load()
+        self.hydrate()
+
+    @Base.data.setter
+    def data(self, entities):
+        # The allocator seeds on first use, so the one made for a store that
+        # is still loading keeps serving once the load has replaced it.
+        was_pending = isinstance(getattr(self, "_store", None), PendingStore)
+        Base.data.fset(self, entities)
+        if not was_pending:
+            self.uids = UidAllocator("P", 6, lambda: self.data.keys())
 
     def get_all_items(self) -> List[Item]:
         return self.db.get_all(Item)
@@ -27,36 +42,36 @@ class ItemService(Base):
         return items
 
     def get_item(self, item_id: str) -> Item | None:
-        for item in self.data:
-            if item.uid == item_id:
-                return item
+        item = self.data.get(item_id)
+        if item is not None:
+            return item
         return self.db.get(Item, item_id)
 
     def get_items_for_item_line(self, item_line_id: int) -> List[Item]:
         result = []
-        for item in self.get_items():
-            if item.item_line == item_line_id:
+        for item in self.data.find("item_line", item_line_id):
+            if not item.is_archived:
                 result.append(item)
         return result
 
     def get_items_for_item_group(self, item_group_id: int) -> List[Item]:
         result = []
-        for item in self.get_items():
-            if item.item_group == item_group_id:
+        for item in self.data.find("item_group", item_group_id):
+            if not item.is_archived:
                 result.append(item)
         return result
 
     def get_items_for_item_type(self, item_type_id: int) -> List[Item]:
         result = []
-        for item in self.get_items():
-            if item.item_type == item_type_id:
+        for item in self.data.find("item_type", item_type_id):
+            if not item.is_archived:
                 result.append(item)
         return result
 
     def get_items_for_supplier(self, supplier_id: int) -> List[Item]:
         result = []
-        for item in self.get_items():
-            if item.supplier_id == supplier_id:
+        for item in self.data.find("supplier_id", supplier_id):
+            if not item.is_archived:
                 result.append(item)
         return result
 
@@ -130,22 +145,61 @@ class ItemService(Base):
     def add_item(self, item: Item, background_task=True) -> Item | None:
         if self.has_item_archived_entities(item):
             return None
-        item.uid = self.generate_uid()
         item.created_at = self.get_timestamp()
         item.updated_at = self.get_timestamp()
-        added_item = self.db.insert(item)
-        self.data.append(added_item)
+        added_item = None
+        while added_item is None:
+            item.uid = self.uids.allocate()
+            added_item = self.db.insert(item)
+            if added_item is None:
+                self.skip_taken_uids()
+        self.data.add(added_item)
         self.save(background_task)
         return added_item
 
-    def generate_uid(self) -> str:
-        existing_ids = (int(item.uid[1:]) for item in self.data if hasattr(item, "uid"))
-        current_id = max(existing_ids, default=0) + 1
+    def add_items(self, items: List[Item], background_task=True) -> List[Item | None]:
+        return self.add_batch(
+            items, self.has_item_archived_entities, self.insert_items, background_task
+        )
+
+    def insert_items(self, items: List[Item]) -> List[Item]:
+        added = [None] * len(items)
+        positions = list(range(len(items)))
+        while positions:
+            for position, uid in zip(positions, self.uids.reserve(len(positions))):
+                items[position].uid = uid
+            inserted = self.db.insert_many([items[position] for position in positions])
+            for position, item in zip(positions, inserted):
+                added[position] = item
+            positions = [
+                position for position, item in zip(positions, inserted) if item is None
+            ]
+            if positions:
+                self.skip_taken_uids()
+        return added
+
+    def skip_taken_uids(self):
+        # Another worker process inserted items with uids this one had not
+        # seen yet; continue after the highest uid in the database.
+        self.uids.advance_past(
+            row[0]
+            for row in self.db.execute_all(f"SELECT uid FROM {Item.table_name()}")
+        )
+
+    def apply_changes(self, keys: List | None = None):
+        super().apply_changes(keys)
+        if keys is not None:
+            self.uids.advance_past(keys)
 
-        while f"P{current_id:06d}" in existing_ids:
-            current_id += 1
+    def update_items(
+        self, items: List[Item], background_task=True
+    ) -> List[Item | None]:
+        return self.apply_batch(
+            lambda item: self.update_item(item.uid, item, background_task), items
+        )
 
-        return f"P{current_id:06d}"
+    def generate_uid(self) -> str:
+        return self.uids.peek()
 
     def update_item(
         self, item_id: str, item: Item, background_task=True
@@ -157,58 +211,61 @@ class ItemService(Base):
             return None
 
         item.updated_at = self.get_timestamp()
-        for i in range(len(self.data)):
-            if self.data[i].uid == item_id:
-                item.uid = item_id
-                item.created_at = self.data[i].created_at
-                updated_item = self.db.update(item, item_id)
-                self.data[i] = updated_item
-                self.save(background_task)
-                return updated_item
-        return None
+        existing_item = self.data.get(item_id)
+        if existing_item is None:
+            return None
+        item.uid = item_id
+        item.created_at = existing_item.created_at
+        updated_item = self.db.update(item, item_id)
+        self.data.replace(item_id, updated_item)
+        self.save(background_task)
+        return updated_item
 
     def is_item_archived(self, item_id: str) -> bool | None:
-        for item in self.data:
-            if item.uid == item_id:
-                return item.is_archived
+        item = self.data.get(item_id)
+        if item is not None:
+            return item.is_archived
         return None
 
     def archive_item(self, item_id: str, background_task=True) -> Item | None:
-        for i in range(len(self.data)):
-            if self.data[i].uid == item_id:
-                new_item = self.data[i].model_copy()
-                new_item.is_archived = True
-                new_item.updated_at = self.get_timestamp()
-                updated_item = self.db.update(new_item, item_id)
-                self.data[i] = updated_item
-                self.save(background_task)
-                return updated_item
-        return None
+        item = self.data.get(item_id)
+        if item is None:
+            return None
+        new_item = item.model_copy()
+        new_item.is_archived = True
+        new_item.updated_at = self.get_timestamp()
+        updated_item = self.db.update(new_item, item_id)
+        self.data.replace(item_id, updated_item)
+        self.save(background_task)
+        return updated_item
 
     def unarchive_item(self, item_id: str, background_task=True) -> Item | None:
-        for i in range(len(self.data)):
-            if self.data[i].uid == item_id:
-                new_item = self.data[i].model_copy()
-                new_item.is_archived = False
-                new_item.updated_at = self.get_timestamp()
-                updated_item = self.db.update(new_item, item_id)
-                self.data[i] = updated_item
-                self.save(background_task)
-                return updated_item
-        return None
+        item = self.data.get(item_id)
+        if item is None:
+            return None
+        new_item = item.model_copy()
+        new_item.is_archived = False
+        new_item.updated_at = self.get_timestamp()
+        updated_item = self.db.update(new_item, item_id)
+        self.data.replace(item_id, updated_item)
+        self.save(background_task)
+        return updated_item
 
     def save(self, background_task=True):  # pragma: no cover:
         if not self.is_debug:
 
             def call_v1_save_method():
                 data_provider.fetch_item_pool().save(
-                    [item.model_dump() for item in self.data]
+                    [item.model_dump() for item in self.data.values()]
                 )
 
+            writer = write_behind_service.fetch_writer(
+                Item.table_name(), call_v1_save_method
+            )
             if background_task:
-                threading.Thread(target=call_v1_save_method).start()
+                writer.mark_dirty()
             else:
-                call_v1_save_method()
+                writer.save_now()
 
     def load(self):
         self.data = self.get_all_items()
@@ -1,20 +1,22 @@
-import threading
 from typing import List, Type
 from services.v2 import data_provider_v2
 from models.v2.item_type import ItemType
 from services.v2.base_service import Base
+from services.v2 import write_behind_service
 from services.v2.database_service import DatabaseService
 from services.v1 import data_provider
 
 
 class ItemTypeService(Base):
+    model = ItemType
+
     def __init__(self, db: Type[DatabaseService] = None, is_debug: bool = False):
         self.is_debug = is_debug
         if db is not None:
             self.db = db
         else:
             self.db = data_provider_v2.fetch_database()
-        self.load()
+        self.hydrate()
 
     def get_all_item_types(self) -> List[ItemType]:
         return self.db.get_all(ItemType)
@@ -27,16 +29,16 @@ class ItemTypeService(Base):
         return item_types
 
     def get_item_type(self, item_type_id: int) -> ItemType | None:
-        for item_type in self.data:
-            if item_type.id == item_type_id:
-                return item_type
+        item_type = self.data.get(item_type_id)
+        if item_type is not None:
+            return item_type
         return self.db.get(ItemType, item_type_id)
 
     def add_item_type(self, item_type: ItemType, background_task=True) -> ItemType:
         item_type.created_at = self.get_timestamp()
         item_type.updated_at = self.get_timestamp()
         added_item_type = self.db.insert(item_type)
-        self.data.append(added_item_type)
+        self.data.add(added_item_type)
         self.save(background_task)
         return added_item_type
 
@@ -47,57 +49,61 @@ class ItemTypeService(Base):
             return None
 
         item_type.updated_at = self.get_timestamp()
-        for i in range(len(self.data)):
-            if self.data[i].id == item_type_id:
-                updae_item_type = self.db.update(item_type, item_type_id)
-                self.data[i] = updae_item_type
-                self.save(background_task)
-                return updae_item_type
-        return None
+        existing_item_type = self.data.get(item_type_id)
+        if existing_item_type is None:
+            return None
+        updae_item_type = self.db.update(item_type, item_type_id)
+        self.data.replace(item_type_id, updae_item_type)
+        self.save(background_task)
+        return updae_item_type
 
     def is_item_type_archived(self, item_type_id: int) -> bool:
-        for item_type in self.data:
-            if item_type.id == item_type_id:
-                return item_type.is_archived
+        item_type = self.data.get(item_type_id)
+        if item_type is not None:
+            return item_type.is_archived
         return None
 
     def archive_item_type(
         self, item_type_id: int, background_task=True
     ) -> ItemType | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == item_type_id:
-                self.data[i].is_archived = True
-                self.data[i].updated_at = self.get_timestamp()
-                updated_item_type = self.db.update(self.data[i], item_type_id)
-                self.data[i] = updated_item_type
-                self.save(background_task)
-                return updated_item_type
-        return None
+        item_type = self.data.get(item_type_id)
+        if item_type is None:
+            return None
+        item_type = item_type.model_copy(
+            update={"is_archived": True, "updated_at": self.get_timestamp()}
+        )
+        updated_item_type = self.db.update(item_type, item_type_id)
+        self.data.replace(item_type_id, updated_item_type)
+        self.save(background_task)
+        return updated_item_type
 
     def unarchive_item_type(
         self, item_type_id: int, background_task=True
     ) -> ItemType | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == item_type_id:
-                self.data[i].is_archived = False
-                updated_item_type = self.db.update(self.data[i], item_type_id)
-                self.data[i] = updated_item_type
-                self.save(background_task)
-                return updated_item_type
-        return None
+        item_type = self.data.get(item_type_id)
+        if item_type is None:
+            return None
+        item_type = item_type.model_copy(update={"is_archived": False})
+        updated_item_type = self.db.update(item_type, item_type_id)
+        self.data.replace(item_type_id, updated_item_type)
+        self.save(background_task)
+        return updated_item_type
 
     def save(self, background_task=True):  # pragma: no cover:
         if not self.is_debug:
 
             def call_v1_save_method():
                 data_provider.fetch_item_type_pool().save(
-                    [item.model_dump() for item in self.data]
+                    [item.model_dump() for item in self.data.values()]
                 )
 
+            writer = write_behind_service.fetch_writer(
+                ItemType.table_name(), call_v1_save_method
+            )
             if background_task:
-                threading.Thread(target=call_v1_save_method).start()
+                writer.mark_dirty()
             else:
-                call_v1_save_method()
+                writer.save_now()
 
     def load(self):
         self.data = self.get_all_item_types()
@@ -1,20 +1,23 @@
-import threading
 from services.v2 import data_provider_v2
 from models.v2.location import Location
 from typing import List, Type
 from services.v2.base_service import Base
+from services.v2 import write_behind_service
 from services.v2.database_service import DatabaseService
 from services.v1 import data_provider
 
 
 class LocationService(Base):
+    model = Location
+    indexes = ("warehouse_id",)
+
     def __init__(self, db: Type[DatabaseService] = None, is_debug: bool = False):
         self.is_debug = is_debug
         if db is not None:
             self.db = db
         else:
             self.db = data_provider_v2.fetch_database()
-        self.load()
+        self.hydrate()
 
     def get_all_locations(self) -> List[Location]:
         return self.db.get_all(Location)
@@ -27,17 +30,13 @@ class LocationService(Base):
         return locations
 
     def get_location(self, location_id: int) -> Location | None:
-        for location in self.data:
-            if location.id == location_id:
-                return location
+        location = self.data.get(location_id)
+        if location is not None:
+            return location
         return self.db.get(Location, location_id)
 
     def get_locations_in_warehouse(self, warehouse_id: int) -> List[Location]:
-        warehouse_locations = []
-        for location in self.data:
-            if location.warehouse_id == warehouse_id:
-                warehouse_locations.append(location)
-        return warehouse_locations
+        return self.data.find("warehouse_id", warehouse_id)
 
     def add_location(self, location: Location, background_task=True) -> Location:
         if self.has_location_archived_entities(location):
@@ -45,7 +44,7 @@ class LocationService(Base):
         location.created_at = self.get_timestamp()
         location.updated_at = self.get_timestamp()
         added_location = self.db.insert(location)
-        self.data.append(added_location)
+        self.data.add(added_location)
         self.save(background_task)
         return added_location
 
@@ -60,63 +59,68 @@ class LocationService(Base):
             return None
 
         location.updated_at = self.get_timestamp()
-        for i in range(len(self.data)):
-            if self.data[i].id == location_id:
-                location.id = location_id
-                if location.created_at is None:
-                    location.created_at = self.data[i].created_at
-                updated_location = self.db.update(location, location_id)
-                self.data[i] = updated_location
-                self.save(background_task)
-                return updated_location
-        return None
+        existing_location = self.data.get(location_id)
+        if existing_location is None:
+            return None
+        location.id = location_id
+        if location.created_at is None:
+            location.created_at = existing_location.created_at
+        updated_location = self.db.update(location, location_id)
+        self.data.replace(location_id, updated_location)
+        self.save(background_task)
+        return updated_location
 
     def archive_location(
         self, location_id: int, background_task=True
     ) -> Location | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == location_id:
-                self.data[i].updated_at = self.get_timestamp()
-                self.data[i].is_archived = True
-                updated_location = self.db.update(self.data[i], location_id)
-                self.data[i] = updated_location
-                self.save(background_task)
-                return updated_location
-        return None
+        location = self.data.get(location_id)
+        if location is None:
+            return None
+        location = location.model_copy(
+            update={"is_archived": True, "updated_at": self.get_timestamp()}
+        )
+        updated_location = self.db.update(location, location_id)
+        self.data.replace(location_id, updated_location)
+        self.save(background_task)
+        return updated_location
 
     def unarchive_location(
         self, location_id: int, background_task=True
     ) -> Location | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == location_id:
-                self.data[i].updated_at = self.get_timestamp()
-                self.data[i].is_archived = False
-                updated_location = self.db.update(self.data[i], location_id)
-                self.data[i] = updated_location
-                self.save(background_task)
-                return updated_location
-        return None
+        location = self.data.get(location_id)
+        if location is None:
+            return None
+        location = location.model_copy(
+            update={"is_archived": False, "updated_at": self.get_timestamp()}
+        )
+        updated_location = self.db.update(location, location_id)
+        self.data.replace(location_id, updated_location)
+        self.save(background_task)
+        return updated_location
 
     def save(self, background_task=True):  # pragma: no cover:
         if not self.is_debug:
 
             def call_v1_save_method():
                 data_provider.fetch_location_pool().save(
-                    [item.model_dump() for item in self.data]
+                    [item.model_dump() for item in self.data.values()]
                 )
 
+            writer = write_behind_service.fetch_writer(
+                Location.table_name(), call_v1_save_method
+            )
             if background_task:
-                threading.Thread(target=call_v1_save_method).start()
+                writer.mark_dirty()
             else:
-                call_v1_save_method()
+                writer.save_now()
 
     def load(self):
         self.data = self.get_all_locations()
 
     def is_location_archived(self, location_id: int) -> bool | None:
-        for location in self.data:
-            if location.id == location_id:
-                return location.is_archived
+        location = self.data.get(location_id)
+        if location is not None:
+            return location.is_archived
         return None
 
     def has_location_archived_entities(
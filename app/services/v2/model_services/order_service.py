@@ -1,15 +1,18 @@
-import threading
 from typing import List, Type
 from services.v2 import data_provider_v2
 from models.v2.order import Order
 from services.v2.base_service import Base
+from services.v2 import audit_service, write_behind_service
 from models.v2.ItemInObject import ItemInObject
 from utils.globals import *
-from services.v2.database_service import DatabaseService
+from services.v2.database_service import DatabaseService, attach, build_models
 from services.v1 import data_provider
 
 
 class OrderService(Base):
+    model = Order
+    indexes = ("shipment_id", "ship_to", "bill_to", "warehouse_id", "order_status")
+
     def __init__(
         self,
         db: Type[DatabaseService] = None,
@@ -26,10 +29,19 @@ class OrderService(Base):
             self.data_provider = data_provider
         else:
             self.data_provider = data_provider_v2
-        self.load()
+        self.hydrate()
 
     def get_all_orders(self) -> List[Order]:
         all_orders = self.db.get_all(Order)
+        self.attach_items(all_orders)
+        return all_orders
+
+    def fetch_entities(self, keys: List[int]) -> List[Order]:
+        orders = super().fetch_entities(keys)
+        self.attach_items(orders)
+        return orders
+
+    def attach_items(self, all_orders: List[Order]):
         order_ids = [order.id for order in all_orders]
 
         with self.db.get_connection() as conn:
@@ -37,16 +49,18 @@ class OrderService(Base):
             cursor = conn.execute(query)
             all_order_items = cursor.fetchall()
 
+        items = build_models(
+            ItemInObject,
+            [{"item_id": row[0], "amount": row[1]} for row in all_order_items],
+        )
         order_items_map = {}
-        for row in all_order_items:
+        for row, item in zip(all_order_items, items):
             if row[2] not in order_items_map:
                 order_items_map[row[2]] = []
-            order_items_map[row[2]].append(ItemInObject(item_id=row[0], amount=row[1]))
+            order_items_map[row[2]].append(item)
 
         for order in all_orders:
-            order.items = order_items_map.get(order.id, [])
-
-        return all_orders
+            attach(order, "items", order_items_map.get(order.id, []))
 
     def get_orders(self) -> List[Order]:
         orders = []
@@ -56,9 +70,9 @@ class OrderService(Base):
         return orders
 
     def get_order(self, order_id: int) -> Order | None:
-        for order in self.data:
-            if order.id == order_id:
-                return order
+        order = self.data.get(order_id)
+        if order is not None:
+            return order
 
         with self.db.get_connection() as conn:
             query = f"SELECT * FROM {Order.table_name()} WHERE id = ?"
@@ -78,24 +92,16 @@ class OrderService(Base):
         return None
 
     def get_items_in_order(self, order_id: int) -> List[ItemInObject]:
-        for order in self.data:
-            if order.id == order_id:
-                return order.items
+        order = self.data.get(order_id)
+        if order is not None:
+            return order.items
         return None
 
     def get_orders_in_shipment(self, shipment_id: int) -> List[Order]:
-        result = []
-        for order in self.data:
-            if order.shipment_id == shipment_id:
-                result.append(order)
-        return result
+        return self.data.find("shipment_id", shipment_id)
 
     def get_orders_for_client(self, client_id: str) -> List[Order]:
-        result = []
-        for order in self.data:
-            if order.ship_to == client_id or order.bill_to == client_id:
-                result.append(order)
-        return result
+        return self.data.find_any(("ship_to", "bill_to"), client_id)
 
     def add_order(self, order: Order, background_task=True) -> Order:
         if self.has_order_archived_entities(order):
@@ -124,19 +130,42 @@ class OrderService(Base):
             order.id = order_id
 
             if order.items:
-                for order_items in order.items:
-                    items_insert_sql = f"""
-                    INSERT INTO {order_items_table} (order_id, item_id, amount)
-                    VALUES (?, ?, ?)
-                    """
-                    conn.execute(
-                        items_insert_sql,
-                        (order_id, order_items.item_id, order_items.amount),
-                    )
-        self.data.append(order)
+                self.insert_order_items(order_id, order.items)
+        self.data.add(order)
+        audit_service.record_change("create", None, order)
         self.save(background_task)
         return order
 
+    def add_orders(
+        self, orders: List[Order], background_task=True
+    ) -> List[Order | None]:
+        return self.add_batch(
+            orders,
+            self.has_order_archived_entities,
+            self.insert_orders,
+            background_task,
+        )
+
+    def insert_orders(self, orders: List[Order]) -> List[Order]:
+        added = self.db.insert_many(orders)
+        self.db.insert_rows(
+            order_items_table,
+            ("order_id", "item_id", "amount"),
+            [
+                (order.id, item.item_id, item.amount)
+                for order in added
+                for item in order.items or []
+            ],
+        )
+        return added
+
+    def update_orders(
+        self, orders: List[Order], background_task=True
+    ) -> List[Order | None]:
+        return self.apply_batch(
+            lambda order: self.update_order(order.id, order, background_task), orders
+        )
+
     def update_order(
         self, order_id: int, order: Order, background_task=True
     ) -> Order | None:
@@ -173,22 +202,21 @@ class OrderService(Base):
                 conn.execute(delete_items_sql, (order_id,))
 
                 if order.items:
-                    for order_items in order.items:
-                        items_insert_sql = f"""
-                        INSERT INTO {order_items_table} (order_id, item_id, amount)
-                        VALUES (?, ?, ?)
-                        """
-                        conn.execute(
-                            items_insert_sql,
-                            (order_id, order_items.item_id, order_items.amount),
-                        )
-
-        for i in range(len(self.data)):
-            if self.data[i].id == order_id:
-                self.data[i] = order
+                    self.insert_order_items(order_id, order.items)
+
+        previous_order = self.data.get(order_id)
+        self.data.replace(order_id, order)
+        audit_service.record_change("update", previous_order, order)
         self.save(background_task)
         return order
 
+    def insert_order_items(self, order_id: int, items: List[ItemInObject]) -> int:
+        return self.db.insert_rows(
+            order_items_table,
+            ("order_id", "item_id", "amount"),
+            [(order_id, item.item_id, item.amount) for item in items],
+        )
+
     def update_items_in_order(
         self, order_id: int, items: List[ItemInObject]
     ) -> Order | None:
@@ -196,6 +224,7 @@ class OrderService(Base):
         if order.is_archived:
             return None
 
+        order = order.model_copy()
         order.items = []
         for item in items:
             if not self.data_provider.fetch_item_pool().is_item_archived(item.item_id):
@@ -210,8 +239,9 @@ class OrderService(Base):
         for packed_order in packed_orders:
             if packed_order not in orders:
                 if not packed_order.is_archived:
-                    packed_order.shipment_id = -1
-                    packed_order.order_status = "Scheduled"
+                    packed_order = packed_order.model_copy(
+                        update={"shipment_id": -1, "order_status": "Scheduled"}
+                    )
                     self.update_order(packed_order.id, packed_order)
 
         for order in orders:
@@ -222,75 +252,82 @@ class OrderService(Base):
         return updated_orders
 
     def archive_order(self, order_id: int, background_task=True) -> Order | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == order_id:
-                self.data[i].updated_at = self.get_timestamp()
-                self.data[i].is_archived = True
+        order = self.data.get(order_id)
+        if order is None:
+            return None
+        previous_order = order
+        order = order.model_copy(
+            update={"is_archived": True, "updated_at": self.get_timestamp()}
+        )
 
-                fields = {}
-                for key, value in vars(self.data[i]).items():
-                    if key != "id" and key != "items":
-                        fields[key] = value
+        fields = {}
+        for key, value in vars(order).items():
+            if key != "id" and key != "items":
+                fields[key] = value
 
-                columns = ", ".join(f"{key} = ?" for key in fields)
-                values = tuple(fields.values())
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        values = tuple(fields.values())
 
-                update_sql = (
-                    f"UPDATE {self.data[i].table_name()} SET {columns} WHERE id = ?"
-                )
-                values += (order_id,)
+        update_sql = f"UPDATE {order.table_name()} SET {columns} WHERE id = ?"
+        values += (order_id,)
 
-                with self.db.get_connection() as conn:
-                    conn.execute(update_sql, values)
-                self.save(background_task)
-                return self.data[i]
-        return None
+        with self.db.get_connection() as conn:
+            conn.execute(update_sql, values)
+        self.data.replace(order_id, order)
+        audit_service.record_change("archive", previous_order, order)
+        self.save(background_task)
+        return order
 
     def unarchive_order(self, order_id: int, background_task=True) -> Order | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == order_id:
-                self.data[i].updated_at = self.get_timestamp()
-                self.data[i].is_archived = False
+        order = self.data.get(order_id)
+        if order is None:
+            return None
+        previous_order = order
+        order = order.model_copy(
+            update={"is_archived": False, "updated_at": self.get_timestamp()}
+        )
 
-                fields = {}
-                for key, value in vars(self.data[i]).items():
-                    if key != "id" and key != "items":
-                        fields[key] = value
+        fields = {}
+        for key, value in vars(order).items():
+            if key != "id" and key != "items":
+                fields[key] = value
 
-                columns = ", ".join(f"{key} = ?" for key in fields)
-                values = tuple(fields.values())
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        values = tuple(fields.values())
 
-                update_sql = (
-                    f"UPDATE {self.data[i].table_name()} SET {columns} WHERE id = ?"
-                )
-                values += (order_id,)
+        update_sql = f"UPDATE {order.table_name()} SET {columns} WHERE id = ?"
+        values += (order_id,)
 
-                with self.db.get_connection() as conn:
-                    conn.execute(update_sql, values)
-                self.save(background_task)
-                return self.data[i]
-        return None
+        with self.db.get_connection() as conn:
+            conn.execute(update_sql, values)
+        self.data.replace(order_id, order)
+        audit_service.record_change("unarchive", previous_order, order)
+        self.save(background_task)
+        return order
 
     def save(self, background_task=True):  # pragma: no cover:
         if not self.is_debug:
 
             def call_v1_save_method():
                 data_provider.fetch_order_pool().save(
-                    [order.model_dump() for order in self.data]
+                    [order.model_dump() for order in self.data.values()]
                 )
 
+            writer = write_behind_service.fetch_writer(
+                Order.table_name(), call_v1_save_method
+            )
             if background_task:
-                threading.Thread(target=call_v1_save_method).start()
+                writer.mark_dirty()
             else:
-                call_v1_save_method()
+                writer.save_now()
 
     def load(self):
         self.data = self.get_all_orders()
 
     def is_order_archived(self, order_id: int) -> bool:
-        for order in self.data:
-            if order.id == order_id:
-                return order.is_archived
+        order = self.data.get(order_id)
+        if order is not None:
+            return order.is_archived
         return None
 
     def has_order_archived_entities(
@@ -374,7 +411,7 @@ class OrderService(Base):
                 can_change_to_Transit = False
                 break
         if can_change_to_Transit:
-            order.order_status = "Shipped"
+            order = order.model_copy(update={"order_status": "Shipped"})
             return self.update_order(order_id, order)
         return None
 
@@ -389,6 +426,6 @@ class OrderService(Base):
                 can_change_to_delivered = False
                 break
         if can_change_to_delivered:
-            order.order_status = "Delivered"
+            order = order.model_copy(update={"order_status": "Delivered"})
             return self.update_order(order_id, order)
         return None
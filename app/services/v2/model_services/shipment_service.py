@@ -1,15 +1,18 @@
-import threading
 from typing import List, Type
 from models.v2.shipment import Shipment
 from models.v2.ItemInObject import ItemInObject
 from services.v2.base_service import Base
-from services.v2.database_service import DatabaseService
+from services.v2 import audit_service, write_behind_service
+from services.v2.database_service import DatabaseService, attach, build_models
 from services.v2 import data_provider_v2
 from utils.globals import *
 from services.v1 import data_provider
 
 
 class ShipmentService(Base):
+    model = Shipment
+    indexes = ("order_id", "shipment_status")
+
     def __init__(
         self,
         data_provider=None,
@@ -22,10 +25,19 @@ class ShipmentService(Base):
             self.data_provider = data_provider_v2
 
         self.db = self.data_provider.fetch_database()
-        self.load()
+        self.hydrate()
 
     def get_all_shipments(self) -> List[Shipment]:
         all_shipments = self.db.get_all(Shipment)
+        self.attach_items(all_shipments)
+        return all_shipments
+
+    def fetch_entities(self, keys: List[int]) -> List[Shipment]:
+        shipments = super().fetch_entities(keys)
+        self.attach_items(shipments)
+        return shipments
+
+    def attach_items(self, all_shipments: List[Shipment]):
         shipment_ids = [shipment.id for shipment in all_shipments]
 
         with self.db.get_connection() as conn:
@@ -33,17 +45,17 @@ class ShipmentService(Base):
             cursor = conn.execute(query)
             all_shipment_items = cursor.fetchall()
 
+        items = build_models(
+            ItemInObject,
+            [{"item_id": row[0], "amount": row[1]} for row in all_shipment_items],
+        )
         shipment_items_map = {}
-        for row in all_shipment_items:
+        for row, item in zip(all_shipment_items, items):
             if row[2] not in shipment_items_map:
                 shipment_items_map[row[2]] = []
-            shipment_items_map[row[2]].append(
-                ItemInObject(item_id=row[0], amount=row[1])
-            )
-        for i, shipment in enumerate(all_shipments):
-            all_shipments[i].items = shipment_items_map.get(shipment.id)
-
-        return all_shipments
+            shipment_items_map[row[2]].append(item)
+        for shipment in all_shipments:
+            attach(shipment, "items", shipment_items_map.get(shipment.id))
 
     def get_shipments(self) -> List[Shipment]:
         all_shipments = []
@@ -53,9 +65,9 @@ class ShipmentService(Base):
         return all_shipments
 
     def get_shipment(self, shipment_id: int) -> Shipment | None:
-        for shipment in self.data:
-            if shipment.id == shipment_id:
-                return shipment
+        shipment = self.data.get(shipment_id)
+        if shipment is not None:
+            return shipment
 
         with self.db.get_connection() as conn:
             query = f"SELECT * FROM {Shipment.table_name()} WHERE id = ?"
@@ -105,19 +117,52 @@ class ShipmentService(Base):
             shipment.id = shipment_id
 
             if shipment.items:
-                for shipment_items in shipment.items:
-                    items_insert_sql = f"""
-                    INSERT INTO {shipment_items_table} (shipment_id, item_uid, amount)
-                    VALUES (?, ?, ?)
-                    """
-                    conn.execute(
-                        items_insert_sql,
-                        (shipment_id, shipment_items.item_id, shipment_items.amount),
-                    )
-        self.data.append(shipment)
+                self.insert_shipment_items(shipment_id, shipment.items)
+        self.data.add(shipment)
+        audit_service.record_change("create", None, shipment)
         self.save(background_task)
         return shipment
 
+    def insert_shipment_items(self, shipment_id: int, items: List[ItemInObject]) -> int:
+        return self.db.insert_rows(
+            shipment_items_table,
+            ("shipment_id", "item_uid", "amount"),
+            [(shipment_id, item.item_id, item.amount) for item in items],
+        )
+
+    def add_shipments(
+        self, shipments: List[Shipment], background_task=True
+    ) -> List[Shipment | None]:
+        return self.add_batch(
+            shipments,
+            self.has_shipment_archived_entities,
+            self.insert_shipments,
+            background_task,
+        )
+
+    def insert_shipments(self, shipments: List[Shipment]) -> List[Shipment]:
+        added = self.db.insert_many(shipments)
+        self.db.insert_rows(
+            shipment_items_table,
+            ("shipment_id", "item_uid", "amount"),
+            [
+                (shipment.id, item.item_id, item.amount)
+                for shipment in added
+                for item in shipment.items or []
+            ],
+        )
+        return added
+
+    def update_shipments(
+        self, shipments: List[Shipment], background_task=True
+    ) -> List[Shipment | None]:
+        return self.apply_batch(
+            lambda shipment: self.update_shipment(
+                shipment.id, shipment, background_task
+            ),
+            shipments,
+        )
+
     def update_shipment(
         self, shipment_id: int, shipment: Shipment, background_task=True
     ) -> Shipment:
@@ -172,14 +217,14 @@ class ShipmentService(Base):
                             (shipment_id, current_item_id),
                         )
 
-        for i in range(len(self.data)):
-            if self.data[i].id == shipment_id:
-                shipment.id = shipment_id
-                if shipment.created_at is None:
-                    shipment.created_at = self.data[i].created_at
-                self.data[i] = shipment
-                self.save(background_task)
-                break
+        existing_shipment = self.data.get(shipment_id)
+        if existing_shipment is not None:
+            shipment.id = shipment_id
+            if shipment.created_at is None:
+                shipment.created_at = existing_shipment.created_at
+            self.data.replace(shipment_id, shipment)
+            audit_service.record_change("update", existing_shipment, shipment)
+            self.save(background_task)
         return shipment
 
     def update_items_in_shipment(
@@ -199,107 +244,110 @@ class ShipmentService(Base):
                 ):
                     items_to_add.append(item)
             if len(items_to_add) > 0:
-                self.update_inventory_for_items(shipment.items, items_to_add)
                 updated_shipment.items = items_to_add
-                return self.update_shipment(shipment_id, updated_shipment)
+                try:
+                    with self.db.get_connection():
+                        result = self.update_shipment(shipment_id, updated_shipment)
+                        if result is not None:
+                            self.update_inventory_for_items(
+                                shipment.items, items_to_add
+                            )
+                        return result
+                except Exception:
+                    self.load()
+                    raise
         return None
 
     def update_inventory_for_shipment(self, item_id, amount_change):
-        inventories = (
-            self.data_provider.fetch_inventory_pool().get_inventories_for_item(item_id)
+        self.data_provider.fetch_inventory_pool().adjust_ordered(
+            {item_id: amount_change}
         )
-        max_inventory = max(inventories, key=lambda z: z.total_ordered, default=None)
-        if max_inventory:
-            if max_inventory.total_ordered + amount_change >= 0:
-                max_inventory.total_ordered += amount_change
-                max_inventory.total_expected = (
-                    max_inventory.total_on_hand + max_inventory.total_ordered
-                )
-                self.data_provider.fetch_inventory_pool().update_inventory(
-                    max_inventory.id, max_inventory
-                )
 
     def update_inventory_for_items(
         self, current_items: List[ItemInObject], new_items: List[ItemInObject]
     ):
-        new_items_dict = {item.item_id: item for item in new_items}
+        """Moves the amount on order by the difference between the item lists.
+
+        The changes are added up per item and written in one batch.
+        """
+        changes = {}
         for current in current_items:
-            item_id = current.item_id
-            current_amount = current.amount
-            if item_id in new_items_dict:
-                new_amount = new_items_dict[item_id].amount
-                amount_change = new_amount - current_amount
-                if amount_change != 0:
-                    self.update_inventory_for_shipment(item_id, amount_change)
-            else:
-                self.update_inventory_for_shipment(item_id, -current_amount)
-        current_item_ids = {current.item_id for current in current_items}
+            changes[current.item_id] = changes.get(current.item_id, 0) - current.amount
         for item in new_items:
-            if item.item_id not in current_item_ids:
-                self.update_inventory_for_shipment(item.item_id, item.amount)
+            changes[item.item_id] = changes.get(item.item_id, 0) + item.amount
+        self.data_provider.fetch_inventory_pool().adjust_ordered(changes)
 
     def archive_shipment(
         self, shipment_id: int, background_task=True
     ) -> Shipment | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == shipment_id:
-                self.data[i].is_archived = True
-                table_name = self.data[i].table_name()
-                self.data[i].updated_at = self.get_timestamp()
-
-                fields = {}
-                for key, value in vars(self.data[i]).items():
-                    if key != "id" and key != "items":
-                        fields[key] = value
-
-                columns = ", ".join(f"{key} = ?" for key in fields)
-                values = tuple(fields.values())
-
-                update_sql = f"UPDATE {table_name} SET {columns} WHERE id = ?"
-                with self.db.get_connection() as conn:
-                    conn.execute(update_sql, values + (shipment_id,))
-
-                self.save(background_task)
-                return self.data[i]
-        return None
+        shipment = self.data.get(shipment_id)
+        if shipment is None:
+            return None
+        previous_shipment = shipment
+        shipment = shipment.model_copy(
+            update={"is_archived": True, "updated_at": self.get_timestamp()}
+        )
+        table_name = shipment.table_name()
+
+        fields = {}
+        for key, value in vars(shipment).items():
+            if key != "id" and key != "items":
+                fields[key] = value
+
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        values = tuple(fields.values())
+
+        update_sql = f"UPDATE {table_name} SET {columns} WHERE id = ?"
+        with self.db.get_connection() as conn:
+            conn.execute(update_sql, values + (shipment_id,))
+        self.data.replace(shipment_id, shipment)
+        audit_service.record_change("archive", previous_shipment, shipment)
+        self.save(background_task)
+        return shipment
 
     def unarchive_shipment(
         self, shipment_id: int, background_task=True
     ) -> Shipment | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == shipment_id:
-                self.data[i].is_archived = False
-                table_name = self.data[i].table_name()
-                self.data[i].updated_at = self.get_timestamp()
-
-                fields = {}
-                for key, value in vars(self.data[i]).items():
-                    if key != "id" and key != "items":
-                        fields[key] = value
-
-                columns = ", ".join(f"{key} = ?" for key in fields)
-                values = tuple(fields.values())
-
-                update_sql = f"UPDATE {table_name} SET {columns} WHERE id = ?"
-                with self.db.get_connection() as conn:
-                    conn.execute(update_sql, values + (shipment_id,))
-
-                self.save(background_task)
-                return self.data[i]
-        return None
+        shipment = self.data.get(shipment_id)
+        if shipment is None:
+            return None
+        previous_shipment = shipment
+        shipment = shipment.model_copy(
+            update={"is_archived": False, "updated_at": self.get_timestamp()}
+        )
+        table_name = shipment.table_name()
+
+        fields = {}
+        for key, value in vars(shipment).items():
+            if key != "id" and key != "items":
+                fields[key] = value
+
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        values = tuple(fields.values())
+
+        update_sql = f"UPDATE {table_name} SET {columns} WHERE id = ?"
+        with self.db.get_connection() as conn:
+            conn.execute(update_sql, values + (shipment_id,))
+        self.data.replace(shipment_id, shipment)
+        audit_service.record_change("unarchive", previous_shipment, shipment)
+        self.save(background_task)
+        return shipment
 
     def save(self, background_task=True):  # pragma: no cover:
         if not self.is_debug:
 
             def call_v1_save_method():
                 data_provider.fetch_shipment_pool().save(
-                    [shipment.model_dump() for shipment in self.data]
+                    [shipment.model_dump() for shipment in self.data.values()]
                 )
 
+            writer = write_behind_service.fetch_writer(
+                Shipment.table_name(), call_v1_save_method
+            )
             if background_task:
-                threading.Thread(target=call_v1_save_method).start()
+                writer.mark_dirty()
             else:
-                call_v1_save_method()
+                writer.save_now()
 
     def load(self):
         self.data = self.get_all_shipments()
@@ -346,34 +394,41 @@ class ShipmentService(Base):
         return has_archived_entities
 
     def is_shipment_archived(self, shipment_id: int) -> bool | None:
-        for shipment in self.data:
-            if shipment.id == shipment_id:
-                return shipment.is_archived
+        shipment = self.data.get(shipment_id)
+        if shipment is not None:
+            return shipment.is_archived
         return None
 
     def get_shipments_for_order(self, order_id: int) -> List[Shipment]:
-        shipments = []
-        for shipment in self.data:
-            if shipment.order_id == order_id:
-                shipments.append(shipment)
-        return shipments
+        return self.data.find("order_id", order_id)
 
     def commit_shipment(self, shipment_id: int) -> Shipment | None:
         if self.is_shipment_archived(shipment_id):
             return None
 
-        for i in range(len(self.data)):
-            if self.data[i].id == shipment_id:
-                if self.data[i].shipment_status == "Pending":
-                    self.data[i].shipment_status = "Transit"
-                    self.data_provider.fetch_order_pool().check_if_order_transit(
-                        self.data[i].order_id
-                    )
-                    return self.update_shipment(shipment_id, self.data[i])
-                elif self.data[i].shipment_status == "Transit":
-                    self.data[i].shipment_status = "Delivered"
-                    self.data_provider.fetch_order_pool().check_if_order_delivered(
-                        self.data[i].order_id
-                    )
-                    return self.update_shipment(shipment_id, self.data[i])
-        return None
+        shipment = self.data.get(shipment_id)
+        if shipment is None:
+            return None
+        order_pool = self.data_provider.fetch_order_pool()
+        if shipment.shipment_status == "Pending":
+            shipment_status, check_order = "Transit", order_pool.check_if_order_transit
+        elif shipment.shipment_status == "Transit":
+            shipment_status, check_order = (
+                "Delivered",
+                order_pool.check_if_order_delivered,
+            )
+        else:
+            return None
+
+        try:
+            with self.db.get_connection():
+                updated_shipment = self.update_shipment(
+                    shipment_id,
+                    shipment.model_copy(update={"shipment_status": shipment_status}),
+                )
+                check_order(shipment.order_id)
+        except Exception:
+            self.load()
+            order_pool.load()
+            raise
+        return updated_shipment
@@ -1,20 +1,22 @@
-import threading
 from services.v2 import data_provider_v2
 from models.v2.supplier import Supplier
 from typing import List, Type
 from services.v2.base_service import Base
+from services.v2 import write_behind_service
 from services.v2.database_service import DatabaseService
 from services.v1 import data_provider
 
 
 class SupplierService(Base):
+    model = Supplier
+
     def __init__(self, db: Type[DatabaseService] = None, is_debug: bool = False):
         self.is_debug = is_debug
         if db is not None:
             self.db = db
         else:
             self.db = data_provider_v2.fetch_database()
-        self.load()
+        self.hydrate()
 
     def get_all_suppliers(self) -> List[Supplier]:
         return self.db.get_all(Supplier)
@@ -27,16 +29,16 @@ class SupplierService(Base):
         return suppliers
 
     def get_supplier(self, supplier_id: int) -> Supplier | None:
-        for supplier in self.data:
-            if supplier.id == supplier_id:
-                return supplier
+        supplier = self.data.get(supplier_id)
+        if supplier is not None:
+            return supplier
         return self.db.get(Supplier, supplier_id)
 
     def add_supplier(self, supplier: Supplier, background_task=True) -> Supplier:
         supplier.created_at = self.get_timestamp()
         supplier.updated_at = self.get_timestamp()
         added_supplier = self.db.insert(supplier)
-        self.data.append(added_supplier)
+        self.data.add(added_supplier)
         self.save(background_task)
         return added_supplier
 
@@ -48,58 +50,63 @@ class SupplierService(Base):
 
         supplier.updated_at = self.get_timestamp()
 
-        for i in range(len(self.data)):
-            if self.data[i].id == supplier_id:
-                updated_supplier = self.db.update(supplier, supplier_id)
-                self.data[i] = updated_supplier
-                self.save(background_task)
-                return updated_supplier
-        return None
+        existing_supplier = self.data.get(supplier_id)
+        if existing_supplier is None:
+            return None
+        updated_supplier = self.db.update(supplier, supplier_id)
+        self.data.replace(supplier_id, updated_supplier)
+        self.save(background_task)
+        return updated_supplier
 
     def archive_supplier(
         self, supplier_id: int, background_task=True
     ) -> Supplier | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == supplier_id:
-                self.data[i].updated_at = self.get_timestamp()
-                self.data[i].is_archived = True
-                updated_supplier = self.db.update(self.data[i], supplier_id)
-                self.data[i] = updated_supplier
-                self.save(background_task)
-                return updated_supplier
-        return None
+        supplier = self.data.get(supplier_id)
+        if supplier is None:
+            return None
+        supplier = supplier.model_copy(
+            update={"is_archived": True, "updated_at": self.get_timestamp()}
+        )
+        updated_supplier = self.db.update(supplier, supplier_id)
+        self.data.replace(supplier_id, updated_supplier)
+        self.save(background_task)
+        return updated_supplier
 
     def unarchive_supplier(
         self, supplier_id: int, background_task=True
     ) -> Supplier | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == supplier_id:
-                self.data[i].updated_at = self.get_timestamp()
-                self.data[i].is_archived = False
-                updated_supplier = self.db.update(self.data[i], supplier_id)
-                self.data[i] = updated_supplier
-                self.save(background_task)
-                return updated_supplier
-        return None
+        supplier = self.data.get(supplier_id)
+        if supplier is None:
+            return None
+        supplier = supplier.model_copy(
+            update={"is_archived": False, "updated_at": self.get_timestamp()}
+        )
+        updated_supplier = self.db.update(supplier, supplier_id)
+        self.data.replace(supplier_id, updated_supplier)
+        self.save(background_task)
+        return updated_supplier
 
     def save(self, background_task=True):  # pragma: no cover:
         if not self.is_debug:
 
             def call_v1_save_method():
                 data_provider.fetch_supplier_pool().save(
-                    [shipment.model_dump() for shipment in self.data]
+                    [shipment.model_dump() for shipment in self.data.values()]
                 )
 
+            writer = write_behind_service.fetch_writer(
+                Supplier.table_name(), call_v1_save_method
+            )
             if background_task:
-                threading.Thread(target=call_v1_save_method).start()
+                writer.mark_dirty()
             else:
-                call_v1_save_method()
+                writer.save_now()
 
     def load(self):
         self.data = self.get_all_suppliers()
 
     def is_supplier_archived(self, supplier_id: int) -> bool:
-        for supplier in self.data:
-            if supplier.id == supplier_id:
-                return supplier.is_archived
+        supplier = self.data.get(supplier_id)
+        if supplier is not None:
+            return supplier.is_archived
         return None
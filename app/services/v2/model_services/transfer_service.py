@@ -1,15 +1,17 @@
-import threading
 from models.v2.transfer import Transfer
 from models.v2.ItemInObject import ItemInObject
 from typing import List, Type
 from services.v2.base_service import Base
+from services.v2 import write_behind_service
 from utils.globals import *
-from services.v2.database_service import DatabaseService
+from services.v2.database_service import DatabaseService, attach, build_models
 from services.v2 import data_provider_v2
 from services.v1 import data_provider
 
 
 class TransferService(Base):
+    model = Transfer
+
     def __init__(
         self,
         db: Type[DatabaseService] = None,
@@ -27,25 +29,35 @@ class TransferService(Base):
         else:
             self.data_provider = data_provider_v2
 
-        self.load()
+        self.hydrate()
 
     def get_all_transfers(self) -> List[Transfer]:
         all_transfers = self.db.get_all(Transfer)
+        self.attach_items(all_transfers)
+        return all_transfers
+
+    def fetch_entities(self, keys: List[int]) -> List[Transfer]:
+        transfers = super().fetch_entities(keys)
+        self.attach_items(transfers)
+        return transfers
+
+    def attach_items(self, all_transfers: List[Transfer]):
         transfer_ids = [transfer.id for transfer in all_transfers]
         with self.db.get_connection() as conn:
             query = f"SELECT item_uid, amount, transfer_id FROM {transfer_items_table} WHERE transfer_id IN ({', '.join(map(str, transfer_ids))})"
             cursor = conn.execute(query)
             all_transfer_items = cursor.fetchall()
+        items = build_models(
+            ItemInObject,
+            [{"item_id": row[0], "amount": row[1]} for row in all_transfer_items],
+        )
         transfer_items_map = {}
-        for row in all_transfer_items:
+        for row, item in zip(all_transfer_items, items):
             if row[2] not in transfer_items_map:
                 transfer_items_map[row[2]] = []
-            transfer_items_map[row[2]].append(
-                ItemInObject(item_id=row[0], amount=row[1])
-            )
+            transfer_items_map[row[2]].append(item)
         for transfer in all_transfers:
-            transfer.items = transfer_items_map.get(transfer.id, [])
-        return all_transfers
+            attach(transfer, "items", transfer_items_map.get(transfer.id, []))
 
     def get_transfers(self) -> List[Transfer]:
         transfers = []
@@ -55,9 +67,9 @@ class TransferService(Base):
         return transfers
 
     def get_transfer(self, transfer_id: int) -> Transfer | None:
-        for transfer in self.data:
-            if transfer.id == transfer_id:
-                return transfer
+        transfer = self.data.get(transfer_id)
+        if transfer is not None:
+            return transfer
         with self.db.get_connection() as conn:
             query = f"SELECT * FROM {Transfer.table_name()} WHERE id = ?"
             cursor = conn.execute(query, (transfer_id,))
@@ -76,9 +88,9 @@ class TransferService(Base):
         return None
 
     def get_items_in_transfer(self, transfer_id: int) -> List[ItemInObject]:
-        for transfer in self.data:
-            if transfer.id == transfer_id:
-                return transfer.items
+        transfer = self.data.get(transfer_id)
+        if transfer is not None:
+            return transfer.items
         return None
 
     def add_transfer(self, transfer: Transfer, background_task=True) -> Transfer:
@@ -107,20 +119,19 @@ class TransferService(Base):
             transfer.id = transfer_id
 
             if transfer.items:
-                for transfer_items in transfer.items:
-                    items_insert_sql = f"""
-                    INSERT INTO {transfer_items_table} (transfer_id, item_uid, amount)
-                    VALUES (?, ?, ?)
-                    """
-                    conn.execute(
-                        items_insert_sql,
-                        (transfer_id, transfer_items.item_id, transfer_items.amount),
-                    )
+                self.insert_transfer_items(transfer_id, transfer.items)
 
-        self.data.append(transfer)
+        self.data.add(transfer)
         self.save(background_task)
         return transfer
 
+    def insert_transfer_items(self, transfer_id: int, items: List[ItemInObject]) -> int:
+        return self.db.insert_rows(
+            transfer_items_table,
+            ("transfer_id", "item_uid", "amount"),
+            [(transfer_id, item.item_id, item.amount) for item in items],
+        )
+
     def update_transfer(
         self, transfer_id: int, transfer: Transfer, background_task=True
     ) -> Transfer:
@@ -154,127 +165,134 @@ class TransferService(Base):
                     (transfer_id,),
                 )
 
-                for transfer_items in transfer.items:
-                    items_insert_sql = f"""
-                    INSERT INTO {transfer_items_table} (transfer_id, item_uid, amount)
-                    VALUES (?, ?, ?)
-                    """
-                    conn.execute(
-                        items_insert_sql,
-                        (transfer_id, transfer_items.item_id, transfer_items.amount),
-                    )
+                self.insert_transfer_items(transfer_id, transfer.items)
 
-        for i in range(len(self.data)):
-            if self.data[i].id == transfer_id:
-                transfer.id = transfer_id
-                if transfer.created_at is None:
-                    transfer.created_at = self.data[i].created_at
-                self.data[i] = transfer
-                self.save(background_task)
-                return transfer
-        return None
+        existing_transfer = self.data.get(transfer_id)
+        if existing_transfer is None:
+            return None
+        transfer.id = transfer_id
+        if transfer.created_at is None:
+            transfer.created_at = existing_transfer.created_at
+        self.data.replace(transfer_id, transfer)
+        self.save(background_task)
+        return transfer
 
     def commit_transfer(self, transfer: Transfer, background_task=True):
+        """Processes ``transfer`` and moves its stock in one transaction.
+
+        The stock changes of all lines are added up per inventory first and
+        written together with the new transfer status, so a failure leaves
+        neither the transfer nor any inventory half committed.
+        """
         if transfer.is_archived:
             return None
 
-        transfer_items = self.get_items_in_transfer(transfer.id)
-
-        for item in transfer_items:
-            inventories = (
-                self.data_provider.fetch_inventory_pool().get_inventories_for_item(
-                    item.item_id
+        inventory_pool = self.data_provider.fetch_inventory_pool()
+        changes = {}
+        for item in self.get_items_in_transfer(transfer.id) or []:
+            for inventory in inventory_pool.get_inventories_for_item(item.item_id):
+                if transfer.transfer_from in inventory.locations:
+                    changes[inventory.id] = changes.get(inventory.id, 0) - item.amount
+                elif transfer.transfer_to in inventory.locations:
+                    changes[inventory.id] = changes.get(inventory.id, 0) + item.amount
+
+        committed_transfer = transfer.model_copy(
+            update={"transfer_status": "Processed", "updated_at": self.get_timestamp()}
+        )
+        try:
+            with self.db.get_connection() as conn:
+                conn.execute(
+                    f"UPDATE {Transfer.table_name()} SET transfer_status = ?, "
+                    "updated_at = ? WHERE id = ?",
+                    (
+                        committed_transfer.transfer_status,
+                        committed_transfer.updated_at,
+                        transfer.id,
+                    ),
                 )
-            )
-
-            for y in inventories:
-                if transfer.transfer_from in y.locations:
-                    y.total_on_hand -= item.amount
-                    y.total_expected = y.total_on_hand + y.total_ordered
-                    y.total_available = y.total_on_hand - y.total_allocated
-                    self.data_provider.fetch_inventory_pool().update_inventory(y.id, y)
-                elif transfer.transfer_to in y.locations:
-                    y.total_on_hand += item.amount
-                    y.total_expected = y.total_on_hand + y.total_ordered
-                    y.total_available = y.total_on_hand - y.total_allocated
-                    self.data_provider.fetch_inventory_pool().update_inventory(y.id, y)
-
-        transfer.transfer_status = "Processed"
+                inventory_pool.adjust_on_hand(changes, background_task)
+        except Exception:
+            inventory_pool.load()
+            raise
+        self.data.replace(transfer.id, committed_transfer)
         self.save(background_task)
-        return transfer
+        return committed_transfer
 
     def archive_transfer(self, transfer_id: int, background_task=True) -> bool:
-        for i in range(len(self.data)):
-            if self.data[i].id == transfer_id:
-                self.data[i].updated_at = self.get_timestamp()
-                self.data[i].is_archived = True
+        transfer = self.data.get(transfer_id)
+        if transfer is None:
+            return None
+        transfer = transfer.model_copy(
+            update={"is_archived": True, "updated_at": self.get_timestamp()}
+        )
 
-                fields = {}
-                for key, value in vars(self.data[i]).items():
-                    if key != "id" and key != "items":
-                        fields[key] = value
+        fields = {}
+        for key, value in vars(transfer).items():
+            if key != "id" and key != "items":
+                fields[key] = value
 
-                columns = ", ".join(f"{key} = ?" for key in fields)
-                values = tuple(fields.values())
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        values = tuple(fields.values())
 
-                update_sql = (
-                    f"UPDATE {self.data[i].table_name()} SET {columns} WHERE id = ?"
-                )
-                values += (transfer_id,)
+        update_sql = f"UPDATE {transfer.table_name()} SET {columns} WHERE id = ?"
+        values += (transfer_id,)
 
-                with self.db.get_connection() as conn:
-                    conn.execute(update_sql, values)
+        with self.db.get_connection() as conn:
+            conn.execute(update_sql, values)
+        self.data.replace(transfer_id, transfer)
 
-                self.save(background_task)
-                return self.data[i]
-        return None
+        self.save(background_task)
+        return transfer
 
     def unarchive_transfer(self, transfer_id: int, background_task=True) -> bool:
-        for i in range(len(self.data)):
-            if self.data[i].id == transfer_id:
-                self.data[i].updated_at = self.get_timestamp()
-                self.data[i].is_archived = False
+        transfer = self.data.get(transfer_id)
+        if transfer is None:
+            return None
+        transfer = transfer.model_copy(
+            update={"is_archived": False, "updated_at": self.get_timestamp()}
+        )
 
-                fields = {}
-                for key, value in vars(self.data[i]).items():
-                    if key != "id" and key != "items":
-                        fields[key] = value
+        fields = {}
+        for key, value in vars(transfer).items():
+            if key != "id" and key != "items":
+                fields[key] = value
 
-                columns = ", ".join(f"{key} = ?" for key in fields)
-                values = tuple(fields.values())
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        values = tuple(fields.values())
 
-                update_sql = (
-                    f"UPDATE {self.data[i].table_name()} SET {columns} WHERE id = ?"
-                )
-                values += (transfer_id,)
+        update_sql = f"UPDATE {transfer.table_name()} SET {columns} WHERE id = ?"
+        values += (transfer_id,)
 
-                with self.db.get_connection() as conn:
-                    conn.execute(update_sql, values)
+        with self.db.get_connection() as conn:
+            conn.execute(update_sql, values)
+        self.data.replace(transfer_id, transfer)
 
-                self.save(background_task)
-                return self.data[i]
-        return None
+        self.save(background_task)
+        return transfer
 
     def save(self, background_task=True):  # pragma: no cover:
         if not self.is_debug:
 
             def call_v1_save_method():
                 data_provider.fetch_transfer_pool().save(
-                    [shipment.model_dump() for shipment in self.data]
+                    [shipment.model_dump() for shipment in self.data.values()]
                 )
 
+            writer = write_behind_service.fetch_writer(
+                Transfer.table_name(), call_v1_save_method
+            )
             if background_task:
-                threading.Thread(target=call_v1_save_method).start()
+                writer.mark_dirty()
             else:
-                call_v1_save_method()
+                writer.save_now()
 
     def load(self):
         self.data = self.get_all_transfers()
 
     def is_transfer_archived(self, transfer_id: int) -> bool:
-        for transfer in self.data:
-            if transfer.id == transfer_id:
-                return transfer.is_archived
+        transfer = self.data.get(transfer_id)
+        if transfer is not None:
+            return transfer.is_archived
         return None
 
     def has_transfer_archived_entities(
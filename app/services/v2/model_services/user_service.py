@@ -1,20 +1,34 @@
-from typing import List
+import threading
+import time
+from typing import Dict, FrozenSet, List, Tuple
 from services.v2 import data_provider_v2
 from models.v2.endpoint_access import EndpointAccess
 from models.v2.user import User
 from services.v2.base_service import Base
+from services.v2 import audit_service
 from utils.globals import *
 from datetime import datetime, timedelta
 from utils.globals import cache_time_minutes
 
 USERS = []
 
+# (endpoint, method) pairs a user may call; "*" stands for every endpoint or
+# every method.
+Permissions = FrozenSet[Tuple[str, str]]
+
 
 class UserService(Base):
+    model = User
+
     def __init__(self, is_debug: bool = False):
         self.db = data_provider_v2.fetch_database()
         self.last_updated = datetime.now()
+        self.is_debug = is_debug
         self.data = []
+        self._permissions: Dict[str, Permissions] | None = None
+        self._permissions_expire_at = 0.0
+        self._permissions_generation = 0
+        self._permissions_lock = threading.Lock()
         self.load(is_debug)
 
     def get_all_users(self) -> List[User]:
@@ -202,9 +216,9 @@ class UserService(Base):
                 is_archived=is_archived,
             )
         else:
-            for user in self.data:
-                if user.id == id:
-                    return user
+            user = self.data.get(id)
+            if user is not None:
+                return user
         return None
 
     def add_new_user(self, user: User) -> User | None:
@@ -285,7 +299,9 @@ class UserService(Base):
                         conn.commit()
 
         added_user = self.get_user(api_key, True)
-        self.data.append(added_user)
+        self.data.add(added_user)
+        self.invalidate_permissions()
+        audit_service.record_change("create", None, added_user)
         return added_user
 
     def update_user(
@@ -370,29 +386,29 @@ class UserService(Base):
                     conn.commit()
 
         updated_user = self.get_user(user.api_key, True)
-        for i in range(len(self.data)):
-            if self.data[i].id == user_id:
-                self.data[i] = updated_user
+        self.data.replace(user_id, updated_user)
+        self.invalidate_permissions()
+        audit_service.record_change("update", found_user, updated_user)
         return updated_user
 
     def archive_user(self, id: int) -> User | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == id:
-                self.data[i].is_archived = True
-                return self.update_user(id, self.data[i], True)
-        return None
+        user = self.data.get(id)
+        if user is None:
+            return None
+        user = user.model_copy(update={"is_archived": True})
+        return self.update_user(id, user, True)
 
     def unarchive_user(self, id: int) -> User | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == id:
-                self.data[i].is_archived = False
-                return self.update_user(id, self.data[i], False)
-        return None
+        user = self.data.get(id)
+        if user is None:
+            return None
+        user = user.model_copy(update={"is_archived": False})
+        return self.update_user(id, user, False)
 
     def delete_user(self, user_id: int) -> bool:
         if not self.is_user_archived(user_id):
             return False
-        user = self.get_user(user_id)
+        user = self.get_user_by_id(user_id)
         if not user:
             return False
         with self.db.get_connection() as conn:
@@ -415,9 +431,22 @@ class UserService(Base):
                 (user_id,),
             )
             conn.commit()
-        self.data.remove(user)
+        self.data.remove(user.id)
+        self.invalidate_permissions()
+        audit_service.record_change("delete", user, None)
         return True
 
+    def fetch_entities(self, keys: List[int]) -> List[User]:
+        users = (self.get_user_by_id(key, need_from_db=True) for key in keys)
+        return [user for user in users if user is not None]
+
+    def apply_changes(self, keys: List[int] | None = None):
+        if keys is None:
+            self.load(self.is_debug)
+        else:
+            super().apply_changes(keys)
+        self.invalidate_permissions()
+
     def load(self, is_debug: bool):
         if is_debug:
             self.data = USERS
@@ -425,16 +454,64 @@ class UserService(Base):
             self.data = self.get_all_users()
 
     def has_access(self, api_key: str, path: str, method: str) -> bool:
-        user = self.get_user(api_key)
+        permissions = self.get_permissions(api_key)
+        return permissions is not None and self.is_allowed(permissions, path, method)
+
+    def is_allowed(self, permissions: Permissions, path: str, method: str) -> bool:
+        return (
+            ("*", "*") in permissions
+            or (path, "*") in permissions
+            or (path, method) in permissions
+        )
+
+    def get_permissions(self, api_key: str) -> Permissions | None:
+        """Returns the compiled permissions of ``api_key``, or None if unknown.
+
+        The permissions of all users are compiled once and kept until they
+        are invalidated by a change to the users or ``cache_time_minutes``
+        has passed, after which the users are read from the database again.
+        """
+        permissions = self._permissions
+        if permissions is None or time.monotonic() >= self._permissions_expire_at:
+            permissions = self.refresh_permissions()
+        return permissions.get(api_key)
+
+    def refresh_permissions(self) -> Dict[str, Permissions]:
+        with self._permissions_lock:
+            now = time.monotonic()
+            if now >= self._permissions_expire_at:
+                if self._permissions_expire_at and not self.is_debug:
+                    self.data = self.get_all_users()
+                    self.last_updated = datetime.now()
+                self._permissions_expire_at = now + cache_time_minutes * 60
+            elif self._permissions is not None:
+                return self._permissions
+
+            # A user changed while compiling invalidates again; only keep the
+            # result if that did not happen.
+            generation = self._permissions_generation
+            permissions = {
+                user.api_key: self.compile_permissions(user) for user in self.data
+            }
+            if generation == self._permissions_generation:
+                self._permissions = permissions
+            return permissions
+
+    def invalidate_permissions(self):
+        self._permissions_generation += 1
+        self._permissions = None
+
+    def compile_permissions(self, user: User) -> Permissions:
+        permissions = set()
         if user.full:
-            return True
-        else:
-            for access in user.endpoint_access:
-                if access.endpoint == path:
-                    if access.full:
-                        return True
-                    return getattr(access, method)
-            return False
+            permissions.add(("*", "*"))
+        for access in user.endpoint_access:
+            if access.full:
+                permissions.add((access.endpoint, "*"))
+            for method in ("get", "post", "put", "delete"):
+                if getattr(access, method):
+                    permissions.add((access.endpoint, method))
+        return frozenset(permissions)
 
     def is_user_archived(self, id: int) -> bool | None:
         user = self.get_user_by_id(id)
@@ -1,20 +1,22 @@
-import threading
 from services.v2 import data_provider_v2
 from models.v2.warehouse import Warehouse
 from typing import List, Type
 from services.v2.base_service import Base
+from services.v2 import write_behind_service
 from services.v2.database_service import DatabaseService
 from services.v1 import data_provider
 
 
 class WarehouseService(Base):
+    model = Warehouse
+
     def __init__(self, db: Type[DatabaseService] = None, is_debug: bool = False):
         self.is_debug = is_debug
         if db is not None:
             self.db = db
         else:
             self.db = data_provider_v2.fetch_database()
-        self.load()
+        self.hydrate()
 
     def get_all_warehouses(self) -> List[Warehouse]:
         return self.db.get_all(Warehouse)
@@ -27,16 +29,16 @@ class WarehouseService(Base):
         return warehouses
 
     def get_warehouse(self, warehouse_id: int) -> Warehouse | None:
-        for warehouse in self.data:
-            if warehouse.id == warehouse_id:
-                return warehouse
+        warehouse = self.data.get(warehouse_id)
+        if warehouse is not None:
+            return warehouse
         return self.db.get(Warehouse, warehouse_id)
 
     def add_warehouse(self, warehouse: Warehouse, background_task=True) -> Warehouse:
         warehouse.created_at = self.get_timestamp()
         warehouse.updated_at = self.get_timestamp()
         added_warehouse = self.db.insert(warehouse)
-        self.data.append(added_warehouse)
+        self.data.add(added_warehouse)
         self.save(background_task)
         return added_warehouse
 
@@ -47,61 +49,66 @@ class WarehouseService(Base):
             return None
 
         warehouse.updated_at = self.get_timestamp()
-        for i in range(len(self.data)):
-            if self.data[i].id == warehouse_id:
-                warehouse.id = warehouse_id
-                if warehouse.created_at is None:
-                    warehouse.created_at = self.data[i].created_at
-                updated_warehouse = self.db.update(warehouse, warehouse_id)
-                self.data[i] = updated_warehouse
-                self.save(background_task)
-                return updated_warehouse
-        return None
+        existing_warehouse = self.data.get(warehouse_id)
+        if existing_warehouse is None:
+            return None
+        warehouse.id = warehouse_id
+        if warehouse.created_at is None:
+            warehouse.created_at = existing_warehouse.created_at
+        updated_warehouse = self.db.update(warehouse, warehouse_id)
+        self.data.replace(warehouse_id, updated_warehouse)
+        self.save(background_task)
+        return updated_warehouse
 
     def archive_warehouse(
         self, warehouse_id: int, background_task=True
     ) -> Warehouse | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == warehouse_id:
-                self.data[i].updated_at = self.get_timestamp()
-                self.data[i].is_archived = True
-                updated_warehouse = self.db.update(self.data[i], warehouse_id)
-                self.data[i] = updated_warehouse
-                self.save(background_task)
-                return updated_warehouse
-        return None
+        warehouse = self.data.get(warehouse_id)
+        if warehouse is None:
+            return None
+        warehouse = warehouse.model_copy(
+            update={"is_archived": True, "updated_at": self.get_timestamp()}
+        )
+        updated_warehouse = self.db.update(warehouse, warehouse_id)
+        self.data.replace(warehouse_id, updated_warehouse)
+        self.save(background_task)
+        return updated_warehouse
 
     def unarchive_warehouse(
         self, warehouse_id: int, background_task=True
     ) -> Warehouse | None:
-        for i in range(len(self.data)):
-            if self.data[i].id == warehouse_id:
-                self.data[i].updated_at = self.get_timestamp()
-                self.data[i].is_archived = False
-                updated_warehouse = self.db.update(self.data[i], warehouse_id)
-                self.data[i] = updated_warehouse
-                self.save(background_task)
-                return updated_warehouse
-        return None
+        warehouse = self.data.get(warehouse_id)
+        if warehouse is None:
+            return None
+        warehouse = warehouse.model_copy(
+            update={"is_archived": False, "updated_at": self.get_timestamp()}
+        )
+        updated_warehouse = self.db.update(warehouse, warehouse_id)
+        self.data.replace(warehouse_id, updated_warehouse)
+        self.save(background_task)
+        return updated_warehouse
 
     def save(self, background_task=True):  # pragma: no cover:
         if not self.is_debug:
 
             def call_v1_save_method():
                 data_provider.fetch_warehouse_pool().save(
-                    [shipment.model_dump() for shipment in self.data]
+                    [shipment.model_dump() for shipment in self.data.values()]
                 )
 
+            writer = write_behind_service.fetch_writer(
+                Warehouse.table_name(), call_v1_save_method
+            )
             if background_task:
-                threading.Thread(target=call_v1_save_method).start()
+                writer.mark_dirty()
             else:
-                call_v1_save_method()
+                writer.save_now()
 
     def load(self):
         self.data = self.get_all_warehouses()
 
     def is_warehouse_archived(self, warehouse_id: int) -> bool | None:
-        for warehouse in self.data:
-            if warehouse.id == warehouse_id:
-                return warehouse.is_archived
+        warehouse = self.data.get(warehouse_id)
+        if warehouse is not None:
+            return warehouse.is_archived
         return None
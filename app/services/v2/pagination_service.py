@@ -1,24 +1,105 @@
+import base64
+import json
+from itertools import islice
+from typing import Any, Callable
+from services.v2.model_services.entity_store import EntityStore
+
+
+def encode_cursor(payload: dict) -> str:
+    data = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Decodes a cursor made by ``encode_cursor``; raises ValueError if invalid."""
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(data)
+    except (ValueError, UnicodeDecodeError) as error:
+        raise ValueError("Invalid cursor") from error
+    if not isinstance(payload, dict) or not (
+        isinstance(payload.get("offset"), int)
+        or isinstance(payload.get("after"), (int, str))
+    ):
+        raise ValueError("Invalid cursor")
+    return payload
+
+
 class Pagination:
-    def __init__(self, page: int = 1, items_per_page: int = 50):
+    """Pages a list endpoint either by ``page`` or by an opaque ``cursor``.
+
+    ``apply`` slices an already built list. ``apply_to_store`` walks an
+    ``EntityStore`` in order and stops after the page, so only the returned
+    entities are visited: by keyset (the key of the last entity sent) when a
+    cursor is given, else by skipping to ``page``. Every response carries the
+    cursor of the next page in ``pagination.next``.
+    """
+
+    def __init__(
+        self, page: int = 1, items_per_page: int = 50, cursor: dict | None = None
+    ):
         if page < 1:
             page = 1
         self.page = page
         self.items_per_page = items_per_page
+        self.cursor = cursor
 
     def apply(self, data: list):
         total = len(data)
-        if (total + self.items_per_page - 1) // self.items_per_page < self.page:
-            self.page = 1
-        start_index = (self.page - 1) * self.items_per_page
+        if self.cursor is not None and "offset" in self.cursor:
+            start_index = max(self.cursor["offset"], 0)
+            self.page = start_index // self.items_per_page + 1
+        else:
+            if (total + self.items_per_page - 1) // self.items_per_page < self.page:
+                self.page = 1
+            start_index = (self.page - 1) * self.items_per_page
         end_index = start_index + self.items_per_page
 
         paginated_data = data[start_index:end_index]
+        next_cursor = None
+        if end_index < total:
+            next_cursor = encode_cursor({"offset": end_index})
+        return self.envelope(paginated_data, total, next_cursor)
+
+    def apply_to_store(
+        self,
+        store: EntityStore,
+        total: int,
+        include: Callable[[Any], bool] = lambda entity: True,
+    ):
+        """Pages the entities of ``store`` for which ``include`` holds.
+
+        ``total`` is the number of those entities, which the services keep
+        an index for, so the count does not need a pass over the store.
+        """
+        if self.cursor is not None and "after" in self.cursor:
+            self.page = None
+            entities = filter(include, store.iter_after(self.cursor["after"]))
+        else:
+            if self.cursor is not None:
+                start_index = max(self.cursor["offset"], 0)
+                self.page = start_index // self.items_per_page + 1
+            else:
+                if (total + self.items_per_page - 1) // self.items_per_page < self.page:
+                    self.page = 1
+                start_index = (self.page - 1) * self.items_per_page
+            entities = islice(filter(include, store.iter_after()), start_index, None)
+
+        paginated_data = list(islice(entities, max(self.items_per_page, 0) + 1))
+        next_cursor = None
+        if len(paginated_data) > self.items_per_page > 0:
+            paginated_data.pop()
+            next_cursor = encode_cursor({"after": store.key_of(paginated_data[-1])})
+        return self.envelope(paginated_data, total, next_cursor)
+
+    def envelope(self, data: list, total: int, next_cursor: str | None):
         return {
-            "data": paginated_data,
+            "data": data,
             "pagination": {
                 "total": total,
                 "page": self.page,
                 "items_per_page": self.items_per_page,
                 "pages": (total + self.items_per_page - 1) // self.items_per_page,
+                "next": next_cursor,
             },
         }
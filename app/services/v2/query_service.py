@@ -0,0 +1,124 @@
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple, Type, Union, get_args, get_origin
+from fastapi import HTTPException, status
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from utils.globals import query_reserved_params
+
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "in": lambda value, values: value in values,
+}
+SCALAR_TYPES = (str, int, float, bool)
+
+
+@lru_cache(maxsize=None)
+def filterable_fields(model: Type[BaseModel]) -> Dict[str, TypeAdapter]:
+    """Maps the scalar fields of ``model`` to an adapter that parses them."""
+    fields = {}
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        if get_origin(annotation) in (Union, type(int | None)):
+            annotation = next(
+                (arg for arg in get_args(annotation) if arg is not type(None)), None
+            )
+        if annotation in SCALAR_TYPES:
+            fields[name] = TypeAdapter(annotation)
+    return fields
+
+
+class Query:
+    """Filters and sort order parsed from the query string of a list endpoint.
+
+    ``field=value`` and ``field[op]=value`` filter on a scalar field of the
+    model, with ``op`` one of ``OPERATORS`` (``in`` takes a comma separated
+    list). ``sort=-updated_at,id`` sorts on one or more fields, descending
+    when prefixed with ``-``.
+    """
+
+    def __init__(
+        self,
+        filters: List[Tuple[str, str, Any]] | None = None,
+        sort: List[Tuple[str, bool]] | None = None,
+    ):
+        self.filters = filters or []
+        self.sort = sort or []
+
+    def __bool__(self) -> bool:
+        return bool(self.filters or self.sort)
+
+    @classmethod
+    def parse(cls, model: Type[BaseModel], query_params) -> "Query":
+        fields = filterable_fields(model)
+        filters = []
+        sort = []
+        errors = []
+        for param, raw_value in query_params.multi_items():
+            if param == "sort":
+                for name in raw_value.split(","):
+                    descending = name.startswith("-")
+                    name = name.lstrip("-")
+                    if name not in fields:
+                        errors.append(f"Cannot sort on '{name}'")
+                    else:
+                        sort.append((name, descending))
+                continue
+            if param in query_reserved_params:
+                continue
+
+            name, op = param, "eq"
+            if param.endswith("]") and "[" in param:
+                name, op = param[:-1].split("[", 1)
+            if name not in fields:
+                errors.append(f"Cannot filter on '{name}'")
+                continue
+            if op not in OPERATORS:
+                errors.append(f"Unknown operator '{op}' for '{name}'")
+                continue
+            try:
+                if op == "in":
+                    value = [
+                        fields[name].validate_python(item)
+                        for item in raw_value.split(",")
+                    ]
+                else:
+                    value = fields[name].validate_python(raw_value)
+            except ValidationError:
+                errors.append(f"Invalid value '{raw_value}' for '{name}'")
+                continue
+            filters.append((name, op, value))
+
+        if errors:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=errors
+            )
+        return cls(filters, sort)
+
+    def equality_filters(self) -> List[Tuple[str, Any]]:
+        return [(name, value) for name, op, value in self.filters if op == "eq"]
+
+    def matches(self, entity: BaseModel) -> bool:
+        for name, op, value in self.filters:
+            try:
+                if not OPERATORS[op](getattr(entity, name), value):
+                    return False
+            except TypeError:
+                return False
+        return True
+
+    def sorted(self, entities: List[BaseModel]) -> List[BaseModel]:
+        # Stable sorts from the last key to the first; None sorts first.
+        for name, descending in reversed(self.sort):
+            entities.sort(
+                key=lambda entity: (
+                    getattr(entity, name) is not None,
+                    getattr(entity, name),
+                ),
+                reverse=descending,
+            )
+        return entities
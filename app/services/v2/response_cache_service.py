@@ -0,0 +1,64 @@
+import threading
+from collections import OrderedDict
+from typing import Any, List, Tuple
+from utils.globals import response_cache_max_bytes, response_cache_max_entry_bytes
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+class ResponseCache:
+    """Size bounded LRU cache of serialized responses.
+
+    Entries are keyed on the request and remember the collection version they
+    were built from; an entry is only returned for the same version, so any
+    write through the services (which moves the version on) invalidates it.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = response_cache_max_bytes,
+        max_entry_bytes: int = response_cache_max_entry_bytes,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Any, Tuple[int, Headers, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Any, version: int) -> Tuple[Headers, bytes] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, key: Any, version: int, headers: Headers, body: bytes) -> bool:
+        if len(body) > self.max_entry_bytes:
+            return False
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                if previous[0] > version:
+                    # A newer response was stored while this one was built.
+                    self._entries[key] = previous
+                    return False
+                self.size -= len(previous[2])
+            self._entries[key] = (version, headers, body)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
@@ -0,0 +1,244 @@
+import gc
+import logging
+import mmap
+import os
+import pickle
+import struct
+import threading
+import typing
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Type
+from pydantic import BaseModel
+from services.v2.database_service import DatabaseService, build_models
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout below changes; older snapshots are then ignored.
+MAGIC = b"CHSNAP01"
+_HEADER_LENGTH = struct.Struct("<Q")
+
+_lock = threading.Lock()
+_restored = None
+_gc_pauses = 0
+_gc_was_enabled = True
+
+
+class _Layout:
+    """Field order of a model, and the layouts of its nested models."""
+
+    _layouts: Dict[Type[BaseModel], "_Layout"] = {}
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.fields = tuple(model.model_fields)
+        self.nested = {
+            field: _Layout.of(nested)
+            for field, info in model.model_fields.items()
+            if (nested := _nested_model(info.annotation)) is not None
+        }
+
+    @classmethod
+    def of(cls, model: Type[BaseModel]) -> "_Layout":
+        layout = cls._layouts.get(model)
+        if layout is None:
+            layout = cls._layouts[model] = cls(model)
+        return layout
+
+    def encode(self, field: str, value: Any) -> Any:
+        nested = self.nested.get(field)
+        if nested is None or value is None:
+            return value
+        return [nested.values(child) for child in value]
+
+    def values(self, entity: BaseModel) -> Dict[str, Any]:
+        # Nested models are kept as plain dicts, which unpickle in C and are
+        # validated together with their parent.
+        return {
+            field: self.encode(field, getattr(entity, field)) for field in self.fields
+        }
+
+
+def _nested_model(annotation: Any) -> Type[BaseModel] | None:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for argument in typing.get_args(annotation):
+        nested = _nested_model(argument)
+        if nested is not None:
+            return nested
+    return None
+
+
+def snapshot_path(db: DatabaseService) -> str:
+    return db.db_path + ".snapshot"
+
+
+def encode(model: Type[BaseModel], entities: List[BaseModel]) -> dict:
+    """Lays ``entities`` out column by column, one list per model field."""
+    layout = _Layout.of(model)
+    return {
+        "fields": layout.fields,
+        "columns": [
+            [layout.encode(field, getattr(entity, field)) for entity in entities]
+            for field in layout.fields
+        ],
+    }
+
+
+def decode(model: Type[BaseModel], block: dict) -> List[BaseModel]:
+    layout = _Layout.of(model)
+    if tuple(block["fields"]) != layout.fields:
+        raise ValueError(f"The snapshot of {model.table_name()} has other fields")
+    fields = layout.fields
+    return build_models(
+        model, [dict(zip(fields, row)) for row in zip(*block["columns"])]
+    )
+
+
+@contextmanager
+def paused_gc():
+    """Pauses the cyclic garbage collector while a collection is built.
+
+    Building hundreds of thousands of models otherwise triggers collections
+    that scan every object allocated so far, which costs more than building
+    them. Nested pauses of concurrent loads share one counter.
+    """
+    global _gc_pauses, _gc_was_enabled
+    with _lock:
+        _gc_pauses += 1
+        if _gc_pauses == 1:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+    try:
+        yield
+    finally:
+        with _lock:
+            _gc_pauses -= 1
+            if _gc_pauses == 0 and _gc_was_enabled:
+                gc.enable()
+
+
+def hydrated(pools: Iterable) -> List:
+    """The pools that were hydrated (see ``Base.hydrate``) and are loaded."""
+    return [
+        pool
+        for pool in pools
+        if getattr(pool, "hydration", {}).get("status") == "ready"
+        and pool.model is not None
+    ]
+
+
+def write_snapshot(db: DatabaseService, pools: Iterable, path: str | None = None):
+    """Writes the in-memory collections of ``pools`` to one snapshot file.
+
+    The file holds the data version of the database, a header with the
+    offset of every collection and then one pickled block of columns per
+    collection, so a restart only unpickles the collections it uses. Only
+    call this while nothing writes, e.g. on shutdown, so the collections
+    match the data version.
+    """
+    path = path or snapshot_path(db)
+    header = {"version": db.data_version(), "tables": {}}
+    blocks = []
+    offset = 0
+    for pool in pools:
+        entities = pool.data.values()
+        block = pickle.dumps(encode(pool.model, entities), 5)
+        header["tables"][pool.model.table_name()] = (offset, len(block), len(entities))
+        blocks.append(block)
+        offset += len(block)
+    header_bytes = pickle.dumps(header, 5)
+
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(MAGIC)
+        file.write(_HEADER_LENGTH.pack(len(header_bytes)))
+        file.write(header_bytes)
+        for block in blocks:
+            file.write(block)
+    os.replace(temporary_path, path)
+    return path
+
+
+class Snapshot:
+    """A memory-mapped snapshot file whose collections are read on demand."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError("Not a snapshot file")
+        start = len(MAGIC) + _HEADER_LENGTH.size
+        (length,) = _HEADER_LENGTH.unpack_from(self._map, len(MAGIC))
+        header = pickle.loads(self._map[start : start + length])
+        self.version = tuple(header["version"])
+        self.tables = header["tables"]
+        self._blocks_at = start + length
+
+    def read(self, model: Type[BaseModel]) -> List[BaseModel] | None:
+        table = self.tables.get(model.table_name())
+        if table is None:
+            return None
+        offset, length, _ = table
+        start = self._blocks_at + offset
+        with memoryview(self._map)[start : start + length] as block:
+            return decode(model, pickle.loads(block))
+
+    def close(self):
+        self._map.close()
+
+
+def restore(db: DatabaseService, path: str | None = None) -> bool:
+    """Opens the snapshot of ``db`` if it matches the data in the database.
+
+    A snapshot is stale once anything was written to the database after it
+    was taken, or when its row counts do not match (the database was
+    recreated). Returns whether the pools can be restored from it.
+    """
+    global _restored
+    path = path or snapshot_path(db)
+    discard()
+    if not os.path.exists(path):
+        return False
+    try:
+        snapshot = Snapshot(path)
+    except Exception:
+        logger.exception("Reading the snapshot %s failed", path)
+        return False
+    if snapshot.version != db.data_version() or any(
+        db.count_rows(table_name) != rows
+        for table_name, (_, _, rows) in snapshot.tables.items()
+    ):
+        logger.info("The snapshot %s is stale, loading from the database", path)
+        snapshot.close()
+        return False
+    with _lock:
+        _restored = snapshot
+    return True
+
+
+def take(pool) -> List[BaseModel] | None:
+    """Returns the collection of ``pool`` from the restored snapshot.
+
+    None if there is no snapshot, it does not hold the collection, or the
+    database changed since it was restored; the pool then loads from SQL.
+    """
+    snapshot = _restored
+    if snapshot is None or pool.model is None:
+        return None
+    if snapshot.version != pool.db.data_version():
+        discard()
+        return None
+    try:
+        return snapshot.read(pool.model)
+    except Exception:
+        logger.exception("Restoring %s from the snapshot failed", pool.model)
+        return None
+
+
+def discard():
+    # Not closed here: a pool may still be reading from it. The map is closed
+    # once the last reader drops it.
+    global _restored
+    with _lock:
+        _restored = None
@@ -0,0 +1,71 @@
+import threading
+from typing import Callable, Iterable, List
+
+
+class UidAllocator:
+    """Thread-safe allocator for prefixed, zero padded uids such as ``P000042``.
+
+    Seeded once with the uids that already exist; after that every uid is
+    handed out in O(1) from a counter. Uids are never handed out twice, also
+    not when the insert they were allocated for fails. ``uids`` may be a
+    function, which is then only called when the first uid is needed.
+    """
+
+    def __init__(
+        self,
+        prefix: str = "P",
+        width: int = 6,
+        uids: Iterable[str] | Callable[[], Iterable[str]] = (),
+    ):
+        self.prefix = prefix
+        self.width = width
+        self._uids = uids
+        self._next = None
+        self._lock = threading.Lock()
+
+    def _seed(self):
+        if self._next is None:
+            uids = self._uids() if callable(self._uids) else self._uids
+            self._next = self.highest(uids) + 1
+            self._uids = None
+
+    @staticmethod
+    def highest(uids: Iterable[str]) -> int:
+        highest = 0
+        for uid in uids:
+            try:
+                highest = max(highest, int(uid[1:]))
+            except (TypeError, ValueError):
+                continue
+        return highest
+
+    def format(self, number: int) -> str:
+        return f"{self.prefix}{number:0{self.width}d}"
+
+    def peek(self) -> str:
+        """Returns the uid the next ``allocate`` will hand out."""
+        with self._lock:
+            self._seed()
+            return self.format(self._next)
+
+    def allocate(self) -> str:
+        return self.reserve(1)[0]
+
+    def reserve(self, count: int) -> List[str]:
+        """Reserves a block of ``count`` consecutive uids, e.g. for an import."""
+        with self._lock:
+            self._seed()
+            first = self._next
+            self._next += count
+        return [self.format(number) for number in range(first, first + count)]
+
+    def advance_past(self, uids: Iterable[str]):
+        """Never hands out a uid up to the highest of ``uids`` from now on.
+
+        For uids that were added by another process, e.g. seen through the
+        change feed. Before the first allocation there is nothing to do: the
+        seed then reads the uids, including these.
+        """
+        with self._lock:
+            if self._next is not None:
+                self._next = max(self._next, self.highest(uids) + 1)
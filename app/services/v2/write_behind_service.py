@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict
+from utils.globals import write_behind_delay_seconds, write_behind_max_delay_seconds
+
+logger = logging.getLogger(__name__)
+
+_writers: Dict[str, "WriteBehind"] = {}
+_writers_lock = threading.Lock()
+
+
+class WriteBehind:
+    """Coalescing background writer for a single collection.
+
+    Writes marked with ``mark_dirty`` are batched: the worker waits until the
+    collection has been quiet for ``delay`` seconds (but never longer than
+    ``max_delay`` after the first pending change) and then calls ``callback``
+    once for all of them. Only one thread ever runs the callback at a time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        callback: Callable[[], None],
+        delay: float = write_behind_delay_seconds,
+        max_delay: float = write_behind_max_delay_seconds,
+    ):
+        self.name = name
+        self.callback = callback
+        self.delay = delay
+        self.max_delay = max_delay
+        self.flush_count = 0
+        self._pending = 0
+        self._first_dirty_at = 0.0
+        self._last_dirty_at = 0.0
+        self._stopping = False
+        self._thread = None
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def mark_dirty(self):
+        with self._condition:
+            now = time.monotonic()
+            if self._pending == 0:
+                self._first_dirty_at = now
+            self._last_dirty_at = now
+            self._pending += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(
+                    target=self._run, name=f"write-behind-{self.name}", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+
+    def flush(self) -> bool:
+        with self._write_lock:
+            with self._condition:
+                pending = self._pending
+                self._pending = 0
+            if pending == 0:
+                return False
+            try:
+                self.callback()
+            except Exception:
+                with self._condition:
+                    if self._pending == 0:
+                        self._first_dirty_at = time.monotonic()
+                    self._last_dirty_at = time.monotonic()
+                    self._pending += pending
+                raise
+            self.flush_count += 1
+            return True
+
+    def save_now(self):
+        with self._condition:
+            self._pending += 1
+        self.flush()
+
+    def drain(self, timeout: float | None = None):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending == 0 and not self._stopping:
+                    self._condition.wait()
+                if self._pending == 0:
+                    return
+                while not self._stopping:
+                    deadline = min(
+                        self._last_dirty_at + self.delay,
+                        self._first_dirty_at + self.max_delay,
+                    )
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                stopping = self._stopping
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Write-behind flush of %s failed", self.name)
+            if stopping:
+                return
+
+
+def fetch_writer(name: str, callback: Callable[[], None]) -> WriteBehind:
+    with _writers_lock:
+        writer = _writers.get(name)
+        if writer is None:
+            writer = WriteBehind(name, callback)
+            _writers[name] = writer
+        else:
+            writer.callback = callback
+        return writer
+
+
+def flush_all():
+    for writer in list(_writers.values()):
+        writer.flush()
+
+
+def drain_all(timeout: float | None = None):
+    for writer in list(_writers.values()):
+        writer.drain(timeout)
@@ -2,5 +2,33 @@ inventory_locations_table = "inventory_locations"
 transfer_items_table = "transfer_items"
 shipment_items_table = "shipment_items"
 order_items_table = "order_items"
+change_log_table = "change_log"
 cache_time_minutes = 15
-open_url_points = ["/", "/docs", "/redoc", "/openapi.json"]
+open_url_points = [
+    "/",
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+    "/api/v2/health",
+    "/api/v2/health/ready",
+]
+write_behind_delay_seconds = 0.5
+write_behind_max_delay_seconds = 5
+database_pool_size = 8
+database_pragmas = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+}
+batch_max_size = 1000
+audited_resources = ["users", "orders", "shipments"]
+audit_redacted_fields = ["api_key"]
+audit_max_payload_length = 2048
+query_reserved_params = ["page", "items_per_page", "cursor"]
+response_cache_max_bytes = 32 * 1024 * 1024
+response_cache_max_entry_bytes = 1024 * 1024
+change_feed_interval_seconds = 0.25
+change_log_retention = 100000
+change_log_prune_interval_seconds = 60
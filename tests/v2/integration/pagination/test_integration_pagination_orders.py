@@ -156,3 +156,24 @@ def test_get_all_order_items_wrong_page_number(client):
         f"/orders/{test_order['id']}", headers=test_headers
     )
     assert response_delete_order.status_code == 200
+
+
+def test_get_all_orders_with_cursor(client):
+    response = client.get("/orders?items_per_page=2", headers=test_headers)
+    assert response.status_code == 200
+    next_cursor = response.json()["pagination"]["next"]
+    assert next_cursor is not None
+
+    next_response = client.get(
+        f"/orders?items_per_page=2&cursor={next_cursor}", headers=test_headers
+    )
+    assert next_response.status_code == 200
+    assert next_response.json()["pagination"]["page"] is None
+    first_ids = [order["id"] for order in response.json()["data"]]
+    next_ids = [order["id"] for order in next_response.json()["data"]]
+    assert next_ids[0] > first_ids[-1]
+
+
+def test_get_all_orders_invalid_cursor(client):
+    response = client.get("/orders?cursor=invalid", headers=test_headers)
+    assert response.status_code == 422
@@ -43,6 +43,24 @@ def test_get_all_orders(client):
     assert isinstance(response.json()["data"], list)
 
 
+def test_get_all_orders_filtered(client):
+    response = client.get(
+        "/orders?order_status=Delivered&warehouse_id[gte]=1&sort=-updated_at",
+        headers=test_headers,
+    )
+    assert response.status_code == 200
+    orders = response.json()["data"]
+    assert all(order["order_status"] == "Delivered" for order in orders)
+    assert [order["updated_at"] for order in orders] == sorted(
+        [order["updated_at"] for order in orders], reverse=True
+    )
+
+
+def test_get_all_orders_invalid_filter(client):
+    response = client.get("/orders?unknown=1", headers=test_headers)
+    assert response.status_code == 422
+
+
 def test_get_all_orders_no_api_key(client):
     response = client.get("/orders")
     assert response.status_code == 403
@@ -318,6 +336,48 @@ def test_partial_update_order(client):
     assert response_get_order.json()["notes"] == updated_order["notes"]
 
 
+def test_add_orders_batch_no_api_key(client):
+    response = client.post("/orders/batch", json=[test_order])
+    assert response.status_code == 403
+
+
+def test_add_orders_batch(client):
+    invalid_order = {"reference": "ORD00004"}
+    response = client.post(
+        "/orders/batch", json=[test_order, invalid_order], headers=test_headers
+    )
+    assert response.status_code == 207
+    results = response.json()["results"]
+    assert results[0]["status"] == 201
+    assert results[1]["status"] == 422
+
+    response_get_order = client.get(
+        "/orders/" + str(results[0]["data"]["id"]), headers=test_headers
+    )
+    assert response_get_order.status_code == 200
+    assert response_get_order.json()["items"] == test_order["items"]
+
+
+def test_partial_update_orders_batch(client):
+    response = client.patch(
+        "/orders/batch",
+        json=[
+            {"id": test_order["id"], "notes": "This order has been batch patched."},
+            {"id": non_existent_id, "notes": "Does not exist."},
+        ],
+        headers=test_headers,
+    )
+    assert response.status_code == 207
+    results = response.json()["results"]
+    assert results[0]["status"] == 200
+    assert results[1]["status"] == 404
+
+    response_get_order = client.get(
+        "/orders/" + str(test_order["id"]), headers=test_headers
+    )
+    assert response_get_order.json()["notes"] == "This order has been batch patched."
+
+
 def test_archive_order_no_api_key(client):
     response = client.delete("/orders/" + str(test_order["id"]))
     assert response.status_code == 403
@@ -0,0 +1,113 @@
+import logging
+import pytest
+from app.models.v2.item_group import ItemGroup
+from app.models.v2.order import Order
+from app.models.v2.user import User
+from app.services.v2 import audit_service
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def handler():
+    handler = ListHandler()
+    audit_service.start(handler, logging.NullHandler())
+    yield handler
+    audit_service.stop()
+
+
+def get_order(**update) -> Order:
+    order = Order(
+        id=1,
+        source_id=7,
+        order_date="2022-05-12 08:54:35",
+        request_date="2022-05-12 08:54:35",
+        reference="Order #1",
+        reference_extra="",
+        order_status="Pending",
+        notes="",
+        shipping_notes="",
+        picking_notes="",
+        warehouse_id=1,
+        ship_to=1,
+        bill_to=1,
+        shipment_id=1,
+        total_amount=100.0,
+        total_discount=0.0,
+        total_tax=0.0,
+        total_surcharge=0.0,
+    )
+    return order.model_copy(update=update)
+
+
+def test_update_logs_changed_fields_only(handler):
+    audit_service.record_change("update", get_order(), get_order(order_status="Packed"))
+    audit_service.stop()
+
+    assert handler.messages == [
+        "UPDATE orders 1 (source_id 7) - Previous Data: "
+        '{"order_status": "Pending"} - New Data: {"order_status": "Packed"}'
+    ]
+
+
+def test_unchanged_update_is_not_logged(handler):
+    audit_service.record_change("update", get_order(), get_order())
+    audit_service.stop()
+
+    assert handler.messages == []
+
+
+def test_create_includes_request(handler):
+    token = audit_service.current_request.set("POST /api/v2/orders")
+    audit_service.record_change("create", None, get_order())
+    audit_service.current_request.reset(token)
+    audit_service.stop()
+
+    assert handler.messages[0].startswith(
+        "CREATE orders 1 (source_id 7) by POST /api/v2/orders - Previous Data: None"
+    )
+
+
+def test_resources_that_are_not_audited_are_skipped(handler):
+    audit_service.record_change(
+        "create", None, ItemGroup(id=1, name="Electronics", description="Devices")
+    )
+    audit_service.stop()
+
+    assert handler.messages == []
+
+
+def test_payload_is_capped_and_redacted(handler, monkeypatch):
+    monkeypatch.setattr(audit_service, "audit_max_payload_length", 40)
+    audit_service.record_change(
+        "create",
+        None,
+        User(
+            id=1,
+            api_key="secret",
+            app="CargoHUB Dashboard",
+            full=True,
+            endpoint_access=[],
+        ),
+    )
+    audit_service.stop()
+
+    assert "secret" not in handler.messages[0]
+    assert handler.messages[0].endswith("...(truncated)")
+
+
+def test_nothing_is_logged_before_start():
+    handler = ListHandler()
+    audit_service.info_logger.addHandler(handler)
+
+    audit_service.record_change("create", None, get_order())
+
+    audit_service.info_logger.removeHandler(handler)
+    assert handler.messages == []
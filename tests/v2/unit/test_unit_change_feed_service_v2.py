@@ -0,0 +1,179 @@
+import time
+import pytest
+from app.models.v2.item import Item
+from app.models.v2.item_group import ItemGroup
+from app.services.v2 import change_feed_service
+from app.services.v2.change_feed_service import ChangeFeed, ChangeLogPruner
+from app.services.v2.database_service import DatabaseService
+from app.services.v2.model_services.item_group_service import ItemGroupService
+from app.services.v2.model_services.item_services import ItemService
+
+
+@pytest.fixture
+def databases(tmp_path):
+    # Two services on one file stand in for two worker processes.
+    path = str(tmp_path / "database.db")
+    first, second = DatabaseService(path), DatabaseService(path)
+    yield first, second
+    first.close_pool()
+    second.close_pool()
+
+
+@pytest.fixture
+def workers(databases, monkeypatch):
+    writer = ItemGroupService(databases[0], True)
+    reader = ItemGroupService(databases[1], True)
+    monkeypatch.setattr(
+        change_feed_service,
+        "loaded_pools_by_table",
+        lambda: {ItemGroup.table_name(): reader},
+    )
+    return writer, reader
+
+
+def test_applies_writes_of_other_worker(databases, workers):
+    writer, reader = workers
+    feed = ChangeFeed(databases[1])
+
+    added = writer.add_item_group(ItemGroup(name="Toys", description="Games"))
+    assert reader.data.get(added.id) is None
+    assert feed.poll() == 1
+    assert reader.data.get(added.id).name == "Toys"
+
+    writer.update_item_group(
+        added.id, ItemGroup(name="Games", description="Board games")
+    )
+    writer.archive_item_group(added.id)
+    assert feed.poll() == 2
+    assert reader.data.get(added.id).name == "Games"
+    assert reader.data.get(added.id).is_archived
+    assert feed.poll() == 0
+
+
+def test_removes_deleted_rows(databases, workers):
+    writer, reader = workers
+    added = writer.add_item_group(ItemGroup(name="Toys", description="Games"))
+    feed = ChangeFeed(databases[1])
+    reader.load()
+
+    databases[0].delete(ItemGroup, added.id)
+
+    assert feed.poll() == 1
+    assert reader.data.get(added.id) is None
+
+
+def test_reloads_after_missing_pruned_changes(databases, workers):
+    writer, reader = workers
+    feed = ChangeFeed(databases[1])
+
+    added = writer.add_item_group(ItemGroup(name="Toys", description="Games"))
+    databases[0].prune_change_log(0)
+
+    assert feed.poll() == 0
+    assert reader.data.get(added.id).name == "Toys"
+    assert feed.last_change_id == databases[0].last_change_id()
+
+    writer.add_item_group(ItemGroup(name="Tools", description="Hammers"))
+    assert feed.poll() == 1
+
+
+def test_prunes_log(databases, workers):
+    writer, reader = workers
+    feed = ChangeFeed(databases[1], retention=10)
+
+    for number in range(5):
+        writer.add_item_group(ItemGroup(name=f"Group {number}", description=""))
+    feed.poll()
+
+    rows = databases[1].changes_after(0)
+    assert [row[0] for row in rows] == list(range(1, 6))
+
+    for number in range(5):
+        writer.add_item_group(ItemGroup(name=f"Group {number}", description=""))
+    feed.poll()
+    for number in range(10):
+        writer.add_item_group(ItemGroup(name=f"Group {number}", description=""))
+    feed.poll()
+
+    assert len(databases[1].changes_after(0)) == 10
+    assert len(reader.data) == 20
+
+
+def test_pruner_bounds_log_without_feed(databases, workers):
+    writer, _ = workers
+    for number in range(20):
+        writer.add_item_group(ItemGroup(name=f"Group {number}", description=""))
+    version = databases[0].data_version()
+
+    ChangeLogPruner(databases[0], retention=5).prune()
+
+    assert [row[0] for row in databases[0].changes_after(0)] == list(range(16, 21))
+    assert databases[0].data_version() == version
+
+
+def test_pruner_runs_on_timer(databases, workers):
+    writer, _ = workers
+    for number in range(3):
+        writer.add_item_group(ItemGroup(name=f"Group {number}", description=""))
+    pruner = ChangeLogPruner(databases[0], interval=0.01, retention=0)
+
+    pruner.start()
+    try:
+        for _ in range(200):
+            if not databases[0].changes_after(0):
+                break
+            time.sleep(0.01)
+    finally:
+        pruner.stop()
+
+    assert databases[0].changes_after(0) == []
+
+
+def new_item(code):
+    return Item(
+        code=code,
+        description="Actuator",
+        short_description="act",
+        upc_code="3722576017240",
+        model_number="aHx-68Q4",
+        commodity_code="t-541-F0g",
+        item_line=1,
+        item_group=1,
+        item_type=1,
+        unit_purchase_quantity=1,
+        unit_order_quantity=1,
+        pack_order_quantity=1,
+        supplier_id=1,
+        supplier_code="SUP1",
+        supplier_part_number="r-920-z2C",
+    )
+
+
+def test_workers_never_share_item_uids(databases, monkeypatch):
+    monkeypatch.setattr(
+        ItemService, "has_item_archived_entities", lambda self, item: False
+    )
+    first, second = ItemService(databases[0], True), ItemService(databases[1], True)
+    monkeypatch.setattr(
+        change_feed_service,
+        "loaded_pools_by_table",
+        lambda: {Item.table_name(): second},
+    )
+    feed = ChangeFeed(databases[1])
+    assert first.generate_uid() == second.generate_uid() == "P000001"
+
+    first.add_item(new_item("First"))
+    added = second.add_item(new_item("Second"))
+
+    assert added.uid == "P000002"
+    assert [item.code for item in second.get_items()] == ["Second"]
+
+    first.add_items([new_item("Third"), new_item("Fourth")])
+    feed.poll()
+    assert second.generate_uid() == "P000005"
+    assert [item.uid for item in second.get_items()] == [
+        "P000002",
+        "P000001",
+        "P000003",
+        "P000004",
+    ]
@@ -230,8 +230,8 @@ def test_unarchive_client(client_service, mock_db_service):
     client = client_service.get_client(client_id)
     assert client is not None
 
-    client.is_archived = True
-    mock_db_service.update.return_value = client
+    client_service.data.replace(client_id, client.copy(update={"is_archived": True}))
+    mock_db_service.update.return_value = client.copy(update={"is_archived": False})
 
     result = client_service.unarchive_client(client_id)
 
@@ -0,0 +1,44 @@
+import pytest
+from app.services.v2 import data_provider_v2
+
+
+def test_warm_up_reports_progress(monkeypatch):
+    loaded = []
+    monkeypatch.setattr(
+        data_provider_v2,
+        "pool_loaders",
+        (
+            ("items", lambda: loaded.append("items")),
+            ("orders", lambda: loaded.append("orders")),
+        ),
+    )
+
+    data_provider_v2.warm_up()
+
+    status = data_provider_v2.fetch_warm_up_status()
+    assert loaded == ["items", "orders"]
+    assert data_provider_v2.is_ready()
+    assert status["status"] == "ready"
+    assert status["loaded"] == ["items", "orders"]
+    assert status["total"] == 2
+    assert status["finished_at"] >= status["started_at"]
+
+
+def test_warm_up_failure(monkeypatch):
+    def fail():
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(
+        data_provider_v2,
+        "pool_loaders",
+        (("items", lambda: None), ("orders", fail)),
+    )
+
+    with pytest.raises(RuntimeError):
+        data_provider_v2.warm_up()
+
+    status = data_provider_v2.fetch_warm_up_status()
+    assert not data_provider_v2.is_ready()
+    assert status["status"] == "failed"
+    assert status["loaded"] == ["items"]
+    assert status["error"] == "database is locked"
@@ -0,0 +1,378 @@
+import threading
+import pytest
+from app.models.v2.ItemInObject import ItemInObject
+from app.models.v2.item import Item
+from app.models.v2.item_group import ItemGroup
+from app.models.v2.transfer import Transfer
+from app.services.v2 import database_service
+from app.services.v2.database_service import (
+    SCHEMA_INDEXES,
+    SCHEMA_MIGRATIONS,
+    DatabaseService,
+    attach,
+    build_models,
+)
+from app.utils.globals import order_items_table, transfer_items_table
+
+
+@pytest.fixture
+def db_service(tmp_path):
+    service = DatabaseService(str(tmp_path / "database.db"), pool_size=2)
+    yield service
+    service.close_pool()
+
+
+def test_pragmas_are_applied(db_service):
+    with db_service.get_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+
+def test_custom_pragmas(tmp_path):
+    service = DatabaseService(
+        str(tmp_path / "database.db"), pragmas={"busy_timeout": 1234}
+    )
+    with service.get_connection() as conn:
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+    service.close_pool()
+
+
+def test_connections_are_reused(db_service):
+    with db_service.get_connection() as conn:
+        first = conn
+    with db_service.get_connection() as conn:
+        assert conn is first
+
+
+def test_nested_connection_joins_outer_transaction(db_service):
+    with db_service.get_connection() as outer:
+        with db_service.get_connection() as inner:
+            assert inner is outer
+
+
+def test_pool_size_is_bounded(db_service):
+    seen = set()
+    lock = threading.Lock()
+    barrier = threading.Barrier(4)
+
+    def worker():
+        barrier.wait()
+        for _ in range(20):
+            with db_service.get_connection() as conn:
+                with lock:
+                    seen.add(id(conn))
+                conn.execute("SELECT 1")
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(seen) <= 2
+
+
+def test_rollback_on_error(db_service):
+    with pytest.raises(RuntimeError):
+        with db_service.get_connection() as conn:
+            conn.execute(
+                f"INSERT INTO {ItemGroup.table_name()} (name, description) VALUES (?, ?)",
+                ("Electronics", "Devices"),
+            )
+            raise RuntimeError()
+
+    assert db_service.get_all(ItemGroup) == []
+
+
+def test_insert_and_get(db_service):
+    added = db_service.insert(ItemGroup(name="Electronics", description="Devices"))
+
+    assert added.id is not None
+    assert db_service.get(ItemGroup, added.id).name == "Electronics"
+
+
+def test_schemas_are_loaded_once(db_service):
+    schema = db_service.get_schema(ItemGroup.table_name())
+
+    assert schema.primary_key == "id"
+    assert schema.columns[0] == "id"
+    assert "description" in schema.column_order
+    assert db_service.get_schema(ItemGroup.table_name()) is schema
+
+
+def test_primary_key_of_items(db_service):
+    assert db_service.get_primary_key_column("items") == "uid"
+
+
+def test_prepared_statements_are_cached(db_service):
+    schema = db_service.get_schema(ItemGroup.table_name())
+    fields = ("name", "description")
+
+    assert schema.insert_sql(fields) is schema.insert_sql(fields)
+    assert schema.update_sql(fields) == (
+        f"UPDATE {ItemGroup.table_name()} SET name = ?, description = ? WHERE id = ?"
+    )
+
+
+def test_update_and_delete(db_service):
+    added = db_service.insert(ItemGroup(name="Electronics", description="Devices"))
+    added.name = "Office"
+
+    updated = db_service.update(added, added.id)
+
+    assert updated.id == added.id
+    assert db_service.get(ItemGroup, added.id).name == "Office"
+    assert db_service.delete(updated, added.id)
+    assert db_service.get(ItemGroup, added.id) is None
+
+
+def test_insert_many_returns_generated_ids(db_service):
+    db_service.insert(ItemGroup(name="Existing", description="Already there"))
+
+    added = db_service.insert_many(
+        [
+            ItemGroup(name="Electronics", description="Devices"),
+            ItemGroup(name="Furniture", description="Chairs and tables"),
+            ItemGroup(name="Clothing", description="Shirts and pants"),
+        ]
+    )
+
+    assert [item_group.id for item_group in added] == [2, 3, 4]
+    assert db_service.get(ItemGroup, 3).name == "Furniture"
+    assert db_service.insert_many([]) == []
+
+
+def test_insert_many_keeps_positions_of_existing_keys(db_service):
+    def item(uid, code):
+        return Item(
+            uid=uid,
+            code=code,
+            description="Actuator",
+            short_description="act",
+            upc_code="3722576017240",
+            model_number="aHx-68Q4",
+            commodity_code="t-541-F0g",
+            item_line=1,
+            item_group=1,
+            item_type=1,
+            unit_purchase_quantity=1,
+            unit_order_quantity=1,
+            pack_order_quantity=1,
+            supplier_id=1,
+            supplier_code="SUP1",
+            supplier_part_number="r-920-z2C",
+        )
+
+    db_service.insert(item("P000002", "Existing"))
+
+    added = db_service.insert_many(
+        [item("P000001", "First"), item("P000002", "Again"), item("P000003", "Third")]
+    )
+
+    assert [item.uid if item else None for item in added] == [
+        "P000001",
+        None,
+        "P000003",
+    ]
+    assert db_service.get(Item, "P000002").code == "Existing"
+    assert db_service.get(Item, "P000003").code == "Third"
+
+
+def test_insert_many_skips_columns_without_table_column(db_service):
+    added = db_service.insert_many(
+        [
+            Transfer(
+                reference="TR00001",
+                transfer_from=1,
+                transfer_to=2,
+                transfer_status="Pending",
+                created_at="2022-05-12T08:54:35Z",
+                updated_at="2022-05-12T08:54:35Z",
+                items=[{"item_id": "p10011", "amount": 1}],
+            )
+        ]
+    )
+
+    assert added[0].id == 1
+    assert added[0].items[0].item_id == "p10011"
+    assert db_service.get(Transfer, 1).reference == "TR00001"
+
+
+def test_insert_many_rolls_back_with_outer_transaction(db_service):
+    with pytest.raises(RuntimeError):
+        with db_service.get_connection():
+            db_service.insert_many(
+                [ItemGroup(name="Electronics", description="Devices")]
+            )
+            raise RuntimeError()
+
+    assert db_service.get_all(ItemGroup) == []
+
+
+def test_update_many(db_service):
+    added = db_service.insert_many(
+        [
+            ItemGroup(name="Electronics", description="Devices"),
+            ItemGroup(name="Furniture", description="Chairs and tables"),
+        ]
+    )
+    for item_group in added:
+        item_group.description = "Updated"
+
+    db_service.update_many(added)
+
+    assert [item_group.description for item_group in db_service.get_all(ItemGroup)] == [
+        "Updated",
+        "Updated",
+    ]
+
+
+def test_upsert_many(db_service):
+    existing = db_service.insert(ItemGroup(name="Electronics", description="Devices"))
+    existing.name = "Office"
+
+    result = db_service.upsert_many(
+        [
+            ItemGroup(name="Furniture", description="Chairs and tables"),
+            existing,
+            ItemGroup(id=10, name="Clothing", description="Shirts and pants"),
+        ]
+    )
+
+    assert [item_group.id for item_group in result] == [2, 1, 10]
+    assert [item_group.name for item_group in db_service.get_all(ItemGroup)] == [
+        "Office",
+        "Furniture",
+        "Clothing",
+    ]
+
+
+def test_insert_rows(db_service):
+    rows = [(1, "p10011", 1), (1, "p10012", 2)]
+
+    assert (
+        db_service.insert_rows(
+            transfer_items_table, ("transfer_id", "item_uid", "amount"), rows
+        )
+        == 2
+    )
+    assert (
+        db_service.execute_all(
+            f"SELECT transfer_id, item_uid, amount FROM {transfer_items_table}"
+        )
+        == rows
+    )
+
+
+def get_index_names(db_service):
+    with db_service.get_connection() as conn:
+        return {
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' "
+                "AND name LIKE 'idx_%'"
+            )
+        }
+
+
+def test_schema_indexes_are_created(db_service):
+    assert get_index_names(db_service) == {
+        f"idx_{table_name}_{column}" for table_name, column in SCHEMA_INDEXES
+    }
+    with db_service.get_connection() as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == len(
+            SCHEMA_MIGRATIONS
+        )
+        plan = conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT * FROM {order_items_table} WHERE order_id = ?",
+            (1,),
+        ).fetchall()
+    assert f"idx_{order_items_table}_order_id" in str(plan)
+
+
+def test_migrate_existing_database(tmp_path):
+    db_service = DatabaseService(str(tmp_path / "database.db"))
+    with db_service.get_connection() as conn:
+        for name in get_index_names(db_service):
+            conn.execute(f"DROP INDEX {name}")
+        conn.execute("DROP TABLE IF EXISTS sqlite_stat1")
+        conn.execute("PRAGMA user_version = 0")
+    db_service.close_pool()
+
+    db_service = DatabaseService(str(tmp_path / "database.db"))
+
+    assert len(get_index_names(db_service)) == len(SCHEMA_INDEXES)
+    with db_service.get_connection() as conn:
+        assert conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone()
+    assert db_service.migrate() == len(SCHEMA_MIGRATIONS)
+    db_service.close_pool()
+
+
+def test_failed_migration_is_rolled_back(db_service, monkeypatch):
+    def failing_migration(conn):
+        conn.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError()
+
+    monkeypatch.setattr(
+        database_service, "SCHEMA_MIGRATIONS", SCHEMA_MIGRATIONS + [failing_migration]
+    )
+
+    with pytest.raises(RuntimeError):
+        db_service.migrate()
+
+    with db_service.get_connection() as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == len(
+            SCHEMA_MIGRATIONS
+        )
+        assert (
+            conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'half_done'"
+            ).fetchone()
+            is None
+        )
+
+
+def test_build_models_coerces_like_the_model():
+    rows = [
+        {"id": 1, "name": "Toys", "description": "Games", "is_archived": 1},
+        {"id": 2, "name": "Tools", "description": "Hammers", "is_archived": 0},
+    ]
+
+    assert build_models(ItemGroup, rows) == [ItemGroup(**row) for row in rows]
+    assert build_models(ItemGroup, rows)[0].is_archived is True
+    assert build_models(ItemGroup, []) == []
+
+
+def test_get_all_round_trip(db_service):
+    db_service.insert_many(
+        [
+            ItemGroup(name="Toys", description="Games", is_archived=True),
+            ItemGroup(name="Tools", description="Hammers"),
+        ]
+    )
+
+    item_groups = db_service.get_all(ItemGroup)
+
+    assert [item_group.name for item_group in item_groups] == ["Toys", "Tools"]
+    assert [item_group.is_archived for item_group in item_groups] == [True, False]
+    assert db_service.get(ItemGroup, item_groups[1].id) == item_groups[1]
+
+
+def test_attach():
+    transfer = Transfer(
+        reference="TR1",
+        transfer_from=1,
+        transfer_to=2,
+        transfer_status="Scheduled",
+        created_at="2024-01-01T00:00:00Z",
+        updated_at="2024-01-01T00:00:00Z",
+    )
+    items = [ItemInObject(item_id="P000001", amount=3)]
+
+    attach(transfer, "items", items)
+
+    assert transfer.items == items
+    assert "items" in transfer.model_fields_set
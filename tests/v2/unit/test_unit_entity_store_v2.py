@@ -0,0 +1,345 @@
+import sys
+import threading
+import pytest
+from app.models.v2.item_group import ItemGroup
+from app.models.v2.location import Location
+from app.services.v2.model_services.entity_store import EntityStore, PendingStore
+
+
+def get_test_item_groups():
+    return [
+        ItemGroup(id=1, name="Electronics", description="Devices"),
+        ItemGroup(id=2, name="Furniture", description="Chairs and tables"),
+        ItemGroup(id=3, name="Clothing", description="Shirts and pants"),
+    ]
+
+
+@pytest.fixture
+def store():
+    return EntityStore("id", get_test_item_groups())
+
+
+def test_get(store):
+    assert store.get(2).name == "Furniture"
+    assert store.get(4) is None
+
+
+def test_list_view_keeps_order(store):
+    assert [item_group.id for item_group in store] == [1, 2, 3]
+    assert len(store) == 3
+    assert store[0].id == 1
+
+
+def test_add(store):
+    new_item_group = ItemGroup(id=4, name="Toys", description="Games")
+    store.add(new_item_group)
+
+    assert store.get(4) == new_item_group
+    assert store[-1] == new_item_group
+    assert new_item_group in store
+
+
+def test_add_existing_key_replaces(store):
+    store.add(ItemGroup(id=2, name="Office", description="Desks"))
+
+    assert [item_group.id for item_group in store] == [1, 2, 3]
+    assert store.get(2).name == "Office"
+    assert store[1].name == "Office"
+
+    store.remove(2)
+    assert [item_group.id for item_group in store] == [1, 3]
+
+
+def test_load_keeps_one_entity_per_key():
+    store = EntityStore(
+        "id",
+        get_test_item_groups() + [ItemGroup(id=1, name="Toys", description="")],
+        ("name",),
+    )
+
+    assert [item_group.id for item_group in store] == [1, 2, 3]
+    assert store.find("name", "Toys")[0].id == 1
+    assert store.find("name", "Electronics") == []
+
+
+def test_replace(store):
+    replacement = ItemGroup(id=2, name="Office", description="Desks")
+    store.replace(2, replacement)
+
+    assert store.get(2).name == "Office"
+    assert store[1].name == "Office"
+    assert len(store) == 3
+
+
+def test_replace_not_found(store):
+    replacement = ItemGroup(id=9, name="Office", description="Desks")
+
+    assert store.replace(9, replacement) is None
+    assert len(store) == 3
+
+
+def test_remove_updates_positions(store):
+    removed = store.remove(1)
+
+    assert removed.id == 1
+    assert store.get(1) is None
+    assert [item_group.id for item_group in store] == [2, 3]
+
+    store.replace(3, ItemGroup(id=3, name="Shoes", description="Sneakers"))
+    assert store[1].name == "Shoes"
+
+
+def test_remove_many_updates_positions():
+    store = EntityStore(
+        "id",
+        get_test_item_groups()
+        + [ItemGroup(id=id, name=f"Group {id}", description="") for id in (4, 5)],
+    )
+    version = store.version
+
+    removed = store.remove_many([4, 9, 1, 2])
+
+    assert [item_group.id for item_group in removed] == [4, 1, 2]
+    assert [item_group.id for item_group in store] == [3, 5]
+    assert store.get(1) is None
+    assert store.version > version
+
+    store.replace(5, ItemGroup(id=5, name="Shoes", description="Sneakers"))
+    assert store[1].name == "Shoes"
+    assert [item_group.id for item_group in store.iter_after(3)] == [5]
+
+
+def test_remove_many_unknown_keys(store):
+    version = store.version
+
+    assert store.remove_many([9]) == []
+    assert store.version == version
+
+
+def test_custom_key():
+    store = EntityStore("name", get_test_item_groups())
+
+    assert store.get("Clothing").id == 3
+
+
+def get_test_locations():
+    return [
+        Location(id=1, warehouse_id=1, code="A.1.0", name="Row: A, Rack: 1"),
+        Location(id=2, warehouse_id=2, code="A.1.1", name="Row: A, Rack: 1"),
+        Location(id=3, warehouse_id=1, code="A.2.0", name="Row: A, Rack: 2"),
+    ]
+
+
+@pytest.fixture
+def indexed_store():
+    return EntityStore("id", get_test_locations(), ("warehouse_id",))
+
+
+def test_find(indexed_store):
+    locations = indexed_store.find("warehouse_id", 1)
+
+    assert [location.id for location in locations] == [1, 3]
+    assert indexed_store.find("warehouse_id", 99) == []
+
+
+def test_find_after_add(indexed_store):
+    indexed_store.add(Location(id=4, warehouse_id=2, code="B.1.0", name="Row: B"))
+
+    assert [location.id for location in indexed_store.find("warehouse_id", 2)] == [
+        2,
+        4,
+    ]
+
+
+def test_find_after_replace_changed_in_place(indexed_store):
+    location = indexed_store.get(1)
+    location.warehouse_id = 2
+    indexed_store.replace(1, location)
+
+    assert [location.id for location in indexed_store.find("warehouse_id", 1)] == [3]
+    assert [location.id for location in indexed_store.find("warehouse_id", 2)] == [
+        1,
+        2,
+    ]
+
+
+def test_find_after_remove(indexed_store):
+    indexed_store.remove(3)
+
+    assert [location.id for location in indexed_store.find("warehouse_id", 1)] == [1]
+
+
+def test_find_any():
+    store = EntityStore("id", get_test_locations(), ("id", "warehouse_id"))
+
+    assert [location.id for location in store.find_any(("id", "warehouse_id"), 2)] == [
+        2
+    ]
+    assert [location.id for location in store.find_any(("id", "warehouse_id"), 1)] == [
+        1,
+        3,
+    ]
+
+
+def test_count():
+    store = EntityStore("id", get_test_locations(), ("warehouse_id",))
+
+    assert store.count("warehouse_id", 1) == 2
+    assert store.count("warehouse_id", 99) == 0
+
+
+def test_iter_after(store):
+    assert [item_group.id for item_group in store.iter_after()] == [1, 2, 3]
+    assert [item_group.id for item_group in store.iter_after(1)] == [2, 3]
+    assert list(store.iter_after(3)) == []
+
+
+def test_iter_after_removed_key(store):
+    store.remove(2)
+
+    assert [item_group.id for item_group in store.iter_after(2)] == [3]
+    assert list(store.iter_after(9)) == []
+
+
+def test_version_increases_on_change(store):
+    versions = [store.version]
+    store.add(ItemGroup(id=4, name="Toys", description="Games"))
+    versions.append(store.version)
+    store.replace(4, ItemGroup(id=4, name="Games", description="Games"))
+    versions.append(store.version)
+    store.remove(4)
+    versions.append(store.version)
+
+    assert versions == sorted(set(versions))
+
+
+def test_reloaded_store_gets_newer_version(store):
+    version = store.version
+
+    assert EntityStore("id", get_test_item_groups()).version > version
+
+
+def test_sums():
+    store = EntityStore("id", get_test_locations(), sums=("warehouse_id", ("id",)))
+
+    assert store.sum_of(1) == {"id": 4}
+    store.remove(3)
+    assert store.sum_of(1) == {"id": 1}
+    assert store.sum_of(99) == {"id": 0}
+
+
+def test_snapshot_is_unaffected_by_writes(store):
+    snapshot = store.snapshot()
+    store.add(ItemGroup(id=4, name="Toys", description="Games"))
+    store.remove(1)
+
+    assert [item_group.id for item_group in snapshot.entities] == [1, 2, 3]
+    assert [item_group.id for item_group in store.snapshot().entities] == [2, 3, 4]
+    assert store.snapshot() is store.snapshot()
+
+
+def test_iter_after_is_stable_during_writes(store):
+    iterator = store.iter_after(1)
+    assert next(iterator).id == 2
+    store.remove(3)
+    store.add(ItemGroup(id=4, name="Toys", description="Games"))
+
+    assert [item_group.id for item_group in iterator] == [3]
+
+
+def test_concurrent_reads_and_writes():
+    # Switch threads as often as possible to surface torn reads.
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    store = EntityStore(
+        "id",
+        get_test_locations(),
+        ("warehouse_id",),
+        sums=("warehouse_id", ("warehouse_id",)),
+    )
+    writers = 4
+    writes = 500
+    errors = []
+    stop = threading.Event()
+
+    def write(writer):
+        try:
+            for number in range(writes):
+                key = (writer + 1) * 100000 + number
+                store.add(Location(id=key, warehouse_id=number % 5, code="W", name="W"))
+                store.replace(
+                    key,
+                    Location(id=key, warehouse_id=(number + 1) % 5, code="W", name="R"),
+                )
+                if number % 2:
+                    store.remove(key)
+        except Exception as error:  # pragma: no cover
+            errors.append(error)
+
+    def read():
+        try:
+            while not stop.is_set():
+                ids = [location.id for location in store]
+                assert len(ids) == len(set(ids))
+                assert [location.id for location in store.iter_after(1)][:1] == [2]
+                for location in store.find("warehouse_id", 1):
+                    assert location.warehouse_id == 1
+                [location.model_dump() for location in store.values()]
+                store.sum_of(1)
+        except Exception as error:  # pragma: no cover
+            errors.append(error)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    writer_threads = [
+        threading.Thread(target=write, args=(writer,)) for writer in range(writers)
+    ]
+    try:
+        for thread in readers + writer_threads:
+            thread.start()
+        for thread in writer_threads:
+            thread.join()
+        stop.set()
+        for thread in readers:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert errors == []
+    assert len(store) == 3 + writers * writes // 2
+    assert store.rebuild_sums() == []
+
+
+def test_pending_store():
+    loaded = threading.Event()
+    stores = {}
+    fetched = []
+
+    def fetch(key):
+        fetched.append(key)
+        return ItemGroup(id=key, name="From database", description="")
+
+    stores["data"] = PendingStore(fetch, loaded, lambda: stores["data"])
+    pending = stores["data"]
+
+    assert pending.get(2).name == "From database"
+    assert pending.has(3)
+    assert fetched == [2, 3]
+    assert pending.version is None
+
+    stores["data"] = EntityStore("id", get_test_item_groups())
+    loaded.set()
+    pending.add(ItemGroup(id=2, name="Office", description="Desks"))
+
+    assert len(pending) == 3
+    assert pending[1].name == "Office"
+    assert [item_group.id for item_group in pending.iter_after(1)] == [2, 3]
+
+
+def test_pending_store_failed_load():
+    loaded = threading.Event()
+    loaded.set()
+    stores = {}
+    stores["data"] = PendingStore(lambda key: None, loaded, lambda: stores["data"])
+
+    with pytest.raises(RuntimeError):
+        len(stores["data"])
@@ -0,0 +1,161 @@
+from unittest.mock import MagicMock
+import pytest
+from app.models.v2.inventory import Inventory
+from app.services.v2.model_services import inventory_service as inventory_service_module
+from app.services.v2.model_services.inventory_service import InventoryService
+
+
+def get_inventory(id: int, item_id: str, amount: int) -> Inventory:
+    return Inventory(
+        id=id,
+        item_id=item_id,
+        description="Inventory",
+        item_reference="REF",
+        locations=[1],
+        total_on_hand=amount,
+        total_expected=amount * 2,
+        total_ordered=amount * 3,
+        total_allocated=amount * 4,
+        total_available=amount * 5,
+    )
+
+
+@pytest.fixture
+def mock_db_service():
+    return MagicMock()
+
+
+@pytest.fixture
+def inventory_service(mock_db_service, monkeypatch):
+    pools = MagicMock()
+    pools.fetch_item_pool.return_value.is_item_archived.return_value = False
+    pools.fetch_location_pool.return_value.is_location_archived.return_value = False
+    monkeypatch.setattr(inventory_service_module, "data_provider_v2", pools)
+
+    service = InventoryService(mock_db_service, True)
+    service.data = [
+        get_inventory(1, "P000001", 1),
+        get_inventory(2, "P000001", 10),
+        get_inventory(3, "P000002", 100),
+    ]
+    return service
+
+
+def test_get_inventory_totals_for_item(inventory_service):
+    assert inventory_service.get_inventory_totals_for_item("P000001") == {
+        "total_on_hand": 11,
+        "total_expected": 22,
+        "total_ordered": 33,
+        "total_allocated": 44,
+        "total_available": 55,
+    }
+    assert inventory_service.get_inventory_totals_for_item("P999999") == {
+        "total_on_hand": 0,
+        "total_expected": 0,
+        "total_ordered": 0,
+        "total_allocated": 0,
+        "total_available": 0,
+    }
+
+
+def test_totals_after_add(inventory_service):
+    inventory_service.add_inventory(get_inventory(None, "P000002", 1))
+
+    assert (
+        inventory_service.get_inventory_totals_for_item("P000002")["total_on_hand"]
+        == 101
+    )
+
+
+def test_totals_after_update_in_place(inventory_service):
+    inventory = inventory_service.get_inventory(2)
+    inventory.total_on_hand -= 4
+
+    inventory_service.update_inventory(2, inventory)
+
+    assert (
+        inventory_service.get_inventory_totals_for_item("P000001")["total_on_hand"] == 7
+    )
+
+
+def test_totals_after_moving_to_other_item(inventory_service):
+    inventory_service.update_inventory(3, get_inventory(3, "P000001", 100))
+
+    assert (
+        inventory_service.get_inventory_totals_for_item("P000001")["total_on_hand"]
+        == 111
+    )
+    assert (
+        inventory_service.get_inventory_totals_for_item("P000002")["total_on_hand"] == 0
+    )
+
+
+def test_totals_after_archive(inventory_service):
+    version = inventory_service.version
+
+    inventory_service.archive_inventory(1)
+    inventory_service.unarchive_inventory(1)
+
+    assert inventory_service.version > version
+    assert (
+        inventory_service.get_inventory_totals_for_item("P000001")["total_on_hand"]
+        == 11
+    )
+
+
+def test_archive_leaves_earlier_snapshot_unchanged(inventory_service):
+    before = inventory_service.data.values()
+
+    inventory_service.archive_inventory(1)
+
+    assert not before[0].is_archived
+    assert inventory_service.get_inventory(1).is_archived
+    assert inventory_service.get_inventory(1) is not before[0]
+
+
+def test_rebuild_inventory_totals(inventory_service):
+    assert inventory_service.rebuild_inventory_totals() == []
+
+    inventory_service.get_inventory(3).total_on_hand = 50
+
+    assert inventory_service.rebuild_inventory_totals() == ["P000002"]
+    assert (
+        inventory_service.get_inventory_totals_for_item("P000002")["total_on_hand"]
+        == 50
+    )
+
+
+def test_adjust_on_hand(inventory_service, mock_db_service):
+    inventory_service.archive_inventory(3)
+    conn = mock_db_service.get_connection.return_value.__enter__.return_value
+    conn.executemany.reset_mock()
+
+    adjusted = inventory_service.adjust_on_hand({1: 5, 2: -3, 3: 7, 99: 1})
+
+    assert [inventory.id for inventory in adjusted] == [1, 2]
+    conn.executemany.assert_called_once()
+    assert [row[0] for row in conn.executemany.call_args[0][1]] == [6, 7]
+    inventory = inventory_service.get_inventory(1)
+    assert inventory.total_expected == 6 + 3
+    assert inventory.total_available == 6 - 4
+    assert (
+        inventory_service.get_inventory_totals_for_item("P000001")["total_on_hand"]
+        == 13
+    )
+    assert inventory_service.get_inventory(3).total_on_hand == 100
+
+
+def test_adjust_ordered(inventory_service, mock_db_service):
+    conn = mock_db_service.get_connection.return_value.__enter__.return_value
+    conn.executemany.reset_mock()
+
+    adjusted = inventory_service.adjust_ordered(
+        {"P000001": 2, "P000002": -1000, "P999999": 5}
+    )
+
+    assert [inventory.id for inventory in adjusted] == [2]
+    conn.executemany.assert_called_once()
+    inventory = inventory_service.get_inventory(2)
+    assert inventory.total_ordered == 32
+    assert inventory.total_expected == 10 + 32
+    assert inventory_service.get_inventory(3).total_ordered == 300
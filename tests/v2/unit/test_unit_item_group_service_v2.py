@@ -1,10 +1,12 @@
+import threading
 from unittest.mock import Mock
 import pytest
 from app.models.v2.item_group import ItemGroup
+from app.services.v2 import base_service
+from app.services.v2.database_service import DatabaseService
 from app.services.v2.model_services.item_group_service import ItemGroupService
 from tests.test_globals import *
 
-
 TEST_ITEM_GROUPS = [
     ItemGroup(
         id=1,
@@ -144,7 +146,7 @@ def test_update_item_group_archived(item_group_service, mock_db_service):
 def test_archive_item_group(item_group_service, mock_db_service):
     item_group_id = 1
     item_group = item_group_service.get_item_group(item_group_id)
-    mock_db_service.update.return_value = item_group
+    mock_db_service.update.return_value = item_group.copy(update={"is_archived": True})
 
     result = item_group_service.archive_item_group(item_group_id)
 
@@ -187,3 +189,34 @@ def test_is_item_group_archived(item_group_service):
     assert item_group_service.is_item_group_archived(1) is False
     assert item_group_service.is_item_group_archived(3) is True
     assert item_group_service.is_item_group_archived(99) is None
+
+
+def test_hydrates_in_background(tmp_path, monkeypatch):
+    db = DatabaseService(str(tmp_path / "database.db"))
+    added = ItemGroupService(db, True).add_item_group(
+        ItemGroup(name="Toys", description="Games")
+    )
+    release = threading.Event()
+    load = ItemGroupService.load
+
+    def slow_load(self):
+        release.wait()
+        load(self)
+
+    monkeypatch.setattr(ItemGroupService, "load", slow_load)
+    monkeypatch.setattr(base_service.data_provider_v2, "hydrate_in_background", True)
+    service = ItemGroupService(db, True)
+
+    status = service.hydration_status()
+    assert status["status"] == "hydrating"
+    assert status["rows"] in (None, 1)
+    assert service.version is None
+    assert service.get_item_group(added.id).name == "Toys"
+
+    release.set()
+    assert [item_group.id for item_group in service.get_item_groups()] == [added.id]
+    status = service.hydration_status()
+    assert status["status"] == "ready"
+    assert status["rows"] == 1
+    assert service.version is not None
+    db.close_pool()
@@ -144,7 +144,7 @@ def test_update_item_line_archived(item_line_service, mock_db_service):
 def test_archive_item_line(item_line_service, mock_db_service):
     item_line_id = 1
     item_line = item_line_service.get_item_line(item_line_id)
-    mock_db_service.update.return_value = item_line
+    mock_db_service.update.return_value = item_line.copy(update={"is_archived": True})
 
     result = item_line_service.archive_item_line(item_line_id)
 
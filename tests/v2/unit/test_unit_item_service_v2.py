@@ -1,4 +1,4 @@
-from unittest.mock import Mock
+from unittest.mock import MagicMock, Mock
 import pytest
 from app.models.v2.item import Item
 from app.services.v2.model_services.item_services import ItemService
@@ -219,6 +219,79 @@ def test_add_item(item_service, mock_db_service):
     assert result == new_item
 
 
+def test_add_items(item_service, mock_db_service):
+    new_uid = item_service.generate_uid()
+    new_items = [
+        Item(
+            code=f"QVm0373{i}H",
+            description="Cloned actuating artificial intelligence",
+            short_description="we",
+            upc_code="3722576017240",
+            model_number="aHx-68Q4",
+            commodity_code="t-541-F0g",
+            item_line=54,
+            item_group=88,
+            item_type=42,
+            unit_purchase_quantity=30,
+            unit_order_quantity=17,
+            pack_order_quantity=11,
+            supplier_id=2,
+            supplier_code="SUP237",
+            supplier_part_number="r-920-z2C",
+        )
+        for i in range(2)
+    ]
+    mock_db_service.get_connection.return_value = MagicMock()
+    mock_db_service.insert_many.side_effect = lambda items: items
+
+    result = item_service.add_items(new_items)
+
+    assert mock_db_service.insert_many.call_count == 1
+    assert result[0].uid == new_uid
+    assert result[1].uid == f"P{int(new_uid[1:]) + 1:06d}"
+    assert item_service.get_item(result[1].uid).code == "QVm03731H"
+
+
+def test_add_items_with_uid_taken_by_other_worker(item_service, mock_db_service):
+    new_items = [TEST_ITEMS[0].model_copy(update={"uid": None}) for _ in range(3)]
+    mock_db_service.get_connection.return_value = MagicMock()
+    mock_db_service.insert_many.side_effect = lambda items: [
+        None if i == 1 else item for i, item in enumerate(items)
+    ]
+    mock_db_service.execute_all.return_value = [("P000900",)]
+    count = len(item_service.data)
+
+    result = item_service.add_items(new_items)
+
+    assert mock_db_service.insert_many.call_count == 2
+    assert result[1].uid == "P000901"
+    assert result[0].uid != result[2].uid
+    assert len(item_service.data) == count + 3
+
+
+def test_add_item_with_uid_taken_by_other_worker(item_service, mock_db_service):
+    results = iter([None])
+    mock_db_service.insert.side_effect = lambda item: next(results, item)
+    mock_db_service.execute_all.return_value = [("P000900",)]
+    new_item = TEST_ITEMS[0].model_copy(update={"uid": None})
+
+    added = item_service.add_item(new_item)
+
+    assert added.uid == "P000901"
+    assert item_service.get_item("P000901") is added
+    assert None not in item_service.data.values()
+
+
+def test_apply_changes_advances_uids(item_service, mock_db_service):
+    item_service.generate_uid()
+    mock_db_service.get_connection.return_value = MagicMock()
+    mock_db_service.execute_all.return_value = []
+
+    item_service.apply_changes(["P000500"])
+
+    assert item_service.generate_uid() == "P000501"
+
+
 def test_update_item(item_service, mock_db_service):
     item_id = "P000001"
     updated_item = Item(
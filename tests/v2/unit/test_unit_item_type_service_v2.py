@@ -144,7 +144,7 @@ def test_update_item_type_archived(item_type_service, mock_db_service):
 def test_archive_item_type(item_type_service, mock_db_service):
     item_type_id = 1
     item_type = item_type_service.get_item_type(item_type_id)
-    mock_db_service.update.return_value = item_type
+    mock_db_service.update.return_value = item_type.copy(update={"is_archived": True})
 
     result = item_type_service.archive_item_type(item_type_id)
 
@@ -201,7 +201,7 @@ def test_is_location_archived_not_found(location_service, mock_db_service):
 def test_archive_location(location_service, mock_db_service):
     location_id = 1
     location = location_service.get_location(location_id)
-    mock_db_service.update.return_value = location
+    mock_db_service.update.return_value = location.copy(update={"is_archived": True})
 
     result = location_service.archive_location(location_id)
 
@@ -222,8 +222,10 @@ def test_archive_location_not_found(location_service, mock_db_service):
 def test_unarchive_location(location_service, mock_db_service):
     location_id = 1
     location = location_service.get_location(location_id)
-    location.is_archived = True
-    mock_db_service.update.return_value = location
+    location_service.data.replace(
+        location_id, location.copy(update={"is_archived": True})
+    )
+    mock_db_service.update.return_value = location.copy(update={"is_archived": False})
 
     result = location_service.unarchive_location(location_id)
 
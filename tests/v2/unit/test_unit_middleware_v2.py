@@ -0,0 +1,408 @@
+import logging
+from unittest.mock import MagicMock
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from app.api.v2 import (
+    api_key_middleware,
+    conditional_request_middleware,
+    logging_middleware,
+)
+from app.api.v2.api_key_middleware import ApiKeyProviderMiddleware
+from app.api.v2.conditional_request_middleware import ConditionalRequestMiddleware
+from app.api.v2.response_cache_middleware import ResponseCacheMiddleware
+from app.services.v2.response_cache_service import ResponseCache
+from app.models.v2.order import Order
+from app.models.v2.shipment import Shipment
+from app.models.v2.transfer import Transfer
+from app.services.v2.model_services.order_service import OrderService
+from app.services.v2.model_services.shipment_service import ShipmentService
+from app.services.v2.model_services.transfer_service import TransferService
+from app.api.v2.pagination_middleware import PaginationProviderMiddleware
+from app.api.v2.logging_middleware import LoggingProviderMiddleware
+
+
+class UserPool:
+    def get_permissions(self, api_key):
+        if api_key != "valid":
+            return None
+        return frozenset({("*", "get"), ("orders", "*")})
+
+    def is_allowed(self, permissions, path, method):
+        return ("*", method) in permissions or (path, "*") in permissions
+
+
+class Pool:
+    def __init__(self, version: int):
+        self.version = version
+        self.modified_at = 1700000000.0
+        self.calls = 0
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(
+        api_key_middleware.auth_provider_v2.data_provider_v2, "_users", UserPool()
+    )
+    audit_service = logging_middleware.audit_service
+    app = FastAPI()
+
+    @app.get("/api/v2/orders")
+    def get_orders(request: Request):
+        pagination = request.state.pagination
+        return {"page": pagination.page, "items_per_page": pagination.items_per_page}
+
+    @app.patch("/api/v2/orders/{id}")
+    def patch_order(id: int):
+        return {"request": audit_service.current_request.get()}
+
+    @app.post("/api/v2/items")
+    def post_item():
+        return {}
+
+    app.add_middleware(ApiKeyProviderMiddleware)
+    app.add_middleware(PaginationProviderMiddleware)
+    app.add_middleware(LoggingProviderMiddleware)
+    return TestClient(app)
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    pools = {"items": Pool(3), "inventories": Pool(5)}
+    monkeypatch.setattr(
+        conditional_request_middleware.data_provider_v2,
+        "fetch_loaded_pool",
+        pools.get,
+    )
+    return pools
+
+
+@pytest.fixture
+def conditional_client(pools):
+    app = FastAPI()
+
+    @app.get("/api/v2/items")
+    def get_items():
+        pools["items"].calls += 1
+        return []
+
+    @app.get("/api/v2/items/{id}/inventory")
+    def get_item_inventory(id: str):
+        return []
+
+    @app.get("/api/v2/clients")
+    def get_clients():
+        return []
+
+    app.add_middleware(ConditionalRequestMiddleware)
+    return TestClient(app)
+
+
+def test_no_api_key(client):
+    response = client.get("/api/v2/orders")
+
+    assert response.status_code == 403
+    assert response.json() == {"detail": "No API Key provided"}
+
+
+def test_invalid_api_key(client):
+    response = client.get("/api/v2/orders", headers={"Authorization": "invalid"})
+
+    assert response.status_code == 403
+    assert response.json() == {"detail": "Invalid API Key"}
+
+
+def test_no_access(client):
+    response = client.post("/api/v2/items", headers={"Authorization": "valid"})
+
+    assert response.status_code == 403
+    assert response.json() == {"detail": "You don't have access to this operation"}
+
+
+def test_pagination(client):
+    response = client.get(
+        "/api/v2/orders?page=3&items_per_page=10", headers={"Authorization": "valid"}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"page": 3, "items_per_page": 10}
+
+
+def test_pagination_defaults(client):
+    response = client.get("/api/v2/orders", headers={"Authorization": "valid"})
+
+    assert response.json() == {"page": 1, "items_per_page": 50}
+
+
+@pytest.mark.parametrize(
+    "query, detail",
+    [
+        ("page=one", "Invalid page number"),
+        ("items_per_page=ten", "Invalid items_per_page number"),
+        ("cursor=abc", "Invalid cursor"),
+    ],
+)
+def test_invalid_pagination(client, query, detail):
+    response = client.get(f"/api/v2/orders?{query}", headers={"Authorization": "valid"})
+
+    assert response.status_code == 422
+    assert response.json() == {"detail": detail}
+
+
+def test_logging(client):
+    handler = ListHandler()
+    logging_middleware.info_logger.addHandler(handler)
+    logging_middleware.info_logger.setLevel(logging.INFO)
+    try:
+        response = client.patch("/api/v2/orders/1", headers={"Authorization": "valid"})
+    finally:
+        logging_middleware.info_logger.removeHandler(handler)
+
+    assert response.json() == {"request": "PATCH /api/v2/orders/1"}
+    assert handler.messages == ["Request: PATCH /api/v2/orders/1", "Response: 200"]
+    assert logging_middleware.audit_service.current_request.get() is None
+
+
+def test_etag_and_last_modified(conditional_client):
+    response = conditional_client.get("/api/v2/items")
+
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('"3-')
+    assert response.headers["last-modified"] == "Tue, 14 Nov 2023 22:13:20 GMT"
+
+
+def test_etag_depends_on_query(conditional_client):
+    first = conditional_client.get("/api/v2/items?page=1")
+    second = conditional_client.get("/api/v2/items?page=2")
+
+    assert first.headers["etag"] != second.headers["etag"]
+
+
+def test_sub_resource_uses_newest_collection(conditional_client):
+    response = conditional_client.get("/api/v2/items/P000001/inventory")
+
+    assert response.headers["etag"].startswith('"5-')
+
+
+def test_if_none_match(conditional_client, pools):
+    etag = conditional_client.get("/api/v2/items").headers["etag"]
+
+    response = conditional_client.get("/api/v2/items", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+    assert pools["items"].calls == 1
+
+
+def test_if_none_match_after_change(conditional_client, pools):
+    etag = conditional_client.get("/api/v2/items").headers["etag"]
+    pools["items"].version = 4
+
+    response = conditional_client.get(
+        "/api/v2/items", headers={"If-None-Match": f"W/{etag}"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_if_modified_since(conditional_client):
+    last_modified = conditional_client.get("/api/v2/items").headers["last-modified"]
+
+    response = conditional_client.get(
+        "/api/v2/items", headers={"If-Modified-Since": last_modified}
+    )
+
+    assert response.status_code == 304
+
+
+def test_unknown_collection_has_no_etag(conditional_client):
+    assert "etag" not in conditional_client.get("/api/v2/clients").headers
+
+
+@pytest.fixture
+def cache():
+    return ResponseCache(max_bytes=1024)
+
+
+@pytest.fixture
+def cached_client(pools, cache):
+    app = FastAPI()
+
+    @app.get("/api/v2/items")
+    def get_items():
+        pools["items"].calls += 1
+        return [{"uid": "P000001", "calls": pools["items"].calls}]
+
+    @app.get("/api/v2/items/{id}")
+    def get_item(id: str):
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    app.add_middleware(ResponseCacheMiddleware, cache=cache)
+    return TestClient(app)
+
+
+def test_response_cache_hit(cached_client, pools):
+    first = cached_client.get("/api/v2/items")
+    second = cached_client.get("/api/v2/items")
+
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert second.headers["content-type"] == "application/json"
+    assert pools["items"].calls == 1
+
+
+def test_response_cache_keyed_on_query(cached_client, pools):
+    cached_client.get("/api/v2/items?page=1")
+    cached_client.get("/api/v2/items?page=2")
+
+    assert pools["items"].calls == 2
+
+
+def test_response_cache_invalidated_by_version(cached_client, pools):
+    cached_client.get("/api/v2/items")
+    pools["items"].version = 4
+
+    response = cached_client.get("/api/v2/items")
+
+    assert response.json() == [{"uid": "P000001", "calls": 2}]
+
+
+def test_response_cache_skips_errors(cached_client, cache):
+    cached_client.get("/api/v2/items/P000002")
+
+    assert len(cache) == 0
+
+
+def create_archivable_pools():
+    timestamp = "2024-01-01T00:00:00Z"
+    rows = {
+        "orders": Order(
+            id=1,
+            source_id=1,
+            order_date=timestamp,
+            request_date=timestamp,
+            reference="ORD1",
+            reference_extra="",
+            order_status="Pending",
+            notes="",
+            shipping_notes="",
+            picking_notes="",
+            warehouse_id=1,
+            ship_to=None,
+            bill_to=None,
+            shipment_id=1,
+            total_amount=0,
+            total_discount=0,
+            total_tax=0,
+            total_surcharge=0,
+            created_at=timestamp,
+            updated_at=timestamp,
+        ),
+        "shipments": Shipment(
+            id=1,
+            order_id=1,
+            source_id=1,
+            order_date=timestamp,
+            request_date=timestamp,
+            shipment_date=timestamp,
+            shipment_type="I",
+            shipment_status="Pending",
+            carrier_code="DPD",
+            carrier_description="Dynamic Parcel Distribution",
+            service_code="Fastest",
+            payment_type="Manual",
+            transfer_mode="Ground",
+            total_package_count=1,
+            total_package_weight=1.0,
+            created_at=timestamp,
+            updated_at=timestamp,
+        ),
+        "transfers": Transfer(
+            id=1,
+            reference="TR1",
+            transfer_from=1,
+            transfer_to=2,
+            transfer_status="Scheduled",
+            created_at=timestamp,
+            updated_at=timestamp,
+        ),
+    }
+    dbs = {name: MagicMock() for name in rows}
+    for name, row in rows.items():
+        dbs[name].get_all.return_value = [row]
+    shipment_provider = MagicMock()
+    shipment_provider.fetch_database.return_value = dbs["shipments"]
+    return {
+        "orders": OrderService(dbs["orders"], MagicMock(), True),
+        "shipments": ShipmentService(shipment_provider, True),
+        "transfers": TransferService(dbs["transfers"], MagicMock(), True),
+    }
+
+
+ARCHIVE = {
+    "orders": lambda pool: pool.archive_order(1),
+    "shipments": lambda pool: pool.archive_shipment(1),
+    "transfers": lambda pool: pool.archive_transfer(1),
+}
+
+
+@pytest.fixture
+def archivable_pools(monkeypatch):
+    pools = create_archivable_pools()
+    monkeypatch.setattr(
+        conditional_request_middleware.data_provider_v2,
+        "fetch_loaded_pool",
+        pools.get,
+    )
+    return pools
+
+
+def list_app(pools, middleware, **options):
+    app = FastAPI()
+
+    @app.get("/api/v2/{collection}")
+    def get_collection(collection: str):
+        return [
+            entity.model_dump()
+            for entity in pools[collection].data
+            if not entity.is_archived
+        ]
+
+    app.add_middleware(middleware, **options)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("collection", ["orders", "shipments", "transfers"])
+def test_archive_changes_etag(archivable_pools, collection):
+    client = list_app(archivable_pools, ConditionalRequestMiddleware)
+    etag = client.get(f"/api/v2/{collection}").headers["etag"]
+
+    ARCHIVE[collection](archivable_pools[collection])
+    response = client.get(f"/api/v2/{collection}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json() == []
+
+
+@pytest.mark.parametrize("collection", ["orders", "shipments", "transfers"])
+def test_response_cache_invalidated_by_archive(archivable_pools, cache, collection):
+    client = list_app(archivable_pools, ResponseCacheMiddleware, cache=cache)
+    assert len(client.get(f"/api/v2/{collection}").json()) == 1
+
+    ARCHIVE[collection](archivable_pools[collection])
+    response = client.get(f"/api/v2/{collection}")
+
+    assert response.json() == []
+    assert cache.misses == 2
@@ -3,7 +3,11 @@ import pytest
 from app.models.v2.ItemInObject import ItemInObject
 from app.models.v2.order import Order
 from app.models.v2.shipment import Shipment
+from starlette.datastructures import QueryParams
 from app.services.v2.model_services.order_service import OrderService
+from app.services.v2.pagination_service import Pagination
+from app.services.v2.query_service import Query
+from app.utils.globals import order_items_table
 from tests.test_globals import *
 
 TEST_ORDERS = [
@@ -278,7 +282,12 @@ def test_add_order(order_service, mock_db_service, mock_get_connection, mock_poo
 
     result = order_service.add_order(new_order)
 
-    assert mock_db_service.get_connection().__enter__().execute.call_count == 4
+    assert mock_db_service.get_connection().__enter__().execute.call_count == 2
+    mock_db_service.insert_rows.assert_called_once_with(
+        order_items_table,
+        ("order_id", "item_id", "amount"),
+        [(result.id, "p10011", 1), (result.id, "p10012", 2)],
+    )
     assert new_order in order_service.data
     assert result.source_id == new_order.source_id
 
@@ -412,6 +421,77 @@ def test_add_order_has_archived_entities_warehouse(
     assert new_order not in order_service.data
 
 
+def get_new_order(shipment_id: int) -> Order:
+    return Order(
+        source_id=4,
+        order_date="2022-05-12 08:54:35",
+        request_date="2022-05-12 08:54:35",
+        reference=f"Order for shipment {shipment_id}",
+        reference_extra="",
+        order_status="Pending",
+        notes="",
+        shipping_notes="",
+        picking_notes="",
+        warehouse_id=4,
+        ship_to=4,
+        bill_to=4,
+        shipment_id=shipment_id,
+        total_amount=400.0,
+        total_discount=0.0,
+        total_tax=0.0,
+        total_surcharge=0.0,
+        is_archived=False,
+        items=[ItemInObject(item_id="p10011", amount=1)],
+    )
+
+
+def test_add_orders(order_service, mock_db_service, mock_get_connection, mock_pools):
+    shipment_pool_mock, client_pool_mock, warehouse_pool_mock, item_pool_mock = (
+        mock_pools
+    )
+    shipment_pool_mock.is_shipment_archived.side_effect = (
+        lambda shipment_id: shipment_id == 5
+    )
+    mock_db_service.insert_many.side_effect = lambda orders: [
+        order.model_copy(update={"id": 10 + i}) for i, order in enumerate(orders)
+    ]
+
+    result = order_service.add_orders(
+        [get_new_order(4), get_new_order(5), get_new_order(6)]
+    )
+
+    assert [order.id if order else None for order in result] == [10, None, 11]
+    assert mock_db_service.insert_many.call_count == 1
+    mock_db_service.insert_rows.assert_called_once_with(
+        order_items_table,
+        ("order_id", "item_id", "amount"),
+        [(10, "p10011", 1), (11, "p10011", 1)],
+    )
+    assert order_service.get_order(11).shipment_id == 6
+
+
+def test_update_orders(order_service, mock_db_service, mock_get_connection):
+    first = order_service.get_order(1).model_copy(update={"order_status": "Packed"})
+    second = order_service.get_order(2).model_copy(update={"order_status": "Packed"})
+
+    result = order_service.update_orders([first, second])
+
+    assert [order.order_status for order in result] == ["Packed", "Packed"]
+    assert order_service.get_order(2).order_status == "Packed"
+
+
+def test_update_orders_reloads_on_error(
+    order_service, mock_db_service, mock_get_connection
+):
+    first = order_service.get_order(1).model_copy(update={"order_status": "Packed"})
+    mock_db_service.get_all.reset_mock()
+
+    with pytest.raises(AttributeError):
+        order_service.update_orders([first, None])
+
+    assert mock_db_service.get_all.call_count == 1
+
+
 def test_update_order(order_service, mock_db_service, mock_get_connection):
     mock_db_service, mock_conn, mock_cursor, data_provider_mock = mock_get_connection
     order_id = 1
@@ -546,7 +626,8 @@ def test_update_items_in_order(
 
     result = order_service.update_items_in_order(order_id, updated_items)
     print(result)
-    assert mock_db_service.get_connection().__enter__().execute.call_count == 2
+    assert mock_db_service.get_connection().__enter__().execute.call_count == 3
+    assert mock_db_service.insert_rows.call_count == 1
     assert result is not None
     assert result.items[0].amount == 2
     assert result.items[1].amount == 3
@@ -634,7 +715,8 @@ def test_update_orders_in_shipment(
 
     result = order_service.update_orders_in_shipment(shipment_id, updated_orders)
 
-    assert mock_db_service.get_connection().__enter__().execute.call_count == 8
+    assert mock_db_service.get_connection().__enter__().execute.call_count == 6
+    assert mock_db_service.insert_rows.call_count == 1
     assert result is not None
     assert result[0].order_status == "Packed"
     assert result[1].order_status == "Packed"
@@ -851,3 +933,35 @@ def test_check_if_order_delivered_not_found(
 
     assert mock_db_service.get_connection().__enter__().execute.call_count == 1
     assert result == None
+
+
+def test_paginate_with_query(order_service):
+    query = Query.parse(Order, QueryParams("warehouse_id=1&sort=-id"))
+
+    result = order_service.paginate(Pagination(), query)
+
+    assert [order.id for order in result["data"]] == [1]
+    assert result["pagination"]["total"] == 1
+
+
+def test_paginate_after_archive(order_service, mock_get_connection):
+    mock_db_service, mock_conn, mock_cursor, data_provider_mock = mock_get_connection
+    mock_cursor.fetchone.return_value = pydantic_models_value_to_tuple(
+        order_service.get_order(2)
+    )
+
+    order_service.archive_order(2)
+    result = order_service.paginate(Pagination())
+
+    assert [order.id for order in result["data"]] == [1]
+    assert result["pagination"]["total"] == 1
+
+
+def test_paginate_with_query_uses_index(order_service):
+    order_service.data.add(TEST_ORDERS[0].model_copy(update={"id": 4}))
+    query = Query.parse(Order, QueryParams("warehouse_id=1&sort=-id"))
+
+    assert [order.id for order in order_service.query_candidates(query)] == [1, 3, 4]
+    assert [
+        order.id for order in order_service.paginate(Pagination(), query)["data"]
+    ] == [4, 1]
@@ -0,0 +1,111 @@
+import pytest
+from app.models.v2.item_group import ItemGroup
+from app.services.v2.model_services.entity_store import EntityStore
+from app.services.v2.pagination_service import (
+    Pagination,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+@pytest.fixture
+def store():
+    return EntityStore(
+        "id",
+        [
+            ItemGroup(id=id, name=f"Group {id}", description="", is_archived=id == 3)
+            for id in range(1, 8)
+        ],
+        ("is_archived",),
+    )
+
+
+def page_of(store, pagination):
+    return pagination.apply_to_store(
+        store, store.count("is_archived", False), lambda entity: not entity.is_archived
+    )
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor({"after": "P000001"})) == {"after": "P000001"}
+    assert decode_cursor(encode_cursor({"offset": 20})) == {"offset": 20}
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        encode_cursor({"other": 1}),
+        encode_cursor([1]),
+        encode_cursor({"after": None}),
+        encode_cursor({"after": [1]}),
+        encode_cursor({"after": {"id": 1}}),
+    ],
+)
+def test_decode_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_apply_list():
+    result = Pagination(page=2, items_per_page=2).apply(list(range(5)))
+
+    assert result["data"] == [2, 3]
+    assert result["pagination"] == {
+        "total": 5,
+        "page": 2,
+        "items_per_page": 2,
+        "pages": 3,
+        "next": encode_cursor({"offset": 4}),
+    }
+
+
+def test_apply_list_with_cursor():
+    result = Pagination(items_per_page=2, cursor={"offset": 4}).apply(list(range(5)))
+
+    assert result["data"] == [4]
+    assert result["pagination"]["page"] == 3
+    assert result["pagination"]["next"] is None
+
+
+def test_apply_to_store_by_page(store):
+    result = page_of(store, Pagination(page=2, items_per_page=2))
+
+    assert [item_group.id for item_group in result["data"]] == [4, 5]
+    assert result["pagination"]["total"] == 6
+    assert result["pagination"]["pages"] == 3
+    assert decode_cursor(result["pagination"]["next"]) == {"after": 5}
+
+
+def test_apply_to_store_page_too_high(store):
+    result = page_of(store, Pagination(page=9, items_per_page=2))
+
+    assert result["pagination"]["page"] == 1
+    assert [item_group.id for item_group in result["data"]] == [1, 2]
+
+
+def test_apply_to_store_follows_cursors(store):
+    pages = []
+    pagination = Pagination(items_per_page=2)
+    while True:
+        result = page_of(store, pagination)
+        pages.append([item_group.id for item_group in result["data"]])
+        if result["pagination"]["next"] is None:
+            break
+        pagination = Pagination(
+            items_per_page=2, cursor=decode_cursor(result["pagination"]["next"])
+        )
+
+    assert pages == [[1, 2], [4, 5], [6, 7]]
+
+
+def test_apply_to_store_visits_only_the_page(store):
+    visited = []
+
+    def include(entity):
+        visited.append(entity.id)
+        return not entity.is_archived
+
+    Pagination(items_per_page=2, cursor={"after": 4}).apply_to_store(store, 6, include)
+
+    assert visited == [5, 6, 7]
@@ -0,0 +1,97 @@
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import QueryParams
+from app.models.v2.order import Order
+from app.services.v2.query_service import Query
+
+
+def get_order(id: int, **update) -> Order:
+    order = Order(
+        id=id,
+        source_id=id,
+        order_date=f"2022-05-{10 + id} 08:54:35",
+        request_date="2022-05-12 08:54:35",
+        reference=f"Order #{id}",
+        reference_extra="",
+        order_status="Pending",
+        notes="",
+        shipping_notes="",
+        picking_notes="",
+        warehouse_id=1,
+        ship_to=None,
+        bill_to=1,
+        shipment_id=1,
+        total_amount=100.0 * id,
+        total_discount=0.0,
+        total_tax=0.0,
+        total_surcharge=0.0,
+    )
+    return order.model_copy(update=update)
+
+
+def parse(query_string: str) -> Query:
+    return Query.parse(Order, QueryParams(query_string))
+
+
+def test_parse():
+    query = parse(
+        "order_status=Packed&warehouse_id=3&order_date[gte]=2022-05-12"
+        "&page=2&items_per_page=10&sort=-updated_at,id"
+    )
+
+    assert query.filters == [
+        ("order_status", "eq", "Packed"),
+        ("warehouse_id", "eq", 3),
+        ("order_date", "gte", "2022-05-12"),
+    ]
+    assert query.sort == [("updated_at", True), ("id", False)]
+    assert query.equality_filters() == [("order_status", "Packed"), ("warehouse_id", 3)]
+
+
+def test_parse_empty():
+    assert not parse("page=1&cursor=abc")
+
+
+def test_parse_in():
+    assert parse("id[in]=1,3").filters == [("id", "in", [1, 3])]
+
+
+@pytest.mark.parametrize(
+    "query_string, detail",
+    [
+        ("unknown=1", "Cannot filter on 'unknown'"),
+        ("items=1", "Cannot filter on 'items'"),
+        ("warehouse_id[like]=1", "Unknown operator 'like' for 'warehouse_id'"),
+        ("warehouse_id=three", "Invalid value 'three' for 'warehouse_id'"),
+        ("sort=-unknown", "Cannot sort on 'unknown'"),
+    ],
+)
+def test_parse_invalid(query_string, detail):
+    with pytest.raises(HTTPException) as error:
+        parse(query_string)
+
+    assert error.value.status_code == 422
+    assert error.value.detail == [detail]
+
+
+def test_matches():
+    query = parse("order_date[gte]=2022-05-12&order_date[lt]=2022-05-14&bill_to=1")
+
+    assert [id for id in range(1, 6) if query.matches(get_order(id))] == [2, 3]
+
+
+def test_matches_none_value():
+    assert not parse("ship_to[gt]=1").matches(get_order(1))
+    assert parse("ship_to[ne]=1").matches(get_order(1))
+
+
+def test_sorted():
+    orders = [
+        get_order(1, order_status="Packed"),
+        get_order(2, order_status="Pending"),
+        get_order(3, order_status="Packed"),
+    ]
+
+    result = parse("sort=order_status,-total_amount").sorted(orders)
+
+    assert [order.id for order in result] == [3, 1, 2]
@@ -0,0 +1,66 @@
+from app.services.v2.response_cache_service import ResponseCache
+
+HEADERS = [(b"content-type", b"application/json")]
+
+
+def test_get_same_version():
+    cache = ResponseCache(max_bytes=100)
+    cache.put("orders", 1, HEADERS, b"[1]")
+
+    assert cache.get("orders", 1) == (HEADERS, b"[1]")
+    assert cache.hits == 1
+
+
+def test_get_other_version():
+    cache = ResponseCache(max_bytes=100)
+    cache.put("orders", 1, HEADERS, b"[1]")
+
+    assert cache.get("orders", 2) is None
+    assert cache.misses == 1
+
+
+def test_put_replaces_older_version():
+    cache = ResponseCache(max_bytes=100)
+    cache.put("orders", 1, HEADERS, b"[1]")
+    cache.put("orders", 2, HEADERS, b"[1, 2]")
+
+    assert cache.get("orders", 2) == (HEADERS, b"[1, 2]")
+    assert len(cache) == 1
+    assert cache.size == 6
+
+
+def test_put_keeps_newer_version():
+    cache = ResponseCache(max_bytes=100)
+    cache.put("orders", 2, HEADERS, b"[1, 2]")
+
+    assert not cache.put("orders", 1, HEADERS, b"[1]")
+    assert cache.get("orders", 2) == (HEADERS, b"[1, 2]")
+
+
+def test_evicts_least_recently_used():
+    cache = ResponseCache(max_bytes=10)
+    cache.put("a", 1, HEADERS, b"aaaa")
+    cache.put("b", 1, HEADERS, b"bbbb")
+    cache.get("a", 1)
+    cache.put("c", 1, HEADERS, b"cccc")
+
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) is not None
+    assert cache.get("c", 1) is not None
+    assert cache.size == 8
+
+
+def test_skips_large_entries():
+    cache = ResponseCache(max_bytes=100, max_entry_bytes=4)
+
+    assert not cache.put("a", 1, HEADERS, b"aaaaa")
+    assert len(cache) == 0
+
+
+def test_clear():
+    cache = ResponseCache(max_bytes=100)
+    cache.put("a", 1, HEADERS, b"a")
+    cache.clear()
+
+    assert len(cache) == 0
+    assert cache.size == 0
@@ -130,6 +130,13 @@ def mock_pools(mock_db_service, mock_get_connection):
     return order_pool_mock, inventory_pool_mock, item_pool_mock
 
 
+def archive_in_store(shipment_service, shipment_id):
+    shipment = shipment_service.get_shipment(shipment_id)
+    shipment_service.data.replace(
+        shipment_id, shipment.model_copy(update={"is_archived": True})
+    )
+
+
 @pytest.fixture
 def shipment_service(mock_db_service, mock_get_connection):
     """Fixture to create an OrderService instance with the mocked DatabaseService."""
@@ -245,7 +252,8 @@ def test_add_shipment(shipment_service, mock_db_service, mock_pools):
 
     result = shipment_service.add_shipment(new_shipment)
 
-    assert mock_db_service.get_connection().__enter__().execute.call_count == 4
+    assert mock_db_service.get_connection().__enter__().execute.call_count == 2
+    assert mock_db_service.insert_rows.call_count == 1
     assert new_shipment in shipment_service.data
     assert result.source_id == new_shipment.source_id
 
@@ -529,6 +537,7 @@ def test_update_items_in_shipment(shipment_service, mock_db_service, mock_pools)
     assert mock_db_service.get_connection().__enter__().execute.call_count == 4
     assert result.source_id == TEST_SHIPMENTS[0].source_id
     assert result.items == updated_items
+    inventory_pool_mock.adjust_ordered.assert_called_once()
 
 
 def test_update_items_in_shipment_with_archived_items(
@@ -611,6 +620,7 @@ def test_archive_shipment_not_found(shipment_service, mock_db_service, mock_pool
 
 def test_update_archived_shipment(shipment_service, mock_db_service, mock_pools):
     order_pool_mock, inventory_pool_mock, item_pool_mock = mock_pools
+    archive_in_store(shipment_service, 1)
 
     order_pool_mock.is_order_archived.return_value = True
     item_pool_mock.is_item_archived.return_value = False
@@ -649,6 +659,7 @@ def test_update_archived_shipment(shipment_service, mock_db_service, mock_pools)
 def test_update_shipment_items_archived(shipment_service, mock_db_service, mock_pools):
     shipment_id = 1
     order_pool_mock, inventory_pool_mock, item_pool_mock = mock_pools
+    archive_in_store(shipment_service, shipment_id)
 
     inventory_pool_mock.get_inventories_for_item.return_value = [
         Inventory(
@@ -764,6 +775,7 @@ def test_commit_shipment_to_transit(shipment_service, mock_db_service, mock_pool
 
 
 def test_commit_shipment_to_delivered(shipment_service, mock_db_service, mock_pools):
+    shipment_service.commit_shipment(1)
     shipments = shipment_service.commit_shipment(1)
 
     assert shipments.id == 1
@@ -0,0 +1,101 @@
+import pytest
+from app.models.v2.ItemInObject import ItemInObject
+from app.models.v2.item_group import ItemGroup
+from app.models.v2.order import Order
+from app.services.v2 import base_service
+from app.services.v2.database_service import DatabaseService
+from app.services.v2.model_services.item_group_service import ItemGroupService
+
+# The module the services restore from.
+snapshot_service = base_service.snapshot_service
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseService(str(tmp_path / "database.db"))
+    yield db
+    snapshot_service.discard()
+    db.close_pool()
+
+
+@pytest.fixture
+def item_groups(db):
+    item_groups = ItemGroupService(db, True)
+    item_groups.add_item_group(ItemGroup(name="Toys", description="Games"))
+    item_groups.add_item_group(ItemGroup(name="Tools", description="Hammers"))
+    item_groups.archive_item_group(1)
+    return item_groups
+
+
+def test_encode_decode_nested_models():
+    order = Order(
+        id=1,
+        source_id=2,
+        order_date="2024-01-01",
+        request_date="2024-01-02",
+        reference="ORD1",
+        reference_extra="",
+        order_status="Pending",
+        notes="",
+        shipping_notes="",
+        picking_notes="",
+        warehouse_id=3,
+        ship_to=None,
+        bill_to=4,
+        shipment_id=5,
+        total_amount=1.5,
+        total_discount=0,
+        total_tax=0,
+        total_surcharge=0,
+        items=[ItemInObject(item_id="P000001", amount=2)],
+    )
+    without_items = order.model_copy(update={"id": 2, "items": None})
+
+    decoded = snapshot_service.decode(
+        Order, snapshot_service.encode(Order, [order, without_items])
+    )
+
+    assert decoded == [order, without_items]
+    assert isinstance(decoded[0].items[0], ItemInObject)
+
+
+def test_restores_pools_from_snapshot(db, item_groups):
+    snapshot_service.write_snapshot(db, [item_groups])
+
+    assert snapshot_service.restore(db)
+    restored = ItemGroupService(db, True)
+
+    assert restored.hydration_status()["source"] == "snapshot"
+    assert [item_group.model_dump() for item_group in restored.data] == [
+        item_group.model_dump() for item_group in item_groups.data
+    ]
+    assert restored.data.count("is_archived", True) == 1
+
+
+def test_ignores_stale_snapshot(db, item_groups):
+    snapshot_service.write_snapshot(db, [item_groups])
+    item_groups.add_item_group(ItemGroup(name="Paint", description="Brushes"))
+
+    assert not snapshot_service.restore(db)
+    restored = ItemGroupService(db, True)
+
+    assert restored.hydration_status()["source"] == "database"
+    assert len(restored.data) == 3
+
+
+def test_ignores_snapshot_after_write_since_restore(db, item_groups):
+    snapshot_service.write_snapshot(db, [item_groups])
+    assert snapshot_service.restore(db)
+
+    item_groups.add_item_group(ItemGroup(name="Paint", description="Brushes"))
+    restored = ItemGroupService(db, True)
+
+    assert restored.hydration_status()["source"] == "database"
+    assert len(restored.data) == 3
+    assert snapshot_service.take(restored) is None
+
+
+def test_hydrated_skips_pools_that_did_not_load(item_groups):
+    item_groups.hydration["status"] = "failed"
+
+    assert snapshot_service.hydrated([item_groups]) == []
@@ -189,7 +189,7 @@ def test_update_supplier_archived(supplier_service, mock_db_service):
 def test_archive_supplier(supplier_service, mock_db_service):
     supplier_id = 1
     supplier = supplier_service.get_supplier(supplier_id)
-    mock_db_service.update.return_value = supplier
+    mock_db_service.update.return_value = supplier.copy(update={"is_archived": True})
 
     result = supplier_service.archive_supplier(supplier_id)
 
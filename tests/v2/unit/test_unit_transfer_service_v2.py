@@ -98,6 +98,13 @@ def mock_pools(mock_db_service, mock_get_connection):
     return item_pool_mock, inventory_pool_mock, warehouse_pool_mock
 
 
+def archive_in_store(transfer_service, transfer_id):
+    transfer = transfer_service.get_transfer(transfer_id)
+    transfer_service.data.replace(
+        transfer_id, transfer.model_copy(update={"is_archived": True})
+    )
+
+
 @pytest.fixture
 def transfer_service(mock_db_service, mock_get_connection):
     """Fixture to create an TransferService instance with the mocked DatabaseService."""
@@ -193,7 +200,8 @@ def test_add_transfer(
 
     result = transfer_service.add_transfer(transfer)
 
-    assert mock_db_service.get_connection().__enter__().execute.call_count == 4
+    assert mock_db_service.get_connection().__enter__().execute.call_count == 2
+    assert mock_db_service.insert_rows.call_count == 1
     assert transfer in transfer_service.data
     assert result.id == transfer.id
 
@@ -274,7 +282,8 @@ def test_update_order(
 
     result = transfer_service.update_transfer(transfer_id, updated_transfer)
 
-    assert mock_db_service.get_connection().__enter__().execute.call_count == 5
+    assert mock_db_service.get_connection().__enter__().execute.call_count == 3
+    assert mock_db_service.insert_rows.call_count == 1
     assert result.transfer_status == "Pending"
     updated_transfer = transfer_service.get_transfer(transfer_id)
     assert updated_transfer.transfer_status == "Pending"
@@ -405,7 +414,11 @@ def test_commit_transfer(
 
     result = transfer_service.commit_transfer(transfer)
 
-    assert mock_db_service.get_connection().__enter__().execute.call_count == 1
+    assert mock_db_service.get_connection().__enter__().execute.call_count == 2
+    amount = sum(item.amount for item in transfer.items)
+    inventory_pool_mock.adjust_on_hand.assert_called_once_with(
+        {1: -amount, 2: amount}, True
+    )
     assert result.transfer_status == "Processed"
     assert transfer_service.get_transfer(transfer_id).transfer_status == "Processed"
 
@@ -426,6 +439,7 @@ def test_commit_archived_transfer(
     transfer_service, mock_db_service, mock_get_connection
 ):
     transfer_id = 3
+    archive_in_store(transfer_service, transfer_id)
     transfer = transfer_service.get_transfer(transfer_id)
     assert transfer is not None
 
@@ -449,6 +463,7 @@ def test_is_transfer_archived(transfer_service, mock_db_service, mock_get_connec
     mock_db_service, mock_conn, mock_cursor, data_provider_mock = mock_get_connection
 
     transfer_id = 1
+    archive_in_store(transfer_service, transfer_id)
     transfer = transfer_service.get_transfer(transfer_id)
     assert transfer is not None
 
@@ -492,3 +507,20 @@ def test_unarchive_transfer_not_found(
 
     assert mock_db_service.get_connection().__enter__().execute.call_count == 1
     assert result == None
+
+
+def test_commit_transfer_failure_reloads_inventories(
+    transfer_service, mock_db_service, mock_get_connection, mock_pools
+):
+    item_pool_mock, inventory_pool_mock, warehouse_pool_mock = mock_pools
+    inventory_pool_mock.get_inventories_for_item.return_value = []
+    inventory_pool_mock.adjust_on_hand.side_effect = RuntimeError("disk full")
+    transfer = transfer_service.get_transfer(2).model_copy(
+        update={"is_archived": False}
+    )
+
+    with pytest.raises(RuntimeError):
+        transfer_service.commit_transfer(transfer)
+
+    inventory_pool_mock.load.assert_called_once()
+    assert transfer_service.get_transfer(2).transfer_status != "Processed"
@@ -0,0 +1,58 @@
+import threading
+from app.services.v2.uid_service import UidAllocator
+
+
+def test_allocate_after_existing_uids():
+    allocator = UidAllocator("P", 6, ["P000003", "P000010", "P000007"])
+
+    assert allocator.peek() == "P000011"
+    assert allocator.allocate() == "P000011"
+    assert allocator.allocate() == "P000012"
+
+
+def test_allocate_empty():
+    assert UidAllocator().allocate() == "P000001"
+
+
+def test_ignores_malformed_uids():
+    allocator = UidAllocator("P", 6, ["P000002", "legacy", None])
+
+    assert allocator.allocate() == "P000003"
+
+
+def test_reserve_block():
+    allocator = UidAllocator("P", 6, ["P000005"])
+
+    assert allocator.reserve(3) == ["P000006", "P000007", "P000008"]
+    assert allocator.allocate() == "P000009"
+    assert allocator.reserve(0) == []
+
+
+def test_advance_past_uids_of_other_workers():
+    allocator = UidAllocator("P", 6, ["P000005"])
+    allocator.allocate()
+
+    allocator.advance_past(["P000009", "P000003"])
+    assert allocator.allocate() == "P000010"
+
+    allocator.advance_past(["P000004"])
+    assert allocator.allocate() == "P000011"
+
+
+def test_allocate_is_thread_safe():
+    allocator = UidAllocator()
+    allocated = []
+
+    def allocate_many():
+        uids = [allocator.allocate() for _ in range(1000)]
+        uids += allocator.reserve(100)
+        allocated.extend(uids)
+
+    threads = [threading.Thread(target=allocate_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(allocated)) == len(allocated) == 8 * 1100
+    assert allocator.peek() == "P008801"
@@ -0,0 +1,114 @@
+from unittest.mock import MagicMock, Mock
+import pytest
+from app.models.v2.endpoint_access import EndpointAccess
+from app.models.v2.user import User
+from app.services.v2.model_services import user_service as user_service_module
+from app.services.v2.model_services.user_service import UserService
+
+
+def get_test_users():
+    return [
+        User(id=1, api_key="admin", app="Admin", full=True, endpoint_access=[]),
+        User(
+            id=2,
+            api_key="warehouse",
+            app="Warehouse",
+            full=False,
+            endpoint_access=[
+                EndpointAccess(endpoint="orders", full=True),
+                EndpointAccess(
+                    endpoint="items", full=False, get=True, post=False, put=True
+                ),
+            ],
+        ),
+    ]
+
+
+@pytest.fixture
+def mock_db_service():
+    return MagicMock()
+
+
+@pytest.fixture
+def user_service(mock_db_service, monkeypatch):
+    monkeypatch.setattr(
+        user_service_module.data_provider_v2, "fetch_database", lambda: mock_db_service
+    )
+    service = UserService(True)
+    service.data = get_test_users()
+    return service
+
+
+def test_get_permissions(user_service):
+    assert user_service.get_permissions("admin") == frozenset({("*", "*")})
+    assert user_service.get_permissions("warehouse") == frozenset(
+        {("orders", "*"), ("items", "get"), ("items", "put")}
+    )
+    assert user_service.get_permissions("unknown") is None
+
+
+@pytest.mark.parametrize(
+    "api_key, path, method, expected",
+    [
+        ("admin", "clients", "delete", True),
+        ("warehouse", "orders", "delete", True),
+        ("warehouse", "items", "get", True),
+        ("warehouse", "items", "put", True),
+        ("warehouse", "items", "post", False),
+        ("warehouse", "items", "patch", False),
+        ("warehouse", "clients", "get", False),
+        ("unknown", "orders", "get", False),
+    ],
+)
+def test_has_access(user_service, api_key, path, method, expected):
+    assert user_service.has_access(api_key, path, method) is expected
+
+
+def test_permissions_are_compiled_once(user_service, monkeypatch):
+    compile_permissions = Mock(wraps=user_service.compile_permissions)
+    monkeypatch.setattr(user_service, "compile_permissions", compile_permissions)
+
+    for _ in range(5):
+        user_service.has_access("warehouse", "orders", "get")
+
+    assert compile_permissions.call_count == 2
+
+
+def test_invalidate_permissions(user_service):
+    assert user_service.get_permissions("new") is None
+
+    user_service.data.add(
+        User(id=3, api_key="new", app="New", full=True, endpoint_access=[])
+    )
+    user_service.invalidate_permissions()
+
+    assert user_service.get_permissions("new") == frozenset({("*", "*")})
+
+
+def test_update_user_invalidates_permissions(user_service, mock_db_service):
+    user = user_service.data.get(2).model_copy(update={"endpoint_access": []})
+    cursor = mock_db_service.get_connection.return_value.__enter__.return_value.cursor
+    cursor.return_value.fetchone.return_value = (2, "warehouse", "Warehouse", 0, 0)
+    cursor.return_value.fetchall.return_value = []
+    assert user_service.has_access("warehouse", "orders", "get")
+
+    user_service.update_user(2, user)
+
+    assert not user_service.has_access("warehouse", "orders", "get")
+
+
+def test_permissions_reload_users_after_ttl(user_service, monkeypatch):
+    user_service.is_debug = False
+    monkeypatch.setattr(
+        user_service,
+        "get_all_users",
+        lambda: [
+            User(id=4, api_key="other", app="Other", full=True, endpoint_access=[])
+        ],
+    )
+    assert user_service.get_permissions("admin") is not None
+
+    user_service._permissions_expire_at = 0.1
+
+    assert user_service.get_permissions("admin") is None
+    assert user_service.get_permissions("other") == frozenset({("*", "*")})
@@ -235,8 +235,10 @@ def test_unarchive_warehouse(warehouse_service, mock_db_service):
     warehouse = warehouse_service.get_warehouse(warehouse_id)
     assert warehouse is not None
 
-    warehouse.is_archived = True
-    mock_db_service.update.return_value = warehouse
+    warehouse_service.data.replace(
+        warehouse_id, warehouse.copy(update={"is_archived": True})
+    )
+    mock_db_service.update.return_value = warehouse.copy(update={"is_archived": False})
 
     result = warehouse_service.unarchive_warehouse(warehouse_id)
 
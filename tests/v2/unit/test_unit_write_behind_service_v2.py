@@ -0,0 +1,81 @@
+import threading
+import time
+from app.services.v2.write_behind_service import WriteBehind
+
+
+def test_mark_dirty_coalesces_writes():
+    calls = []
+    writer = WriteBehind("test", lambda: calls.append(1), delay=0.05, max_delay=1)
+
+    for _ in range(100):
+        writer.mark_dirty()
+    writer.drain(timeout=2)
+
+    assert len(calls) == 1
+    assert writer.pending == 0
+
+
+def test_max_delay_forces_flush():
+    flushed = threading.Event()
+    writer = WriteBehind("test", flushed.set, delay=10, max_delay=0.05)
+
+    writer.mark_dirty()
+
+    assert flushed.wait(timeout=2)
+    writer.drain(timeout=2)
+
+
+def test_flush_without_changes():
+    calls = []
+    writer = WriteBehind("test", lambda: calls.append(1))
+
+    assert writer.flush() is False
+    assert calls == []
+
+
+def test_save_now():
+    calls = []
+    writer = WriteBehind("test", lambda: calls.append(1), delay=10, max_delay=10)
+
+    writer.mark_dirty()
+    writer.save_now()
+
+    assert len(calls) == 1
+    assert writer.pending == 0
+    writer.drain(timeout=2)
+    assert len(calls) == 1
+
+
+def test_failed_flush_keeps_changes_pending():
+    calls = []
+
+    def failing_callback():
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError("disk full")
+
+    writer = WriteBehind("test", failing_callback, delay=10, max_delay=10)
+    writer.mark_dirty()
+
+    try:
+        writer.flush()
+    except OSError:
+        pass
+
+    assert writer.pending == 1
+    writer.drain(timeout=2)
+    assert len(calls) == 2
+    assert writer.pending == 0
+
+
+def test_writes_after_drain_restart_worker():
+    calls = []
+    writer = WriteBehind("test", lambda: calls.append(1), delay=0.01, max_delay=1)
+
+    writer.mark_dirty()
+    writer.drain(timeout=2)
+    writer.mark_dirty()
+    time.sleep(0.2)
+
+    assert len(calls) == 2
+    writer.drain(timeout=2)